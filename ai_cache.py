@@ -0,0 +1,144 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+# SQLite cache of parsed AI extraction answers
+CACHE_ROOT = os.getenv("CACHE_ROOT") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")  # Shared with html_cache
+AI_CACHE_PATH = os.path.join(CACHE_ROOT, "ai_cache.sqlite3")
+AI_CACHE_MAX_BYTES = 64 * 1024 * 1024   # Least recently used answers are evicted above this size
+AI_CACHE_TTL = 7 * 24 * 60 * 60         # Seconds an answer is reused
+
+
+def make_ai_cache_key(text, fields, provider, model, prompt_version):
+    """Hash of everything that determines the AI answer for a piece of page text."""
+    payload = json.dumps({
+        "text": text,
+        "fields": list(fields),
+        "provider": provider.lower(),
+        "model": model,
+        "prompt_version": prompt_version,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AiCache:
+    """
+    Answers keyed by make_ai_cache_key(), stored as JSON in one SQLite table.
+
+    accessed_at is updated on every hit and drives LRU eviction once the
+    stored answers exceed max_bytes. One connection is shared by the
+    extraction threads behind a lock.
+    """
+
+    def __init__(self, path=AI_CACHE_PATH, max_bytes=AI_CACHE_MAX_BYTES, ttl=AI_CACHE_TTL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = None
+        self._size = None
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+
+    def _connect(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS ai_results ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ai_results_accessed ON ai_results (accessed_at)")
+            self._conn.commit()
+            self._size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM ai_results").fetchone()[0]
+        return self._conn
+
+    def get(self, key):
+        """The cached answer, or None if absent or older than the TTL."""
+        with self._lock:
+            try:
+                conn = self._connect()
+                row = conn.execute("SELECT value, size, created_at FROM ai_results WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self.stats["misses"] += 1
+                    return None
+                value, size, created_at = row
+                now = time.time()
+                if now - created_at >= self.ttl:
+                    conn.execute("DELETE FROM ai_results WHERE key = ?", (key,))
+                    conn.commit()
+                    self._size -= size
+                    self.stats["expired"] += 1
+                    self.stats["misses"] += 1
+                    return None
+                conn.execute("UPDATE ai_results SET accessed_at = ? WHERE key = ?", (now, key))
+                conn.commit()
+                self.stats["hits"] += 1
+                return json.loads(value)
+            except (sqlite3.Error, ValueError) as e:
+                logging.warning(f"AI cache read failed: {e}")
+                self.stats["misses"] += 1
+                return None
+
+    def put(self, key, value):
+        """Store an answer and evict least recently used ones if over budget."""
+        payload = json.dumps(value)
+        size = len(payload.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connect()
+                row = conn.execute("SELECT size FROM ai_results WHERE key = ?", (key,)).fetchone()
+                conn.execute(
+                    "INSERT OR REPLACE INTO ai_results (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, payload, size, now, now),
+                )
+                self._size += size - (row[0] if row else 0)
+                if self._size > self.max_bytes:
+                    self._evict(conn)
+                conn.commit()
+            except sqlite3.Error as e:
+                logging.warning(f"AI cache write failed: {e}")
+
+    def _evict(self, conn):
+        target = self.max_bytes * 0.9
+        # Expired answers first, then oldest access
+        expired = conn.execute(
+            "SELECT key, size FROM ai_results WHERE created_at <= ?", (time.time() - self.ttl,)
+        ).fetchall()
+        rows = expired + conn.execute("SELECT key, size FROM ai_results ORDER BY accessed_at").fetchall()
+        removed = set()
+        for key, size in rows:
+            if self._size <= target:
+                break
+            if key in removed:
+                continue
+            conn.execute("DELETE FROM ai_results WHERE key = ?", (key,))
+            removed.add(key)
+            self._size -= size
+            self.stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM ai_results")
+            conn.commit()
+            self._size = 0
+
+    def status(self):
+        with self._lock:
+            try:
+                conn = self._connect()
+                entries = conn.execute("SELECT COUNT(*) FROM ai_results").fetchone()[0]
+            except sqlite3.Error:
+                entries = 0
+            return {"entries": entries, "bytes": self._size or 0, "max_bytes": self.max_bytes, **self.stats}
+
+
+ai_cache = AiCache()
@@ -0,0 +1,194 @@
+import asyncio
+import atexit
+import logging
+import random
+import threading
+import httpx
+from browser_pool import run_on_pool, run_on_pool_sync
+from utils import RateLimiter, parse_retry_after
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Shared HTTP client for the LLM providers; like http_fetch it lives on the browser-pool loop
+AI_TIMEOUT = 120.0               # Seconds to wait for a completion
+AI_CONNECT_TIMEOUT = 10.0        # Seconds to establish a connection
+AI_MAX_CONNECTIONS = 20          # Total open connections across providers
+AI_MAX_KEEPALIVE = 10            # Idle keep-alive connections kept for reuse
+AI_MAX_RETRIES = 4               # Retries on 429, 5xx and connection errors
+AI_RETRY_BASE_DELAY = 1.0        # Seconds; doubled on every retry
+AI_MODELS = {  # Model each provider is called with
+    "groq": "deepseek-r1-distill-qwen-32b",
+    "openai": "gpt-4o-mini",
+    "gemini": "gemini-1.5-flash",
+    "deepseek": "deepseek-chat",
+}
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+PROVIDER_RATE_LIMITS = {  # provider -> (requests per minute, tokens per minute or None)
+    "groq": (30, 6000),
+    "openai": (500, 200000),
+    "gemini": (15, 1000000),
+    "deepseek": (60, None),
+}
+CHARS_PER_TOKEN = 4               # Token estimate for prompts when reserving TPM budget
+AI_ANSWER_TOKENS = 1000           # Tokens reserved for the answer; corrected from reported usage
+
+_client = None
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+class AiProviderError(Exception):
+    """A provider call that failed; status is the HTTP status or None for transport errors."""
+
+    def __init__(self, provider, status, message):
+        super().__init__(f"{provider}: {status} {message}")
+        self.provider = provider
+        self.status = status
+
+
+def _chat_request(url, system=None, temperature=None):
+    def build(prompt, api_key, model):
+        messages = [{"role": "system", "content": system}] if system else []
+        messages.append({"role": "user", "content": prompt})
+        data = {"model": model, "messages": messages}
+        if temperature is not None:
+            data["temperature"] = temperature
+        return url, {"Authorization": f"Bearer {api_key}"}, data
+    return build
+
+
+def _chat_text(data):
+    return data["choices"][0]["message"]["content"]
+
+
+def _gemini_request(prompt, api_key, model):
+    url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent"
+    return url, {"x-goog-api-key": api_key}, {"contents": [{"parts": [{"text": prompt}]}]}
+
+
+def _gemini_text(data):
+    return data["candidates"][0]["content"]["parts"][0]["text"]
+
+
+# provider -> (request builder, answer reader)
+PROVIDERS = {
+    "groq": (_chat_request("https://api.groq.com/openai/v1/chat/completions",
+                           system="Extract structured data from text.", temperature=0.7), _chat_text),
+    "openai": (_chat_request("https://api.openai.com/v1/chat/completions"), _chat_text),
+    "gemini": (_gemini_request, _gemini_text),
+    "deepseek": (_chat_request("https://api.deepseek.com/v1/chat/completions", temperature=0), _chat_text),
+}
+
+
+def get_rate_limiter(provider):
+    """The shared RateLimiter of a provider, created from PROVIDER_RATE_LIMITS on first use."""
+    with _limiters_lock:
+        if provider not in _limiters:
+            calls_per_minute, tokens_per_minute = PROVIDER_RATE_LIMITS.get(provider, (60, None))
+            _limiters[provider] = RateLimiter(calls_per_minute, tokens_per_minute)
+        return _limiters[provider]
+
+
+def _usage_tokens(data):
+    """Total tokens reported in a response body, or None."""
+    usage = data.get("usage") or data.get("usageMetadata") or {}
+    return usage.get("total_tokens") or usage.get("totalTokenCount")
+
+
+def _backoff(attempt):
+    delay = AI_RETRY_BASE_DELAY * 2 ** attempt
+    return delay + random.uniform(0, delay / 2)
+
+
+def get_ai_client():
+    """Return the shared AsyncClient; must be called on the browser-pool loop."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=httpx.Timeout(AI_TIMEOUT, connect=AI_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=AI_MAX_CONNECTIONS, max_keepalive_connections=AI_MAX_KEEPALIVE),
+        )
+    return _client
+
+
+async def _complete(provider, prompt, api_key, model=None):
+    build, read = PROVIDERS[provider]
+    url, headers, data = build(prompt, api_key, model or AI_MODELS[provider])
+    limiter = get_rate_limiter(provider)
+    reserved = len(prompt) // CHARS_PER_TOKEN + AI_ANSWER_TOKENS
+    for attempt in range(AI_MAX_RETRIES + 1):
+        await limiter.acquire_async(reserved)
+        try:
+            response = await get_ai_client().post(url, headers=headers, json=data)
+        except httpx.TransportError as e:
+            if attempt == AI_MAX_RETRIES:
+                raise AiProviderError(provider, None, str(e)) from e
+            logging.warning(f"{provider} connection error, retrying: {e}")
+            await asyncio.sleep(_backoff(attempt))
+            continue
+        if response.status_code == 200:
+            try:
+                body = response.json()
+                answer = read(body)
+            except (ValueError, KeyError, IndexError, TypeError) as e:
+                raise AiProviderError(provider, 200, f"unexpected response body: {e}") from e
+            used = _usage_tokens(body) if isinstance(body, dict) else None
+            if used:
+                limiter.record_tokens(used - reserved)
+            return answer
+        if response.status_code not in RETRY_STATUSES or attempt == AI_MAX_RETRIES:
+            raise AiProviderError(provider, response.status_code, response.text[:500])
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        logging.warning(f"{provider} returned {response.status_code}, retrying"
+                        + (f" after {retry_after:.1f}s" if retry_after is not None else ""))
+        limiter.record_tokens(-reserved)  # A rejected request used no tokens
+        if retry_after is not None:
+            limiter.block_for(retry_after)  # Every caller of this provider waits, not just this one
+        else:
+            await asyncio.sleep(_backoff(attempt))
+
+
+async def complete(provider, prompt, api_key, model=None):
+    """
+    Send a prompt to a provider and return the answer text.
+
+    Awaitable from any event loop; the request runs on the shared client.
+    Raises AiProviderError when the call fails after retries.
+    """
+    provider = provider.lower()
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unknown AI provider '{provider}', expected one of {tuple(PROVIDERS)}")
+    return await run_on_pool(_complete(provider, prompt, api_key, model))
+
+
+def complete_sync(provider, prompt, api_key, model=None):
+    """Blocking variant of complete for plain threads."""
+    provider = provider.lower()
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unknown AI provider '{provider}', expected one of {tuple(PROVIDERS)}")
+    return run_on_pool_sync(_complete(provider, prompt, api_key, model))
+
+
+async def close_ai_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def shutdown_ai_client():
+    """Close the pooled client on the pool loop; registered to run at exit."""
+    if _client is None:
+        return
+    try:
+        run_on_pool_sync(close_ai_client(), timeout=10)
+    except Exception as e:
+        logging.error(f"Error closing AI client: {e}")
+
+
+atexit.register(shutdown_ai_client)
@@ -10,7 +10,11 @@ import time
 import json
 from flask import Flask, request, jsonify
 from datetime import datetime
-from app import crawl_url, extract_data
+from app import crawl_url, crawl_many, extract_data
+from browser_pool import browser_pool_status
+from http_fetch import domain_strategies
+from html_cache import html_cache
+from ai_cache import ai_cache
 app = Flask(__name__)
 
 # In-memory storage for work ID status
@@ -25,10 +29,11 @@ def api():
     # Get the JSON data from the request
     data = request.get_json()
 
-    # Extract the URL from the data (it is required)
+    # Extract the URL from the data (it is required); 'urls' crawls a list concurrently
     url = data.get('url')
+    urls = data.get('urls') or ([url] if url else [])
 
-    if not url:
+    if not urls:
         return jsonify({"error": "URL is required"}), 400
 
     # Get options from the data (using default values if missing)
@@ -44,32 +49,58 @@ def api():
         'handle_lazy_loading': options.get('handle_lazy_loading', False),
         'pagination_method': options.get('pagination_method', None),
         'hyphen_separator': options.get('hyphen_separator', False),
-        'country_code': options.get('country_code', None)
+        'country_code': options.get('country_code', None),
+        'single_fetch': options.get('single_fetch', True),
+        'readiness': options.get('readiness', 'fast'),
+        'target_selector': options.get('target_selector', None),
+        'blocking_profile': options.get('blocking_profile', 'no-media'),
+        'fetch_strategy': options.get('fetch_strategy', 'auto'),
+        'required_selectors': options.get('required_selectors', None),
+        'use_cache': options.get('use_cache', True),
+        'cache_ttl': options.get('cache_ttl', None),
+        'concurrency': options.get('concurrency', None),
+        'per_domain_limit': options.get('per_domain_limit', None),
+        'pagination_concurrency': options.get('pagination_concurrency', 4),
+        'pagination_max_pages': options.get('pagination_max_pages', 50),
+        'pagination_item_selector': options.get('pagination_item_selector', None),
+        'page_param': options.get('page_param', 'page'),
+        'lazy_item_selector': options.get('lazy_item_selector', None),
+        'lazy_remove_harvested': options.get('lazy_remove_harvested', True),
+        'replay_load_more': options.get('replay_load_more', False),
+        'replay_max_pages': options.get('replay_max_pages', 200)
     }
 
     # Generate a unique work ID (using timestamp as a simple work ID)
     work_id = str(int(time.time() * 1000))
 
-    # Create a new event loop for the thread
-    def run_crawl():
-        # Get or create an event loop for this thread
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+    fields = data.get('fields', ["phone", "email"])
+
+    async def crawl_all():
+        # Results are keyed by URL; each page is parsed and extracted once in the
+        # process pool while the remaining URLs are still being fetched
+        results = {}
+        async for crawled_url, crawl_result, extracted in crawl_many(urls, crawl_options, fields):
+            if extracted is None:
+                extracted = extract_data(crawl_result.get('html', ''), fields, page=crawl_result.get('page'))
+            results[crawled_url] = extracted or {"message": "No data found"}
+        return results
 
-        # Crawl the URL
-        crawl_result = loop.run_until_complete(crawl_url(url, crawl_options))
+    def run_crawl():
+        # Crawl the URL; pages are borrowed from the shared browser pool,
+        # so the worker thread only needs a short-lived event loop
+        if len(urls) > 1:
+            extracted_data = asyncio.run(crawl_all())
+        else:
+            crawl_result = asyncio.run(crawl_url(urls[0], crawl_options))
 
-        html_content = crawl_result.get('html', '')
-        print("htmlContent:", html_content)
+            html_content = crawl_result.get('html', '')
+            print("htmlContent:", html_content)
 
-        # Extract the data from the HTML content
-        extracted_data = extract_data(html_content, data.get('fields', ["phone", "email"]))
+            # Extract the data from the HTML content
+            extracted_data = extract_data(html_content, fields, page=crawl_result.get('page'))
 
-        if not extracted_data:  # Check if extracted data is empty
-            extracted_data = {"message": "No data found"}
+            if not extracted_data:  # Check if extracted data is empty
+                extracted_data = {"message": "No data found"}
 
         print("Extracted_data:", extracted_data)
 
@@ -121,6 +152,14 @@ def check_status(work_id):
             return jsonify({"status": "removed"})
     return jsonify({"error": "Work ID not found"}), 404
 
+# API endpoint to check the health of the shared browser pool
+@app.route('/api/pool', methods=['GET'])
+def pool_status():
+    try:
+        return jsonify({**browser_pool_status(), "fetch_strategies": domain_strategies(), "html_cache": html_cache.status(), "ai_cache": ai_cache.status()})
+    except Exception as e:
+        return jsonify({"error": f"Browser pool unavailable: {e}"}), 503
+
 # API endpoint to download the result file
 @app.route('/api/download/<work_id>', methods=['GET'])
 def download_result(work_id):
@@ -7,13 +7,10 @@ import time
 import random
 import threading
 from streamlit.components.v1 import html
-from phone import filter_valid_numbers
-import spacy
+from phone import filter_valid_numbers, format_mobile_numbers
 # from flask import Flask
 import resend 
 import asyncio
-# Load the spaCy model
-nlp = spacy.load("en_core_web_sm")
 import re
 from bs4 import BeautifulSoup
 from database import db
@@ -24,9 +21,14 @@ from datetime import datetime
 from urllib.parse import urlparse, urljoin
 import uuid
 from collections import defaultdict
-from crawler import rawid
-from crawler import get_html_sync
-from scraper import find_elements_by_selector,extract_data_with_ai
+from crawler import rawid, extract_relevant_container
+from crawler import get_html_sync, get_html_many, raw_html_ids, FETCH_CONCURRENCY, PER_DOMAIN_LIMIT
+from scraper import find_elements_by_selectors,extract_data_with_ai,extract_data_with_ai_async
+from extraction import merge_field_results, unresolved_fields
+from utils import scan_fields
+from extraction_pool import run_extraction, run_extraction_sync, regex_field_sources, crawl_page_task, person_names_task
+from concurrent.futures.process import BrokenProcessPool
+from html_parser import ParsedPage
 from test import get_all_data
 from test2 import get_c21_agents
 from test3 import get_compass_agents
@@ -37,6 +39,8 @@ stay_on_domain=""
 coldwell=False
 max_pages_status=None
 handle_lazy_loading=None
+replay_load_more=False
+lazy_item_selector=None
 start=""
 # app = Flask(__name__)
 # Page configuration
@@ -227,17 +231,6 @@ if 'current_depth' not in st.session_state:
 if 'options' not in st.session_state:
     st.session_state.options = {}
 
-# Common regex patterns for data extraction
-REGEX_PATTERNS = {
-    'email': r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}',
-    'phone': r'\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}',
-    'url': r'https?://(?:[-\w.]|(?:%[\da-fA-F]{2}))+[/\w\.-]*\??[-\w%&=]*',
-    'date': r'\d{1,2}[/\-]\d{1,2}[/\-]\d{2,4}',
-    'price': r'\$\s*\d+(?:\.\d{2})?',
-    'address': r'\d+\s+[A-Za-z\s,]+\s+(?:Avenue|Lane|Road|Boulevard|Drive|Street|Ave|Dr|Rd|Blvd|Ln|St)\.?(?:\s+[A-Za-z]+)?(?:,\s+[A-Za-z]+)?(?:,\s+[A-Z]{2})?(?:\s+\d{5})?',
-    'name': r"^([A-Z\u00C0-\u00D6\u00D8-\u00DE])([a-z\u00DF-\u00F6\u00F8-\u00FF '&-]+) ([A-Za-z\u00C0-\u00D6\u00D8-\u00DE\u00DF-\u00F6\u00F8-\u00FF '&-]+)$"
-}
-
 # Logging functions
 selected_option=""
 # Utility functions
@@ -274,7 +267,7 @@ async def crawl_url(url, options):
     # time.sleep(random.uniform(0.5, 1.5))
     
     # Generate simulated HTML content
-    button= options.get('pagination_selector', False) or options.get('pagination_xpath', False) or options.get('pagination_text', False) or options.get('pagination_text_match', False) or options.get('pagination_confidence', False)
+    button= get_pagination_button(options)
     print("button",button)
     html_content =""#await get_all_data(url) # await get_html_sync(url,button,options)
     if selected_option and not st.session_state.fields:
@@ -304,17 +297,30 @@ async def crawl_url(url, options):
         print("Here")
         html_content=await get_html_sync(url,button,options)
     # print("html",html_content)
+    return build_crawl_result(url, html_content, options)
+
+def get_pagination_button(options):
+    """Return whichever pagination locator is configured, if any"""
+    return options.get('pagination_selector', False) or options.get('pagination_xpath', False) or options.get('pagination_text', False) or options.get('pagination_text_match', False) or options.get('pagination_confidence', False)
+
+def build_crawl_result(url, html_content, options, page=None):
+    """Collect links and the next pagination URL from fetched HTML"""
+    # Parsed once here (unless page carries a summary from an extraction worker);
+    # extraction, link discovery and pagination reuse the tree
+    if page is None:
+        page = ParsedPage(html_content, url)
+
     # Extract links if link following is enabled
     links = []
     if options.get('follow_links', False):
         print("options",options)
-        links = extract_links_from_html(html_content, url, options)
+        links = extract_links_from_html(page, url, options)
         log_info(f"Found {len(links)} links on page")
     
     # Check for pagination based on configured method
     pagination_url = None
     if options.get('handle_pagination', False):
-        pagination_url = find_next_page(html_content, url, options)
+        pagination_url = find_next_page(page, url, options)
         if pagination_url:
             log_success(f"Found pagination link: {pagination_url}")
     
@@ -322,21 +328,37 @@ async def crawl_url(url, options):
     
     return {
         'html': html_content,
+        'page': page,
         'links': links,
         'pagination_url': pagination_url
     }
 
+async def crawl_many(urls, options, fields, method="regex"):
+    """
+    Crawl several URLs concurrently and extract each page in the extraction pool,
+    yielding (url, crawl_result, extracted_data) as each one finishes.
+
+    Pages are extracted while the rest are still fetching; see crawl_and_extract.
+    """
+    log_process(f"Crawling {len(urls)} URLs concurrently")
+    button = get_pagination_button(options)
+    concurrency = options.get('concurrency') or FETCH_CONCURRENCY
+    per_domain_limit = options.get('per_domain_limit') or PER_DOMAIN_LIMIT
+    extractions = []
+    async for url, html_content in get_html_many(urls, concurrency, per_domain_limit, button, options):
+        extractions.append(asyncio.ensure_future(crawl_and_extract(url, html_content, options, fields, method)))
+    for extraction in asyncio.as_completed(extractions):
+        yield await extraction
 
 
-def extract_links_from_html(html_content, base_url, options):
+
+def extract_links_from_html(page, base_url, options):
     """
-    Extract links from HTML content
-    
-    In a real implementation, we would use BeautifulSoup to parse HTML.
-    Here we'll use a simple regex approach for demonstration.
+    Extract links from a ParsedPage
+
+    The href list is collected once per page and shared with pagination detection.
     """
-    # Simple regex to find links
-    links = re.findall(r'<a\s+(?:[^>]*?\s+)?href="([^"]*)"', html_content)
+    links = page.links()
     
     # Filter and normalize links
     valid_links = []
@@ -355,9 +377,10 @@ def extract_links_from_html(html_content, base_url, options):
     
     return valid_links
 
-def find_next_page(html_content, current_url, options):
+def find_next_page(page, current_url, options):
     """Find pagination link based on specified method"""
     pagination_method = options.get('pagination_method', 'Auto-detect')
+    html_content = page.html
     
     # Default to None (no pagination link found)
     next_url = None
@@ -368,12 +391,17 @@ def find_next_page(html_content, current_url, options):
         selector = options.get('pagination_selector', '.pagination .next')
         log_info(f"Looking for next page using CSS selector: {selector}")
         
-        # Simulate finding the selector
-        if selector in html_content or random.random() > 0.3:  # 70% chance of success
-            # Extract the href from the matched element
-            # This is a simplified simulation - real implementation would parse HTML
-            next_url = f"{current_url}?page={random.randint(2, 10)}"
-            log_success(f"Found pagination link with CSS selector: {next_url}")
+        # Match against the already parsed page and take the first usable href
+        try:
+            hrefs = page.hrefs(selector)
+        except Exception as e:
+            log_warning(f"Invalid pagination selector '{selector}': {e}")
+            hrefs = []
+        for href in hrefs:
+            next_url = normalize_url(href, current_url) if href else None
+            if next_url:
+                log_success(f"Found pagination link with CSS selector: {next_url}")
+                break
     
     elif pagination_method == "XPath":
         # In a real implementation, this would use lxml or similar to find elements
@@ -561,117 +589,108 @@ from bs4 import BeautifulSoup
 from datetime import datetime
 import time
 
-def extract_data(html_content, fields, method="regex"):
-    """Extract structured data from HTML using optimized regex."""
+def extract_data(html_content, fields, method="regex", page=None):
+    """Extract structured data from HTML using optimized regex.
+
+    page is the ParsedPage from crawl_url; without one the HTML is parsed here.
+    """
     print("Extracting Now")
     start = time.time()
+    if page is None:
+        page = ParsedPage(html_content)
     results = {field: [] for field in fields}  # Maintain old structure
     country_code = st.session_state.options.get('country_code', False)
     hyphen_separator = st.session_state.options.get('hyphen_separator', False)
 
-    # Precompile regex patterns for performance
-    regex_patterns = {
-        "name": re.compile(r"[A-Z][a-z]+(?:\s[A-Z][a-z]+)*"),  # Matches names (e.g., "John Doe")
-        "phone": re.compile(r"\b\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}\b"),  # Matches 10-digit phone numbers
-        "email": re.compile(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}(?=[\s<]|$)"),  # Matches emails
-    }
-
-    def clean_phone_numbers(phone_list):
-        """Clean and format phone numbers."""
-        cleaned = set()  # Use a set for deduplication
-        for num in phone_list:
-            if not num:  # Skip empty strings
-                continue
-            
-            # Extract only digits
-            digits = re.sub(r'[^0-9]', '', num)
-            if len(digits) != 10:  # Skip invalid numbers
-                continue
-            
-            # Format based on options
-            if hyphen_separator:
-                formatted = f"{digits[:3]}-{digits[3:6]}-{digits[6:]}"  # Format as XXX-XXX-XXXX
-            else:
-                formatted = digits
-            
-            if country_code:
-                formatted = f"+1-{formatted}" if hyphen_separator else f"+1{formatted}"
-            
-            cleaned.add(formatted)  # Add to set for deduplication
-        
-        return list(cleaned)  # Convert back to list
-
-    def extract_json_ld(soup):
-        """Extract JSON-LD data from HTML content."""
-        json_ld_data = []
-        json_ld_scripts = soup.find_all('script', type='application/ld+json')
-        for script in json_ld_scripts:
-            try:
-                json_data = json.loads(script.string)
-                json_ld_data.append(json_data)
-            except json.JSONDecodeError:
-                continue
-        return json_ld_data
-
-    def extract_structured_data(soup, fields):
-        """Extract structured data dynamically using precompiled regex."""
-        seen_data = {field: set() for field in fields}  # Track duplicates using sets
-        
-        # Iterate through parent containers
-        for parent in soup.find_all():
-            extracted = {}  # Store extracted data for this parent
-            
-            # Process text content in one pass
-            text = parent.get_text(" ", strip=True)  # Get all text in one go
-            
-            for field in fields:
-                pattern = regex_patterns.get(field.lower())
-                if not pattern:
-                    continue
-                
-                # Find all matches in the text
-                matches = pattern.findall(text)
-                
-                # Clean & validate matches
-                if field.lower() == "phone":
-                    matches = clean_phone_numbers(matches)
-                
-                # Add the first valid match to results
-                for match in matches:
-                    if match not in seen_data[field]:  # Skip duplicates
-                        seen_data[field].add(match)
-                        extracted[field] = match
-                        break  # Only take the first match per field per parent
-            
-            # Add extracted data to results
-            for field, value in extracted.items():
-                results[field].append(value)
-        
-        return results
-
     if method.lower() == "regex":
-        soup = BeautifulSoup(html_content, "html.parser")
-
-        # Step 1: Try to extract JSON-LD data
-        json_ld_data = extract_json_ld(soup)
-
-        # Step 2: Extract structured data grouped by parent
-        extract_structured_data(soup, fields)
+        results = merge_field_results(fields, *regex_field_sources(html_content, fields, country_code, hyphen_separator, page))
+
+    elif method.lower() == "hybrid":
+        # Cheap passes first; the model only sees what they could not reliably answer
+        structured, scanned = regex_field_sources(html_content, fields, country_code, hyphen_separator, page)
+        results = merge_field_results(fields, structured, scanned)
+        unresolved = unresolved_fields(fields, scanned, structured)
+        if unresolved:
+            log_info(f"Asking AI for unresolved fields: {', '.join(unresolved)}")
+            snippet = extract_relevant_container(html_content, root=page.document.raw if page.backend == "lxml" else None)
+            ai_response = extract_data_with_ai(snippet or html_content, unresolved, ai_provider, ai_api, page=None if snippet else page)
+            results = apply_ai_response(results, ai_response, unresolved)
 
     elif method.lower() == "css":
-        for field in fields:
-            results[field] = find_elements_by_selector(html_content, field)
+        # All selectors on one parse; values stay aligned per card ("" where a card lacks a field)
+        rows = find_elements_by_selectors(html_content, fields, page=page)
+        results = {field: [row[field] for row in rows] for field in fields}
     elif method.lower() == "ai":
-        ai_response = extract_data_with_ai(html_content, fields, ai_provider, ai_api)
-        print(ai_response)
-        if ai_response.get('status',False)==401:
-            log_error("Check your Api Key or Model")
-        else:
-            for field, data in ai_response.items():
-                results[field] = data if data else []
+        ai_response = extract_data_with_ai(html_content, fields, ai_provider, ai_api, page=page)
+        results = apply_ai_response(results, ai_response)
 
     print(f"Extraction completed in {time.time() - start:.2f} seconds")
     return results
+
+def apply_ai_response(results, ai_response, fields=None):
+    """Copy an extract_data_with_ai answer into results, logging key/model errors.
+
+    With fields, only those fields are taken from the answer (matched case-insensitively).
+    """
+    print(ai_response)
+    if ai_response.get('status',False)==401:
+        log_error("Check your Api Key or Model")
+    elif fields is None:
+        for field, data in ai_response.items():
+            results[field] = data if data else []
+    else:
+        wanted = {field.lower(): field for field in fields}
+        for key, data in ai_response.items():
+            field = wanted.get(str(key).lower())
+            if field and data:
+                results[field] = data if isinstance(data, list) else [data]
+    return results
+
+def pagination_selectors(options):
+    """CSS selectors find_next_page will look up, so a worker can resolve them from its parse"""
+    if options.get('handle_pagination') and options.get('pagination_method') == "CSS Selector":
+        return (options.get('pagination_selector', '.pagination .next'),)
+    return ()
+
+async def crawl_and_extract(url, html_content, options, fields, method="regex"):
+    """Build the crawl result of a fetched page and extract it, parsing the page once.
+
+    The parse happens in the extraction pool (crawl_page_task): the worker returns the
+    fields together with the links, pagination hrefs and, for the AI, the cleaned text
+    or main container, so the crawl-side ParsedPage is never parsed. AI requests are
+    awaited on the shared provider client. Returns (url, crawl_result, extracted_data);
+    extracted_data is None when the pool failed or the method is not handled here, and
+    handle_crawl_result then extracts inline from the crawl-side page.
+    """
+    start = time.time()
+    method = method.lower()
+    country_code = options.get('country_code', False)
+    hyphen_separator = options.get('hyphen_separator', False)
+    try:
+        parsed = await run_extraction(crawl_page_task, html_content, list(fields), method, country_code,
+                                      hyphen_separator, options.get('follow_links', False), pagination_selectors(options))
+    except Exception as e:
+        log_warning(f"Extraction pool unavailable for {url}, extracting inline: {e}")
+        return url, build_crawl_result(url, html_content, options), None
+    page = ParsedPage(html_content, url, summary=parsed["summary"])
+    crawl_result = build_crawl_result(url, html_content, options, page)
+    results = parsed["fields"]
+    try:
+        if method == "ai":
+            ai_response = await extract_data_with_ai_async(html_content, fields, ai_provider, ai_api, page=page)
+            results = apply_ai_response({field: [] for field in fields}, ai_response)
+        elif parsed["unresolved"]:
+            unresolved = parsed["unresolved"]
+            log_info(f"Asking AI for unresolved fields: {', '.join(unresolved)}")
+            snippet = parsed["container"]
+            ai_response = await extract_data_with_ai_async(snippet or html_content, unresolved, ai_provider, ai_api, page=None if snippet else page)
+            results = apply_ai_response(results, ai_response, unresolved)
+    except Exception as e:
+        log_warning(f"AI extraction failed for {url}: {str(e)}")
+        return url, crawl_result, None
+    print(f"Extraction completed in {time.time() - start:.2f} seconds (worker)")
+    return url, crawl_result, results
+
 def extract_unknown_field(html_content, field):
     """Extract data for fields without predefined patterns."""
     soup = BeautifulSoup(html_content, 'html.parser')
@@ -733,9 +752,13 @@ def simulate_ai_extraction(html_content, field):
     elif 'name' in field_lower or 'username' in field_lower:
         # AI might be better at extracting complete names
         text = html_content
-        doc = nlp(text)
         names = []
-        name_matches=[ent.text for ent in doc.ents if ent.label_ == "PERSON"]
+        # spaCy NER runs in the extraction pool, where the model is loaded once per worker
+        try:
+            name_matches=run_extraction_sync(person_names_task, text)
+        except BrokenProcessPool as e:
+            log_warning(f"Extraction pool unavailable, running spaCy inline: {e}")
+            name_matches=person_names_task(text)
         # name_matches = re.findall(r'<h[3-4][^>]*>([A-Z][a-z]+ [A-Z][a-z]+)</h[3-4]>', html_content)
         if name_matches:
             names.extend(name_matches)
@@ -745,13 +768,13 @@ def simulate_ai_extraction(html_content, field):
         return names
     elif any(keyword in field_lower for keyword in ['phone', 'tel', 'mobile']):
         # Extract phone numbers
-        phone_matches = re.findall(REGEX_PATTERNS['phone'], html_content)
+        phone_matches = scan_fields(html_content, ['phone'])['phone']
         if phone_matches:
             return phone_matches
         return ["+1 (555) 123-4567", "+1 (555) 987-6543"]
     elif 'address' in field_lower:
         # Address extraction
-        address_matches = re.findall(REGEX_PATTERNS['address'], html_content)
+        address_matches = scan_fields(html_content, ['address'])['address']
         if address_matches:
             return address_matches
         return ["123 Main Street, Anytown, CA 94043"]
@@ -831,6 +854,7 @@ url_input=""
 fields_to_extract=[]
 selected_website=""
 saveToDb=False
+usePageCache=True
 country_code=False
 hyphen_separator=False
 import io
@@ -873,6 +897,7 @@ with tab1:
         automatic,manual=st.tabs(["Automatic Scraping","Manual Scraping"])
         with manual:
             saveToDb= st.toggle("Save to DB")
+            usePageCache= st.toggle("Use page cache", value=True, help="Reuse pages fetched in earlier runs instead of downloading them again")
             # URL Input
             url_input = st.text_area(
                 "Enter URLs to scrape (one per line):",
@@ -940,12 +965,18 @@ with tab1:
                         max_pages = st.number_input("Max Pages", 1, 100, 10, help="The highest number of pages the crawler will scan.")  
 
                 handle_lazy_loading = st.checkbox("Handle Lazy Loading", value=False, help="Load hidden content that appears as you scroll.")  
+                if handle_lazy_loading:  
+                    lazy_item_selector = st.text_input(  
+                        "Feed item selector (optional):",  
+                        placeholder=".agent-card",  
+                        help="CSS rule matching one feed entry. Entries are collected after every scroll until the feed ends, which keeps long feeds fast."  
+                    )  
                 handle_pagination = st.checkbox("Handle Pagination", value=False, help="Follow 'Next' buttons to load more pages.")  
 
                 if handle_pagination:  
                     pagination_method = st.selectbox(  
                         "Pagination Detection Method",  
-                        ["Auto-detect (Use Predefined Buttons)", "CSS Selector", "XPath", "Button Text"],  
+                        ["Auto-detect (Use Predefined Buttons)", "CSS Selector", "XPath", "Button Text", "Numbered"],  
                         help="Choose how the crawler finds the 'Next' button to load more pages."  
                     )  
 
@@ -970,6 +1001,17 @@ with tab1:
                             help="The exact text on the 'Next' button. Example: 'Next', 'Load More'"  
                         )  
 
+                    if pagination_method in ("CSS Selector", "XPath", "Button Text"):  
+                        replay_load_more = st.checkbox("Replay 'Load More' requests", value=False, help="Click the button once, then fetch the remaining pages directly from the request it sends. Much faster on 'Load More' lists.")  
+
+                    if pagination_method == "Numbered":  
+                        pagination_concurrency = st.number_input("Pages fetched in parallel", 1, 10, 4, help="Pages are requested as ?page=2, ?page=3, ... in several tabs at once.")  
+                        pagination_item_selector = st.text_input(  
+                            "Listing item selector (optional):",  
+                            placeholder=".agent-card",  
+                            help="CSS rule matching one listing entry. Pagination stops at the first page with no new entries."  
+                        )  
+
                 
 
             # Extraction Method
@@ -980,21 +1022,22 @@ with tab1:
             # Extraction method selection
             extraction_method = st.selectbox(
                 "Choose a data extraction method:",
-                ["Regex", "CSS", "AI"],
-                help="Regex: Extract data using patterns | CSS: Select specific page elements | AI: Analyze content for relevant data."
+                ["Regex", "CSS", "AI", "Hybrid"],
+                help="Regex: Extract data using patterns | CSS: Select specific page elements | AI: Analyze content for relevant data. | Hybrid: Regex for emails and phones, AI for the rest."
             )
 
             # Dynamic description
             descriptions = {
                 "Regex": "🔹 Extracts addresses, phone numbers, and emails using predefined patterns.",
                 "CSS": "🔹 Use CSS selectors (class or ID) to target elements (e.g., `#user-email-id`, `.user-number`).",
-                "AI": "🔹 Uses an AI model for intelligent data extraction."
+                "AI": "🔹 Uses an AI model for intelligent data extraction.",
+                "Hybrid": "🔹 Uses structured data and patterns first, then asks the AI model for names and other fields patterns cannot answer reliably, using the main content block instead of the whole page."
             }
             st.info(descriptions[extraction_method])
 
             # AI options (only shown if AI is selected)
-            if extraction_method == "AI":
-                st.session_state.extraction_method = "ai"
+            if extraction_method in ("AI", "Hybrid"):
+                st.session_state.extraction_method = extraction_method.lower()
                 
                 ai_provider = st.selectbox("Select AI Model", ["OpenAI", "Gemini", "DeepSeek", "Groq"])
                 
@@ -1312,10 +1355,15 @@ with tab1:
                         'stay_on_domain': stay_on_domain if stay_on_domain else None,
                         'handle_pagination': handle_pagination if handle_pagination else None,
                         'handle_lazy_loading': handle_lazy_loading,
+                        'lazy_item_selector': lazy_item_selector or None,
+                        'replay_load_more': replay_load_more if handle_pagination else False,
                         'pagination_method': pagination_method if handle_pagination else None,
                         'hyphen_separator':hyphen_separator if hyphen_separator else False,
                         'country_code' :country_code if country_code else False,
-                        'saveToDb':saveToDb if saveToDb else False
+                        'saveToDb':saveToDb if saveToDb else False,
+                        'use_cache': usePageCache,
+                        # CSS fields double as a check that a plain HTTP response is complete
+                        'required_selectors': st.session_state.fields if extraction_method == "CSS" else None
                     }
                     
                     # Add method-specific pagination options
@@ -1329,6 +1377,9 @@ with tab1:
                             # options['pagination_text_match'] = pagination_text_match if pagination_text_match else None
                         elif pagination_method == "AI-powered":
                             options['pagination_confidence'] = "pagination_confidence"
+                        elif pagination_method == "Numbered":
+                            options['pagination_concurrency'] = pagination_concurrency
+                            options['pagination_item_selector'] = pagination_item_selector or None
                     
                     # Store options in session state
                     st.session_state.options = options
@@ -1385,52 +1436,9 @@ import streamlit as st
 from datetime import datetime
 import re
 
-# Function to format mobile numbers
 import re
 import pandas as pd
 
-def format_mobile_number(mobile, country_code=False, hyphen_separator=False):
-    """
-    Format mobile number with specific requirements
-    
-    Args:
-    mobile (str/int/float): Mobile number to format
-    country_code (bool): Whether to add country code
-    hyphen_separator (bool): Whether to add hyphen separators
-    
-    Returns:
-    str: Formatted mobile number or empty string if invalid
-    """
-    # Handle NaN or None values
-    if pd.isna(mobile):
-        return ""
-    
-    # Remove all non-numeric characters
-    mobile = re.sub(r"\D", "", str(mobile))
-    
-    # Check for valid 10-digit number
-    if len(mobile) != 10:
-        return ""
-    
-    # Separate into groups of 3-3-4
-    area_code = mobile[:3]
-    prefix = mobile[3:6]
-    line_number = mobile[6:]
-    
-    # Determine the prefix based on country_code
-    if country_code:
-        prefix_text = "+1"
-    else:
-        prefix_text = "001"
-    
-    # Construct the base mobile number
-    if hyphen_separator:
-        formatted_mobile = f"{prefix_text}-{area_code}-{prefix}-{line_number}"
-    else:
-        formatted_mobile = f"{prefix_text}{area_code}{prefix}{line_number}"
-    
-    return formatted_mobile
-
 # Function to normalize and deduplicate data
 def normalize_and_deduplicate(value):
     if isinstance(value, str):
@@ -1627,47 +1635,6 @@ if selected_tab != "tab2":
                 import pandas as pd
 
 
-                def format_mobile_number(mobile, country_code=False, hyphen_separator=False):
-                    """
-                    Format mobile number with specific requirements
-                    
-                    Args:
-                    mobile (str/int/float): Mobile number to format
-                    country_code (bool): Whether to add country code
-                    hyphen_separator (bool): Whether to add hyphen separators
-                    
-                    Returns:
-                    str: Formatted mobile number or empty string if invalid
-                    """
-                    # Handle NaN or None values
-                    if pd.isna(mobile):
-                        return ""
-                    
-                    # Remove all non-numeric characters
-                    mobile = re.sub(r"\D", "", str(mobile))
-                    
-                    # Check for valid 10-digit number
-                    if len(mobile) != 10:
-                        return ""
-                    
-                    # Separate into groups of 3-3-4
-                    area_code = mobile[:3]
-                    prefix = mobile[3:6]
-                    line_number = mobile[6:]
-                    
-                    # Determine the prefix based on country_code
-                    if country_code:
-                        prefix_text = "+1"
-                    else:
-                        prefix_text = "001"
-                    
-                    # Construct the base mobile number
-                    if hyphen_separator:
-                        formatted_mobile = f"{prefix_text}-{area_code}-{prefix}-{line_number}"
-                    else:
-                        formatted_mobile = f"{prefix_text}{area_code}{prefix}{line_number}"
-                    
-                    return formatted_mobile
                 # Define these variables (adjust as needed)
                 # country_code = False
                 # hyphen_separator = True
@@ -1686,9 +1653,7 @@ if selected_tab != "tab2":
                         mobile_columns = [col for col in agents_df.columns if 'mobile' in col.lower() or 'phone' in col.lower()]
                         if mobile_columns:
                             for col in mobile_columns:
-                                agents_df[col] = agents_df[col].fillna("").apply(
-                                    lambda x: format_mobile_number(x, country_code, hyphen_separator)
-                                )
+                                agents_df[col] = format_mobile_numbers(agents_df[col], country_code, hyphen_separator)
 
                         # Deduplicate based on all columns (optional)
                         agents_df = agents_df.drop_duplicates()
@@ -2136,6 +2101,68 @@ import re
 from datetime import datetime
 
 
+CRAWL_BATCH_SIZE = FETCH_CONCURRENCY  # URLs fetched concurrently per rerun of the crawl loop
+
+def handle_crawl_result(next_url, crawl_result, current_depth, max_depth, extracted_data=None):
+    """Extract data from one crawled page, store results and queue newly found links"""
+    try:
+        html_content = crawl_result.get('html', '')
+
+        # Extract data from the crawled page unless it was already extracted in the pool
+        if extracted_data is None:
+            extracted_data = extract_data(html_content, st.session_state.fields, st.session_state.extraction_method, crawl_result.get('page'))
+
+        # Save data to DB if enabled
+        if saveToDb:
+            rawid = raw_html_ids.pop(next_url, None) or db.get_most_recent_updated_id()
+            try:
+                db.save_extracted_data(rawid, next_url, extracted_data)
+                log_success("Data Saved to DB")
+            except Exception as e:
+                log_error(f"Error while saving to DB: {str(e)}")
+
+        # Add the extracted data to results
+        if any(extracted_data.values()):
+            result_item = {
+                'URL': next_url,
+                'Timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            }
+            result_item.update(extracted_data)
+            st.session_state.results.append(result_item)
+            log_success(f"Added results from {next_url}")
+
+        # Process new links if we're still below max depth
+        if current_depth < max_depth:
+            new_links = crawl_result.get('links', [])
+            pagination_url = crawl_result.get('pagination_url')
+
+            # Add pagination URL if found
+            if pagination_url and pagination_url not in st.session_state.found_links and pagination_url not in st.session_state.processed_links:
+                st.session_state.found_links.append(pagination_url)
+                log_info(f"Added pagination URL: {pagination_url}")
+
+            # Add new links to found_links for the next depth level
+            for link in new_links:
+                if link not in st.session_state.found_links and link not in st.session_state.processed_links:
+                    st.session_state.found_links.append(link)
+            log_info(f"Found {len(new_links)} links on {next_url}")
+
+        # Mark URL as processed
+        st.session_state.processed_links.add(next_url)
+
+    except TypeError as e:
+        # Handle the specific error without logging it
+        if "'<' not supported between instances of 'int' and 'NoneType'" in str(e):
+            st.session_state.processed_links.add(next_url)  # Mark as processed to avoid retries
+            print(f"Skipped URL due to internal error: {next_url}")
+        else:
+            log_error(f"Error crawling {next_url}: {str(e)}")
+            st.session_state.processed_links.add(next_url)  # Mark as processed to avoid retries
+
+    except Exception as e:
+        log_error(f"Error crawling {next_url}: {str(e)}")
+        st.session_state.processed_links.add(next_url)  # Mark as processed to avoid retries
+
 # Main scraping process (runs when is_scraping is True)
 if st.session_state.is_scraping:
     
@@ -2147,7 +2174,7 @@ if st.session_state.is_scraping:
         st.session_state.current_phase = "crawling"
         st.rerun()
     
-    # Process one URL at a time to allow UI updates
+    # Process one batch of URLs per rerun to allow UI updates
     elif st.session_state.current_phase == "crawling":
         try:
             start = time.time()
@@ -2173,67 +2200,28 @@ if st.session_state.is_scraping:
                 frontier = [url for url in (st.session_state.found_links or []) if url not in st.session_state.processed_links]
 
             if frontier:
-                next_url = frontier[0]
-                log_process(f"Crawling URL: {next_url} (depth: {current_depth})")
+                # Site scrapers run one job at a time; plain URLs are fetched in concurrent batches
+                site_mode = selected_option and not st.session_state.fields
+                batch_size = 1 if site_mode else (st.session_state.options.get('concurrency') or CRAWL_BATCH_SIZE)
+                if st.session_state.options.get('max_pages_status'):
+                    remaining = (st.session_state.options.get('max_pages', 10) or 10) - len(st.session_state.processed_links)
+                    batch_size = max(1, min(batch_size, remaining))
+                batch = frontier[:batch_size]
+                log_process(f"Crawling {len(batch)} URL(s) (depth: {current_depth})")
+
+                async def crawl_batch():
+                    if site_mode:
+                        handle_crawl_result(batch[0], await crawl_url(batch[0], st.session_state.options), current_depth, max_depth)
+                        return
+                    # Pages are extracted in the process pool while the rest of the batch is still fetching
+                    async for next_url, crawl_result, extracted_data in crawl_many(batch, st.session_state.options, st.session_state.fields, st.session_state.extraction_method):
+                        handle_crawl_result(next_url, crawl_result, current_depth, max_depth, extracted_data)
 
                 try:
-                    # Crawl the URL
-                    crawl_result = asyncio.run(crawl_url(next_url, st.session_state.options))
-                    html_content = crawl_result.get('html', '')
-
-                    # Extract data from the crawled page
-                    extracted_data = extract_data(html_content, st.session_state.fields, st.session_state.extraction_method)
-
-                    # Save data to DB if enabled
-                    if saveToDb:
-                        rawid = db.get_most_recent_updated_id()
-                        try:
-                            db.save_extracted_data(rawid, next_url, extracted_data)
-                            log_success("Data Saved to DB")
-                        except Exception as e:
-                            log_error(f"Error while saving to DB: {str(e)}")
-
-                    # Add the extracted data to results
-                    if any(extracted_data.values()):
-                        result_item = {
-                            'URL': next_url,
-                            'Timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        }
-                        result_item.update(extracted_data)
-                        st.session_state.results.append(result_item)
-                        log_success(f"Added results from {next_url}")
-
-                    # Process new links if we're still below max depth
-                    if current_depth < max_depth:
-                        new_links = crawl_result.get('links', [])
-                        pagination_url = crawl_result.get('pagination_url')
-
-                        # Add pagination URL if found
-                        if pagination_url and pagination_url not in st.session_state.found_links and pagination_url not in st.session_state.processed_links:
-                            st.session_state.found_links.append(pagination_url)
-                            log_info(f"Added pagination URL: {pagination_url}")
-
-                        # Add new links to found_links for the next depth level
-                        for link in new_links:
-                            if link not in st.session_state.found_links and link not in st.session_state.processed_links:
-                                st.session_state.found_links.append(link)
-                        log_info(f"Found {len(new_links)} links on {next_url}")
-
-                    # Mark URL as processed
-                    st.session_state.processed_links.add(next_url)
-
-                except TypeError as e:
-                    # Handle the specific error without logging it
-                    if "'<' not supported between instances of 'int' and 'NoneType'" in str(e):
-                        st.session_state.processed_links.add(next_url)  # Mark as processed to avoid retries
-                        print(f"Skipped URL due to internal error: {next_url}")
-                    else:
-                        log_error(f"Error crawling {next_url}: {str(e)}")
-                        st.session_state.processed_links.add(next_url)  # Mark as processed to avoid retries
-
+                    asyncio.run(crawl_batch())
                 except Exception as e:
-                    log_error(f"Error crawling {next_url}: {str(e)}")
-                    st.session_state.processed_links.add(next_url)  # Mark as processed to avoid retries
+                    log_error(f"Error crawling batch: {str(e)}")
+                    st.session_state.processed_links.update(batch)  # Mark as processed to avoid retries
 
                 # Rerun to update UI
                 time.sleep(0.1)
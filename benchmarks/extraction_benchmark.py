@@ -0,0 +1,105 @@
+"""
+Compare the legacy per-element get_text() extraction with extraction.extract_fields.
+
+Usage: python benchmarks/extraction_benchmark.py [target_mb ...] (default 2 5)
+"""
+import os
+import random
+import sys
+import time
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from extraction import FIELD_PATTERNS, clean_phone_numbers, extract_fields  # noqa: E402
+from html_parser import Bs4Node  # noqa: E402
+
+FIELDS = ["name", "phone", "email"]
+FIRST_NAMES = ["John", "Maria", "Robert", "Linda", "David", "Susan", "James", "Karen"]
+LAST_NAMES = ["Smith", "Garcia", "Johnson", "Miller", "Davis", "Wilson", "Moore", "Clark"]
+
+
+def agent_card(i):
+    first, last = random.choice(FIRST_NAMES), random.choice(LAST_NAMES)
+    phone = f"({random.randint(200, 999)}) {random.randint(200, 999)}-{i % 10000:04d}"
+    return (
+        f'<div class="agent-card"><div class="agent-info"><div class="media">'
+        f'<img src="/img/{i}.jpg" alt="photo"><div class="body">'
+        f'<h3><a href="/agents/{i}">{first} {last}</a></h3>'
+        f'<p class="title">Sales Associate <span>licensed since 20{i % 24:02d}</span></p>'
+        f'<ul class="contact"><li><span class="label">Mobile:</span> <a href="tel:{i}">{phone}</a></li>'
+        f'<li><a class="email-link" href="mailto:agent{i}@example.com">agent{i}@example.com</a> </li></ul>'
+        f'<p>Serving buyers and sellers across the region with local market knowledge.</p>'
+        f'</div></div></div></div>'
+    )
+
+
+def build_page(target_bytes, wrapper_depth=15):
+    """Paginated listing: cards nested inside page wrappers, as merged by the crawler."""
+    parts = ['<html><head><title>Agents</title><script>var x = 1;</script></head><body><main><section>']
+    # Layout wrappers typical of framework-rendered pages
+    parts.append('<div class="layout">' * wrapper_depth)
+    size, i, page = 0, 0, 1
+    while size < target_bytes:
+        parts.append(f'<div data-page="{page}"><div class="results"><div class="grid">')
+        for _ in range(50):
+            card = agent_card(i)
+            parts.append(card)
+            size += len(card)
+            i += 1
+        parts.append('</div></div></div>')
+        page += 1
+    parts.append('</div>' * wrapper_depth)
+    parts.append('</section></main></body></html>')
+    return "".join(parts), i
+
+
+def legacy_extract(html_content, fields, soup):
+    """The previous app.extract_data regex path: get_text() on every element."""
+    results = {field: [] for field in fields}
+    seen_data = {field: set() for field in fields}
+    for parent in soup.find_all():
+        extracted = {}
+        text = parent.get_text(" ", strip=True)
+        for field in fields:
+            pattern = FIELD_PATTERNS.get(field.lower())
+            if not pattern:
+                continue
+            matches = pattern.findall(text)
+            if field.lower() == "phone":
+                matches = clean_phone_numbers(matches)
+            for match in matches:
+                if match not in seen_data[field]:
+                    seen_data[field].add(match)
+                    extracted[field] = match
+                    break
+        for field, value in extracted.items():
+            results[field].append(value)
+    return results
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    random.seed(7)
+    sizes = [float(arg) for arg in sys.argv[1:]] or [2, 5]
+    for mb in sizes:
+        html_content, cards = build_page(int(mb * 1024 * 1024))
+        # Both paths get the same tree; parsing is timed separately
+        soup, parse_time = timed(BeautifulSoup, html_content, "html.parser")
+        new, new_time = timed(extract_fields, html_content, FIELDS, False, False, Bs4Node(soup))
+        old, old_time = timed(legacy_extract, html_content, FIELDS, soup)
+        print(f"{len(html_content) / 1024 / 1024:.1f} MB, {cards} cards, parse {parse_time:.2f}s")
+        print(f"  legacy:  {old_time:8.2f}s  " + ", ".join(f"{f}={len(old[f])}" for f in FIELDS))
+        print(f"  linear:  {new_time:8.2f}s  " + ", ".join(f"{f}={len(new[f])}" for f in FIELDS))
+        for field in ("phone", "email"):
+            missing = set(old[field]) - set(new[field])
+            print(f"  {field}: {len(missing)} legacy values not found by the linear pass")
+        print(f"  speedup: {old_time / new_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
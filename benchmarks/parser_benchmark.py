@@ -0,0 +1,80 @@
+"""
+Compare the HTML parser backends on saved pages.
+
+Usage: python benchmarks/parser_benchmark.py [page.html | directory ...]
+
+With no arguments the pages in the HTML cache (CACHE_DIR) are used, or a
+synthetic 2 MB agent listing when the cache is empty. For each backend the
+script times parsing, regex extraction, clean_html() and a CSS selection,
+and reports any result that differs from the BeautifulSoup backend.
+"""
+import glob
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from extraction import extract_fields  # noqa: E402
+from html_cache import CACHE_DIR  # noqa: E402
+from html_parser import available_backends, parse_html  # noqa: E402
+from scraper import clean_html, find_elements_by_selector  # noqa: E402
+from extraction_benchmark import FIELDS, build_page  # noqa: E402
+
+SELECTOR = "a[href^='mailto:'], a[href^='tel:']"
+
+
+def load_pages(paths):
+    pages = []
+    for path in paths:
+        files = sorted(glob.glob(os.path.join(path, "*.html"))) if os.path.isdir(path) else [path]
+        for name in files:
+            with open(name, "r", encoding="utf-8", errors="ignore") as f:
+                pages.append((os.path.basename(name), f.read()))
+    return pages
+
+
+def run_backend(backend, html_content):
+    timings = {}
+    start = time.perf_counter()
+    document = parse_html(html_content, backend)
+    timings["parse"] = time.perf_counter() - start
+    start = time.perf_counter()
+    fields = extract_fields(html_content, FIELDS, document=document)
+    timings["extract"] = time.perf_counter() - start
+    start = time.perf_counter()
+    text = clean_html(html_content, backend)
+    timings["clean_html"] = time.perf_counter() - start
+    start = time.perf_counter()
+    selected = find_elements_by_selector(html_content, SELECTOR, backend)
+    timings["select"] = time.perf_counter() - start
+    return timings, {"fields": fields, "text": text, "select": selected}
+
+
+def main():
+    pages = load_pages(sys.argv[1:] or [CACHE_DIR])
+    if not pages:
+        random.seed(7)
+        pages = [("synthetic-2mb", build_page(2 * 1024 * 1024)[0])]
+    backends = available_backends()
+    totals = {backend: {} for backend in backends}
+    for name, html_content in pages:
+        print(f"{name} ({len(html_content) / 1024:.0f} KB)")
+        baseline = None
+        for backend in backends:
+            timings, results = run_backend(backend, html_content)
+            for step, seconds in timings.items():
+                totals[backend][step] = totals[backend].get(step, 0) + seconds
+            if baseline is None:
+                baseline = results
+            diffs = [key for key in results if results[key] != baseline[key]]
+            print(f"  {backend:<11}" + "  ".join(f"{step} {seconds:.3f}s" for step, seconds in timings.items())
+                  + (f"  DIFFERS: {', '.join(diffs)}" if diffs else ""))
+    print("Totals")
+    for backend, steps in totals.items():
+        print(f"  {backend:<11}" + "  ".join(f"{step} {seconds:.3f}s" for step, seconds in steps.items())
+              + f"  total {sum(steps.values()):.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import fnmatch
+import logging
+import re
+from collections import Counter
+from urllib.parse import urlparse
+
+# Named request-blocking profiles for Playwright pages and contexts.
+# Each rule is a glob by default, or a regular expression when prefixed "re:".
+#   resource_types - matched against request.resource_type (image, media, font, ...)
+#   hosts          - matched against the request host name
+#   urls           - matched against the full request URL
+TRACKER_HOSTS = [
+    "*google-analytics.com",
+    "*googletagmanager.com",
+    "*googlesyndication.com",
+    "*googleadservices.com",
+    "*doubleclick.net",
+    "*facebook.net",
+    "*hotjar.com",
+    "*segment.io",
+    "*newrelic.com",
+    "*nr-data.net",
+]
+TRACKER_URLS = ["*analytics*", "*tracking*", "*advertisement*"]
+
+BLOCKING_PROFILES = {
+    "full": {
+        "resource_types": [],
+        "hosts": [],
+        "urls": [],
+    },
+    "no-media": {
+        "resource_types": ["image", "media", "font"],
+        "hosts": TRACKER_HOSTS,
+        "urls": TRACKER_URLS + [r"re:\.(png|jpe?g|gif|svg|webp|pdf|mp4)(\?|$)"],
+    },
+    "text-only": {
+        "resource_types": ["image", "media", "font", "stylesheet", "texttrack", "manifest", "eventsource", "websocket"],
+        "hosts": TRACKER_HOSTS,
+        "urls": TRACKER_URLS + [r"re:\.(png|jpe?g|gif|svg|webp|pdf|mp4|woff2?|ttf|css)(\?|$)"],
+    },
+}
+DEFAULT_BLOCKING_PROFILE = "no-media"
+
+# Typical transfer sizes used to estimate the bandwidth saved by an aborted
+# request (the body is never downloaded, so the real size is unknown).
+ESTIMATED_RESOURCE_BYTES = {
+    "image": 45_000,
+    "media": 500_000,
+    "font": 35_000,
+    "stylesheet": 25_000,
+    "script": 30_000,
+    "xhr": 5_000,
+    "fetch": 5_000,
+}
+DEFAULT_RESOURCE_BYTES = 10_000
+
+
+def _compile_rules(rules):
+    compiled = []
+    for rule in rules:
+        if rule.startswith("re:"):
+            compiled.append(re.compile(rule[3:], re.IGNORECASE))
+        else:
+            # Globs must match the whole value, regexes may match anywhere
+            compiled.append(re.compile(r"\A" + fnmatch.translate(rule), re.IGNORECASE))
+    return compiled
+
+
+class BlockingProfile:
+    """Compiled request-blocking rules for one named profile."""
+
+    def __init__(self, name, resource_types=(), hosts=(), urls=()):
+        self.name = name
+        self.resource_types = _compile_rules(resource_types)
+        self.hosts = _compile_rules(hosts)
+        self.urls = _compile_rules(urls)
+
+    @property
+    def blocks_anything(self):
+        return bool(self.resource_types or self.hosts or self.urls)
+
+    def should_block(self, url, resource_type):
+        if any(rule.search(resource_type) for rule in self.resource_types):
+            return True
+        host = urlparse(url).hostname or ""
+        if any(rule.search(host) for rule in self.hosts):
+            return True
+        return any(rule.search(url) for rule in self.urls)
+
+
+class BlockingStats:
+    """Counters for requests seen and blocked under a blocking profile."""
+
+    def __init__(self, profile_name):
+        self.profile = profile_name
+        self.requests_seen = 0
+        self.requests_blocked = 0
+        self.bytes_saved = 0
+        self.blocked_by_type = Counter()
+
+    def record(self, resource_type, blocked):
+        self.requests_seen += 1
+        if blocked:
+            self.requests_blocked += 1
+            self.blocked_by_type[resource_type] += 1
+            self.bytes_saved += ESTIMATED_RESOURCE_BYTES.get(resource_type, DEFAULT_RESOURCE_BYTES)
+
+    def as_dict(self):
+        return {
+            "profile": self.profile,
+            "requests_seen": self.requests_seen,
+            "requests_blocked": self.requests_blocked,
+            "bytes_saved": self.bytes_saved,
+            "blocked_by_type": dict(self.blocked_by_type),
+        }
+
+    def summary(self):
+        return (f"profile={self.profile}, blocked {self.requests_blocked}/{self.requests_seen} requests, "
+                f"~{self.bytes_saved / 1024:.0f} KB saved")
+
+
+_compiled_profiles = {}
+
+
+def get_blocking_profile(name=None):
+    """Return the compiled BlockingProfile for a profile name."""
+    name = (name or DEFAULT_BLOCKING_PROFILE).lower()
+    if name not in BLOCKING_PROFILES:
+        logging.warning(f"Unknown blocking profile '{name}', using '{DEFAULT_BLOCKING_PROFILE}'")
+        name = DEFAULT_BLOCKING_PROFILE
+    if name not in _compiled_profiles:
+        _compiled_profiles[name] = BlockingProfile(name, **BLOCKING_PROFILES[name])
+    return _compiled_profiles[name]
+
+
+async def apply_blocking_profile(target, profile_name=None):
+    """
+    Install a blocking profile on a Playwright page or browser context.
+
+    Returns a BlockingStats object that is updated as requests are routed.
+    The "full" profile installs no route at all, so it adds no overhead.
+    """
+    profile = get_blocking_profile(profile_name)
+    stats = BlockingStats(profile.name)
+    if not profile.blocks_anything:
+        return stats
+
+    async def handle_route(route):
+        request = route.request
+        blocked = profile.should_block(request.url, request.resource_type)
+        stats.record(request.resource_type, blocked)
+        try:
+            if blocked:
+                await route.abort()
+            else:
+                await route.continue_()
+        except Exception:
+            # The page may have navigated or closed while the request was pending
+            pass
+
+    await target.route("**/*", handle_route)
+    return stats
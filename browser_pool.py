@@ -0,0 +1,292 @@
+import asyncio
+import atexit
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+from playwright.async_api import async_playwright
+from fakeagents import get_random_user_agent
+
+# Pool configuration
+POOL_BROWSERS = 2              # Chromium processes kept alive between jobs
+CONTEXTS_PER_BROWSER = 4       # Concurrent contexts leased from each browser
+MAX_PAGES_PER_CONTEXT = 50     # Recycle a context after it has served this many pages
+HEALTH_CHECK_INTERVAL = 30     # Seconds between background health checks
+BROWSER_ARGS = [
+    '--disable-web-security',
+    '--disable-features=IsolateOrigins,site-per-process',
+    '--disable-dev-shm-usage',  # Reduces memory usage
+    '--disable-gpu',            # Reduces memory usage
+]
+CONTEXT_OPTIONS = {
+    "viewport": {"width": 1920, "height": 1080},
+    "ignore_https_errors": True,
+    "java_script_enabled": True,
+}
+
+# The pool lives on its own event loop so that callers running under
+# asyncio.run() (Streamlit reruns) or per-thread loops (Flask workers)
+# can all share the same Chromium processes.
+_pool_loop = None
+_pool_thread = None
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class PooledContext:
+    """A browser context on loan from the pool, with its usage counter."""
+
+    def __init__(self, slot, context):
+        self.slot = slot
+        self.context = context
+        self.generation = slot.launches
+        self.pages_served = 0
+        self.created_at = time.time()
+
+
+class BrowserSlot:
+    """One Chromium process and the contexts currently opened on it."""
+
+    def __init__(self, index):
+        self.index = index
+        self.browser = None
+        self.open_contexts = 0
+        self.launches = 0
+        self.launch_lock = asyncio.Lock()  # One (re)launch at a time; bound to the pool loop on first use
+
+    def is_healthy(self):
+        return self.browser is not None and self.browser.is_connected()
+
+    def forget(self, pooled):
+        # Contexts from a previous launch were already reset by the relaunch
+        if pooled.generation == self.launches:
+            self.open_contexts -= 1
+
+
+class BrowserPool:
+    """Long-lived pool of Chromium browsers and recyclable contexts."""
+
+    def __init__(self, browsers=POOL_BROWSERS, contexts_per_browser=CONTEXTS_PER_BROWSER,
+                 max_pages_per_context=MAX_PAGES_PER_CONTEXT, health_check_interval=HEALTH_CHECK_INTERVAL):
+        self.browsers = browsers
+        self.contexts_per_browser = contexts_per_browser
+        self.max_pages_per_context = max_pages_per_context
+        self.health_check_interval = health_check_interval
+        self._playwright = None
+        self._slots = [BrowserSlot(i) for i in range(browsers)]
+        self._idle = []
+        self._leases = None
+        self._start_lock = None
+        self._health_task = None
+        self.stats = {"pages_served": 0, "contexts_created": 0, "contexts_recycled": 0, "browser_relaunches": 0}
+
+    async def start(self):
+        """Start Playwright and launch the configured number of browsers."""
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._playwright is not None:
+                return
+            self._playwright = await async_playwright().start()
+            self._leases = asyncio.Semaphore(self.browsers * self.contexts_per_browser)
+            for slot in self._slots:
+                await self._ensure_browser(slot)
+            if self.health_check_interval:
+                self._health_task = asyncio.create_task(self._health_loop())
+            logging.info(f"Browser pool started: {self.browsers} browsers x {self.contexts_per_browser} contexts")
+
+    async def _ensure_browser(self, slot):
+        """
+        Relaunch the slot's browser if it is not connected.
+
+        Leases and the health check can find the same slot dead at once; the
+        slot lock makes the later callers wait and reuse the first relaunch.
+        """
+        async with slot.launch_lock:
+            if not slot.is_healthy():
+                await self._launch(slot)
+
+    async def _launch(self, slot):
+        # Always through _ensure_browser, with the slot lock held
+        old, slot.browser = slot.browser, None
+        if old is not None:
+            try:
+                await old.close()
+            except Exception:
+                pass
+        slot.browser = await self._playwright.chromium.launch(headless=True, args=BROWSER_ARGS)
+        slot.open_contexts = 0
+        slot.launches += 1
+        if slot.launches > 1:
+            self.stats["browser_relaunches"] += 1
+            logging.warning(f"Relaunched pooled browser #{slot.index}")
+
+    async def _acquire_context(self):
+        # Prefer an idle context whose browser is still alive
+        while self._idle:
+            pooled = self._idle.pop()
+            if pooled.slot.is_healthy() and pooled.generation == pooled.slot.launches:
+                return pooled
+            pooled.slot.forget(pooled)
+        slot = min(self._slots, key=lambda s: s.open_contexts)
+        await self._ensure_browser(slot)
+        context = await slot.browser.new_context(user_agent=get_random_user_agent(), **CONTEXT_OPTIONS)
+        slot.open_contexts += 1
+        self.stats["contexts_created"] += 1
+        return PooledContext(slot, context)
+
+    async def _retire_context(self, pooled):
+        pooled.slot.forget(pooled)
+        self.stats["contexts_recycled"] += 1
+        try:
+            await pooled.context.close()
+        except Exception:
+            pass
+
+    @asynccontextmanager
+    async def page(self):
+        """
+        Borrow a fresh page from a pooled context.
+
+        The page is closed on exit. The context goes back to the pool unless it
+        has served MAX_PAGES_PER_CONTEXT pages or the caller raised, in which
+        case it is closed and a new one is created on the next lease.
+        """
+        await self.start()
+        async with self._leases:
+            pooled = await self._acquire_context()
+            page = None
+            healthy = False
+            try:
+                page = await pooled.context.new_page()
+                yield page
+                healthy = True
+            finally:
+                pooled.pages_served += 1
+                self.stats["pages_served"] += 1
+                if page is not None:
+                    try:
+                        await page.close()
+                    except Exception:
+                        healthy = False
+                if (healthy and pooled.pages_served < self.max_pages_per_context
+                        and pooled.slot.is_healthy() and pooled.generation == pooled.slot.launches):
+                    self._idle.append(pooled)
+                else:
+                    await self._retire_context(pooled)
+
+    async def health_check(self):
+        """Relaunch disconnected browsers and report pool status."""
+        if self._playwright is None:
+            return {"running": False, **self.stats}
+        for slot in self._slots:
+            if not slot.is_healthy():
+                self._idle = [p for p in self._idle if p.slot is not slot]
+                await self._ensure_browser(slot)
+        return {
+            "running": True,
+            "browsers": [{"index": s.index, "connected": s.is_healthy(), "contexts": s.open_contexts, "launches": s.launches}
+                         for s in self._slots],
+            "idle_contexts": len(self._idle),
+            **self.stats,
+        }
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            try:
+                await self.health_check()
+            except Exception as e:
+                logging.error(f"Browser pool health check failed: {e}")
+
+    async def close(self):
+        """Close every context and browser and stop Playwright."""
+        if self._health_task:
+            self._health_task.cancel()
+            self._health_task = None
+        for pooled in self._idle:
+            try:
+                await pooled.context.close()
+            except Exception:
+                pass
+        self._idle = []
+        for slot in self._slots:
+            if slot.browser is not None:
+                try:
+                    await slot.browser.close()
+                except Exception:
+                    pass
+                slot.browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+        logging.info("Browser pool closed")
+
+
+def _ensure_pool_loop():
+    global _pool_loop, _pool_thread
+    with _pool_lock:
+        if _pool_loop is None or not _pool_thread.is_alive():
+            _pool_loop = asyncio.new_event_loop()
+            _pool_thread = threading.Thread(target=_pool_loop.run_forever, name="browser-pool", daemon=True)
+            _pool_thread.start()
+        return _pool_loop
+
+
+def configure_browser_pool(browsers=None, contexts_per_browser=None, max_pages_per_context=None):
+    """Override the pool size before the first page is borrowed."""
+    global POOL_BROWSERS, CONTEXTS_PER_BROWSER, MAX_PAGES_PER_CONTEXT
+    if _pool is not None:
+        logging.warning("Browser pool already created, configuration ignored")
+        return
+    POOL_BROWSERS = browsers or POOL_BROWSERS
+    CONTEXTS_PER_BROWSER = contexts_per_browser or CONTEXTS_PER_BROWSER
+    MAX_PAGES_PER_CONTEXT = max_pages_per_context or MAX_PAGES_PER_CONTEXT
+
+
+def get_browser_pool():
+    """Return the process-wide browser pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool(POOL_BROWSERS, CONTEXTS_PER_BROWSER, MAX_PAGES_PER_CONTEXT)
+        return _pool
+
+
+async def run_on_pool(coro):
+    """Await a coroutine on the pool's event loop from any other loop."""
+    loop = _ensure_pool_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        return await coro
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+
+def run_on_pool_sync(coro, timeout=None):
+    """Blocking variant of run_on_pool for plain threads (Flask routes, atexit)."""
+    loop = _ensure_pool_loop()
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+
+def browser_pool_status():
+    """Run a health check and return the pool status as a dict."""
+    return run_on_pool_sync(get_browser_pool().health_check(), timeout=60)
+
+
+def shutdown_browser_pool():
+    """Close the pool; registered to run at interpreter exit."""
+    global _pool
+    if _pool is None or _pool_loop is None:
+        return
+    try:
+        run_on_pool_sync(_pool.close(), timeout=30)
+    except Exception as e:
+        logging.error(f"Error closing browser pool: {e}")
+    _pool = None
+    _pool_loop.call_soon_threadsafe(_pool_loop.stop)
+
+
+atexit.register(shutdown_browser_pool)
@@ -3,7 +3,7 @@
 import re
 import time
 import random
-from utils import REGEX_PATTERNS, create_extraction_plan
+from utils import create_extraction_plan, get_field_scanner
 
 class Extractor:
     """Component for extracting data from HTML content"""
@@ -57,12 +57,15 @@ class Extractor:
         """Extract data using regex patterns"""
         results = {}
         
+        # Each regex pattern is compiled once and run over the document
+        scanner = get_field_scanner(tuple(extraction_plan))
+        scanned = scanner.findall(html_content)
+        
         for field, plan in extraction_plan.items():
             self.logger.info(f"Extracting field: {field}")
             
             if plan['type'] == 'regex' and 'pattern' in plan:
-                pattern = plan['pattern']
-                matches = re.findall(pattern, html_content)
+                matches = scanned[field]
                 
                 if matches:
                     self.logger.success(f"Found {len(matches)} matches for {field}")
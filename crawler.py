@@ -1,7 +1,10 @@
 import asyncio
 import time
+from urllib.parse import urlparse, urlsplit, urlunsplit, parse_qsl, urlencode
+import re
 from playwright.async_api import async_playwright
 from bs4 import BeautifulSoup
+from extraction import find_relevant_container
 from log import log_info, log_success, log_error, log_warning  # Import logging functions
 from database import db
 from assets import selected_user_agent,http_headers,random_zigzag_move
@@ -11,8 +14,39 @@ ua_platform= ['desktop','mobile','tablet']
 ua_os= ["Windows", "Linux", "Ubuntu", "Chrome OS", "Mac OS X", "Android", "iOS"]
 
 from fakeagents import get_random_user_agent
+from browser_pool import get_browser_pool, run_on_pool
+from readiness import get_readiness_profile, wait_until_ready, wait_for_dom_quiet
+from blocking import apply_blocking_profile
+from http_fetch import fetch_without_browser, get_domain_strategy
+from html_cache import html_cache, make_cache_key
+from lazy_harvest import harvest_lazy_items, merge_harvested_items
+from load_more_replay import record_load_more_request, replay_load_more_items, REPLAY_MAX_PAGES
 import spacy
 rawid = ""
+last_fetch_timings = {}  # Per-stage durations (seconds) of the most recent get_html call
+last_fetch_blocking = {}  # Request-blocking counters of the most recent get_html call
+raw_html_ids = {}  # URL -> id of its saved raw HTML row, for concurrent fetches
+FETCH_CONCURRENCY = 8  # Default pages in flight for get_html_many (matches the pool's context count)
+PER_DOMAIN_LIMIT = 2  # Default pages in flight per domain for get_html_many
+PAGINATION_CONCURRENCY = 4  # Tabs fetching numbered pages at once
+MAX_NUMBERED_PAGES = 50  # Hard cap on numbered pages per URL
+PAGINATION_WINDOW_DELAY_MS = 500  # Pause between windows of concurrently fetched pages
+
+class StageTimer:
+    """Accumulate wall-clock durations for the named stages of a single fetch."""
+    def __init__(self):
+        self.timings = {}
+        self._last = time.time()
+
+    def mark(self, stage):
+        """Close the current stage under the given name and start the next one."""
+        now = time.time()
+        self.timings[stage] = self.timings.get(stage, 0.0) + (now - self._last)
+        self._last = now
+
+    def summary(self):
+        return ", ".join(f"{stage}={seconds:.2f}s" for stage, seconds in self.timings.items())
+
 async def random_sleep(min_delay=1, max_delay=3):
     """Sleep for a random amount of time between min_delay and max_delay seconds."""
     delay = random.uniform(min_delay, max_delay)
@@ -59,8 +93,104 @@ from fake_useragent import UserAgent
 
 async def get_html(url: str, button: str = None, options: dict = None, loader: str = None) -> str:
     """
-    Fetch HTML content by navigating to a URL and extracting a strictly meaningful container using AsyncWebCrawler.
+    Fetch HTML content by navigating to a URL and extracting a strictly meaningful container.
+
+    By default the rendered DOM is returned as-is (single-fetch mode); pass
+    options['single_fetch'] = False to refetch the URL through AsyncWebCrawler
+    as before. Per-stage timings are logged and kept in last_fetch_timings.
+
+    options['readiness'] selects how long to wait before snapshotting: "fast"
+    (default) waits for DOM quiescence, network idle and the optional
+    options['target_selector'], while "stealth" keeps the human-like delays.
+
+    options['blocking_profile'] selects which requests are aborted before they
+    hit the network: "no-media" (default), "text-only" or "full".
+
+    options['fetch_strategy'] is "auto" (default), "http" or "browser". In auto
+    mode the page is first fetched with the pooled HTTP client and only
+    escalated to Chromium when it looks JavaScript-rendered (empty body, empty
+    framework root, or options['target_selector'] / options['required_selectors']
+    missing). The decision is remembered per domain. Pagination and lazy
+    loading always use the browser.
+
+    With handle_lazy_loading and options['lazy_item_selector'] set, items are
+    harvested after every scroll (and removed from the DOM unless
+    options['lazy_remove_harvested'] is False) until network and mutation
+    activity show the feed has ended; they are appended to the snapshot.
+
+    options['replay_load_more'] records the request behind the first click
+    of the pagination button and replays it over HTTP with an incrementing
+    page/offset parameter, so the browser is only needed for that click.
+    If the replay returns no items (matching options['pagination_item_selector']
+    when set) the button is clicked as usual.
+
+    Results are kept in the on-disk html_cache, keyed by URL and the options
+    that affect rendering. Fresh entries are returned without any network
+    access; stale entries fetched over HTTP are revalidated with
+    ETag/Last-Modified. Set options['use_cache'] = False to bypass it and
+    options['cache_ttl'] (seconds) to override the default TTL.
+
+    Pages are borrowed from the shared browser pool, so no Chromium process is
+    launched per call. The work runs on the pool's event loop, which lets
+    callers on any loop (asyncio.run, Flask worker threads) await it.
     """
+    return await run_on_pool(_get_html(url, button, options, loader))
+
+async def get_html_many(urls, concurrency: int = FETCH_CONCURRENCY, per_domain_limit: int = PER_DOMAIN_LIMIT,
+                        button: str = None, options: dict = None, loader: str = None):
+    """
+    Fetch many URLs in parallel and yield (url, html) pairs as they complete.
+
+    At most `concurrency` pages are in flight overall and `per_domain_limit`
+    per domain, so one large site cannot starve the others or get hammered.
+    Pages share the browser pool's contexts; failed fetches yield "".
+    Stopping iteration early cancels the fetches that have not finished.
+    """
+    urls = list(dict.fromkeys(urls))  # Drop duplicates, keep order
+    overall = asyncio.Semaphore(max(1, concurrency))
+    domains = {}
+
+    async def fetch_one(url):
+        domain = urlparse(url).netloc.lower()
+        if domain not in domains:
+            domains[domain] = asyncio.Semaphore(max(1, per_domain_limit))
+        async with domains[domain], overall:
+            try:
+                return url, await get_html(url, button, options, loader)
+            except Exception as e:
+                log_error(f"Error fetching {url}: {str(e)}")
+                return url, ""
+
+    start_time = time.time()
+    tasks = [asyncio.ensure_future(fetch_one(url)) for url in urls]
+    done = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            url, html_content = await next_done
+            done += 1
+            yield url, html_content
+        elapsed = time.time() - start_time
+        log_info(f"Fetched {done} URLs in {elapsed:.2f}s ({done / elapsed * 60 if elapsed else 0:.0f}/min)")
+    finally:
+        for task in tasks:
+            task.cancel()
+
+def _complete_fetch(url, html_content, options, timer, start_time, block_stats=None):
+    """Save the raw page if requested and record timings for a finished fetch."""
+    global last_fetch_timings, last_fetch_blocking, rawid
+    if options.get('saveToDb', False):
+        print("Saving Raw")
+        rawid = db.save_raw_html(url, html_content)
+        raw_html_ids[url] = rawid
+    last_fetch_timings = timer.timings
+    last_fetch_blocking = block_stats.as_dict() if block_stats else {}
+    if block_stats:
+        log_info(f"Request blocking for {url}: {block_stats.summary()}")
+    log_info(f"Stage timings for {url}: {timer.summary()}")
+    log_info(f"Fetch completed in {time.time() - start_time:.2f}s")
+    return html_content
+
+async def _get_html(url: str, button: str = None, options: dict = None, loader: str = None) -> str:
     ua = UserAgent(os=random.choice(ua_os), platforms=random.choice(ua_platform))
     # print("ua", ua.random)
     options = options or {}
@@ -71,113 +201,164 @@ async def get_html(url: str, button: str = None, options: dict = None, loader: s
     js_timeout = options.get('js_timeout', 10000)           # Reduced JS timeout (ms)
     navigation_timeout = options.get('navigation_timeout', 30000)  # Reduced navigation timeout (ms)
     retry_attempts = options.get('retry_attempts', 2)
+    # Single-fetch mode hands the rendered DOM straight to the filtering stage
+    # instead of letting crawl4ai launch a second browser and refetch the URL.
+    single_fetch = options.get('single_fetch', True)
+    # "fast" waits for DOM/network quiescence; "stealth" keeps the human-like delays
+    readiness = get_readiness_profile(options.get('readiness'))
+    target_selector = options.get('target_selector')
+    blocking_profile = options.get('blocking_profile')
+    fetch_strategy = options.get('fetch_strategy', 'auto')
+    if handle_pagination or handle_lazy_loading:
+        # Clicking and scrolling need a live page
+        fetch_strategy = 'browser'
+    elif fetch_strategy == 'auto' and get_domain_strategy(url) == 'browser':
+        fetch_strategy = 'browser'
     
     start_time = time.time()
-    log_info(f"Starting HTML fetch from: {url} [Options: lazy_loading={handle_lazy_loading}, pagination={handle_pagination}]")
+    log_info(f"Starting HTML fetch from: {url} [Options: lazy_loading={handle_lazy_loading}, pagination={handle_pagination}, single_fetch={single_fetch}, readiness={readiness['name']}, fetch_strategy={fetch_strategy}]")
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(
-            headless=True,
-            args=['--disable-web-security', '--disable-features=IsolateOrigins,site-per-process']
-        )
-        log_info("Launched headless Chromium browser with args: --disable-web-security")
+    global last_fetch_timings
+    timer = StageTimer()
+    use_cache = options.get('use_cache', True)
+    cache_ttl = options.get('cache_ttl')
+    cache_key = make_cache_key(url, {**options, 'button': button, 'loader': loader})
+    cached = html_cache.get(cache_key) if use_cache else None
+    timer.mark("cache")
+    if cached and cached['fresh']:
+        log_success(f"Cache hit for {url} ({len(cached['html'])} bytes)")
+        return _complete_fetch(url, cached['html'], options, timer, start_time)
+
+    if fetch_strategy in ('auto', 'http'):
+        selectors = [target_selector] if target_selector else []
+        selectors += options.get('required_selectors') or []
+        # Only pages that came from the HTTP path carry validators worth sending
+        stale = cached if cached and cached.get('source') == 'http' else None
+        result = await fetch_without_browser(url, selectors, force=fetch_strategy == 'http', cached=stale)
+        timer.mark("http")
+        if result and result['html']:
+            if result['not_modified']:
+                log_success(f"Cached copy of {url} revalidated (304 Not Modified)")
+                html_cache.refresh(cache_key)
+            else:
+                log_success(f"Fetched {len(result['html'])} bytes over HTTP, browser not needed")
+                if use_cache:
+                    html_cache.put(cache_key, url, result['html'], etag=result['etag'],
+                                   last_modified=result['last_modified'], source="http", ttl=cache_ttl)
+            return _complete_fetch(url, result['html'], options, timer, start_time)
+
+    pool = get_browser_pool()
+    for attempt in range(retry_attempts + 1):
+        if attempt > 0:
+            log_info(f"Retry attempt {attempt + 1}/{retry_attempts + 1}")
         
-        for attempt in range(retry_attempts + 1):
-            if attempt > 0:
-                log_info(f"Retry attempt {attempt + 1}/{retry_attempts + 1}")
-            
-            print(selected_user_agent)
-            # Create a fresh context and page for each attempt.
-            context = await browser.new_context(
-                viewport={"width": 1920, "height": 1080},
-                user_agent=get_random_user_agent(),
-                ignore_https_errors=True,
-                java_script_enabled=True
-            )
-            page = await context.new_page()
+        print(selected_user_agent)
+        # Borrow a fresh page from a pooled context for each attempt.
+        async with pool.page() as page:
+            block_stats = await apply_blocking_profile(page, blocking_profile)
+            timer.mark("lease")
             print(http_headers)
             # await page.set_extra_http_headers(http_headers)
             page.set_default_timeout(navigation_timeout)
-            await random_sleep()
-            # page.on("dialog", lambda dialog: asyncio.create_task(dialog.dismiss()))
-            start_x, start_y = 100, 100
-            await page.mouse.move(start_x, start_y)
-            # End position (e.g., somewhere in the middle of the page)
-            end_x, end_y = 600, 600
-
-            # Perform the human-like zigzag mouse movement
-            await random_zigzag_move(page, start_x, start_y, end_x, end_y)
+            if readiness['humanize']:
+                await random_sleep()
+                # page.on("dialog", lambda dialog: asyncio.create_task(dialog.dismiss()))
+                start_x, start_y = 100, 100
+                await page.mouse.move(start_x, start_y)
+                # End position (e.g., somewhere in the middle of the page)
+                end_x, end_y = 600, 600
+
+                # Perform the human-like zigzag mouse movement
+                await random_zigzag_move(page, start_x, start_y, end_x, end_y)
+                timer.mark("humanize")
             try:
                 log_info(f"Navigating to {url} with timeout {navigation_timeout}ms")
                 nav_start = time.time()
                 response = await page.goto(url, timeout=navigation_timeout, wait_until="domcontentloaded")
                 nav_time = time.time() - nav_start
+                timer.mark("navigate")
                 
                 if response and response.ok:
                     log_success(f"Navigation succeeded in {nav_time:.2f}s (Status: {response.status})")
                 else:
                     log_warning(f"Navigation issue after {nav_time:.2f}s: Status={response.status if response else 'No response'}")
-                    await context.close()
                     continue
 
-                # Wait for the initial network activities to settle.
-                await page.wait_for_timeout(3000)
-                try:
-                    await page.wait_for_load_state("networkidle", timeout=js_timeout // 2)
+                # Wait for the page to settle according to the readiness profile.
+                signals = await wait_until_ready(page, readiness, target_selector, js_timeout)
+                if signals.get('network_idle'):
                     log_success("Page reached network idle state")
-                except Exception as e:
-                    # log_warning(f"Network idle timeout: {str(e)}")
-                    print(str(e))
+                log_info(f"Page ready after {signals['elapsed']:.2f}s ({readiness['name']}): {signals}")
+                timer.mark("settle")
                 
+                replayed = []
                 if handle_pagination and button:
-                    await handle_pagination_with_backoff(page, button, loader, max_pages)
+                    replayed = await handle_pagination_with_backoff(
+                        page, button, loader, max_pages, options.get('replay_load_more', False),
+                        options.get('replay_max_pages', REPLAY_MAX_PAGES),
+                        options.get('pagination_item_selector'))
+                numbered_html = None
                 if handle_pagination and numbered:
-                    await handle_numbered_pagination_with_backoff(page, url)
-                if handle_lazy_loading:
+                    pages = await handle_numbered_pagination_with_backoff(
+                        page, url, options.get('pagination_max_pages', MAX_NUMBERED_PAGES), loader,
+                        options.get('pagination_concurrency', PAGINATION_CONCURRENCY),
+                        options.get('pagination_item_selector') or target_selector,
+                        options.get('page_param', 'page'), blocking_profile)
+                    log_success(f"Collected {len(pages)} numbered pages")
+                    numbered_html = merge_pages(pages)
+                timer.mark("paginate")
+                harvested = None
+                if handle_lazy_loading and options.get('lazy_item_selector'):
+                    harvested = await harvest_lazy_items(page, options['lazy_item_selector'],
+                                                         options.get('lazy_remove_harvested', True))
+                    log_success(f"Harvested {len(harvested)} lazy-loaded items")
+                elif handle_lazy_loading:
                     await handle_lazy_loading_with_limits(page)
+                timer.mark("lazy_load")
                 
-                await page.wait_for_timeout(2000)
-                html_content = await page.content()
+                if readiness['final_wait_ms']:
+                    await page.wait_for_timeout(readiness['final_wait_ms'])
+                html_content = numbered_html or await page.content()
+                html_content = merge_harvested_items(html_content, (harvested or []) + replayed)
                 raw_size = len(html_content)
+                timer.mark("snapshot")
                 
                 if raw_size > 500:
                     log_success(f"Extracted raw HTML: {raw_size} bytes")
-                    # Use AsyncWebCrawler to extract meaningful content
-                    proxy_config = {
-                        "server": "http://proxy.example.com:8080",
-                        "username": "user",
-                        "password": "pass"
-                    }
-
-                    # browser_config = BrowserConfig(proxy_config=proxy_config)
-                    async with AsyncWebCrawler() as crawler:#config=browser_config
-                        result = await crawler.arun(url=url)  # Use arun to process the URL
-                        filtered_html = result.html  # Extract the markdown content
-                        filtered_size = len(filtered_html)
-                        reduction = ((raw_size - filtered_size) / raw_size * 100)
-                        log_info(f"Filtered content size: {filtered_size} bytes (reduction: {reduction:.1f}%)")
-                        global rawid
-                        if options.get('saveToDb', False):
-                            print("Saving Raw")
-                            rawid = db.save_raw_html(url, filtered_html)
-                        await context.close()
-                        log_info(f"Fetch completed in {time.time() - start_time:.2f}s")
-                        await browser.close()
-                        return filtered_html
+                    if single_fetch:
+                        # The rendered DOM already contains everything pagination
+                        # and lazy loading revealed, so filter it directly.
+                        filtered_html = html_content
+                    else:
+                        # Use AsyncWebCrawler to extract meaningful content
+                        proxy_config = {
+                            "server": "http://proxy.example.com:8080",
+                            "username": "user",
+                            "password": "pass"
+                        }
+
+                        # browser_config = BrowserConfig(proxy_config=proxy_config)
+                        async with AsyncWebCrawler() as crawler:#config=browser_config
+                            result = await crawler.arun(url=url)  # Use arun to process the URL
+                            filtered_html = result.html  # Extract the markdown content
+                    filtered_size = len(filtered_html)
+                    reduction = ((raw_size - filtered_size) / raw_size * 100)
+                    log_info(f"Filtered content size: {filtered_size} bytes (reduction: {reduction:.1f}%)")
+                    timer.mark("filter")
+                    if use_cache:
+                        html_cache.put(cache_key, url, filtered_html, source="browser", ttl=cache_ttl)
+                    return _complete_fetch(url, filtered_html, options, timer, start_time, block_stats)
                 else:
                     log_warning(f"Raw HTML too small ({raw_size} bytes), retrying")
-                    await context.close()
                     continue
                     
             except Exception as e:
                 log_error(f"Error during fetch: {str(e)}")
-                await context.close()
-            # End of attempt loop
-        
-        await browser.close()
-        log_info("Browser closed")
-        log_error(f"All {retry_attempts + 1} attempts failed for {url}")
-        return ""
+        # End of attempt loop
+    
+    last_fetch_timings = timer.timings
+    log_error(f"All {retry_attempts + 1} attempts failed for {url}")
+    return ""
         
              
 import asyncio
@@ -343,11 +524,7 @@ async def scrape_agent_data(url: str, options: dict = None, json_file=None, csv_
         )
         
         # Disable unnecessary features to save memory
-        await context.route('**/*.{png,jpg,jpeg,gif,svg,pdf,mp4,webp}', lambda route: route.abort())
-        await context.route('**/*google*', lambda route: route.abort())
-        await context.route('**/*analytics*', lambda route: route.abort())
-        await context.route('**/*tracking*', lambda route: route.abort())
-        await context.route('**/*advertisement*', lambda route: route.abort())
+        block_stats = await apply_blocking_profile(context, options.get('blocking_profile'))
         
         # Navigate to main page with cities
         main_page = await context.new_page()
@@ -537,6 +714,7 @@ async def scrape_agent_data(url: str, options: dict = None, json_file=None, csv_
             elapsed = time.time() - state.start_time
             log_success(f"Scraping completed. Extracted data for {state.total_agents} agents in {elapsed:.2f} seconds.")
             log_info(f"Final memory usage: {get_memory_usage():.2f} MB")
+            log_info(f"Request blocking: {block_stats.summary()}")
             
             # Remove checkpoint file if completed successfully
             if os.path.exists(CHECKPOINT_FILE) and state.is_running:
@@ -602,8 +780,18 @@ async def process_agent(context, base_url, agent_block, city_name, semaphore):
 
 
 
-async def handle_pagination_with_backoff(page, buttons, loader, max_pages):
-    """Handle pagination with detailed logging and strict button checks."""
+async def handle_pagination_with_backoff(page, buttons, loader, max_pages, replay: bool = False,
+                                         replay_max_pages: int = REPLAY_MAX_PAGES, item_selector: str = None):
+    """
+    Handle pagination with detailed logging and strict button checks.
+
+    With replay=True the request fired by the first click is recorded and
+    replayed over HTTP with an incrementing page/offset instead of clicking
+    again; the replayed pages holding items (elements matching item_selector
+    when given) are returned as HTML fragments. Otherwise (no replayable
+    request, a failed replay or no items) the button is clicked as before
+    and an empty list is returned.
+    """
     log_info(f"Pagination enabled: Searching for button '{buttons}' ")
     page_count = 0
     
@@ -628,16 +816,29 @@ async def handle_pagination_with_backoff(page, buttons, loader, max_pages):
                     except Exception:
                         if timeout_ms == 8000:
                             log_warning(f"Button '{button}' not found after {timeout_ms}ms")
-                            return
+                            return []
                         continue
                 
                 if not button_element:
                     log_warning(f"Button '{button}' not found, stopping pagination")
-                    return
+                    return []
 
                 await button_element.scroll_into_view_if_needed()
                 await page.wait_for_timeout(1000)
                 
+                if replay and page_count == 0:
+                    recorded = await record_load_more_request(page, button_element.click)
+                    if recorded:
+                        fragments = await replay_load_more_items(recorded, replay_max_pages, item_selector)
+                        if fragments:
+                            log_success(f"Replayed Load More request for {len(fragments)} pages instead of clicking")
+                            return fragments
+                        log_warning("Load More replay returned no items, clicking instead")
+                    # The click went through while recording; carry on clicking
+                    page_count += 1
+                    await page.wait_for_timeout(2000)
+                    continue
+
                 click_success = False
                 for attempt in range(3):
                     try:
@@ -650,7 +851,7 @@ async def handle_pagination_with_backoff(page, buttons, loader, max_pages):
                 
                 if not click_success:
                     log_error("Failed to click button after 3 attempts")
-                    return
+                    return []
                     
                 page_count += 1
                 log_success(f"Clicked '{button}' ({page_count}/{max_pages})")
@@ -666,41 +867,125 @@ async def handle_pagination_with_backoff(page, buttons, loader, max_pages):
                         
             except Exception as e:
                 log_error(f"Pagination error: {str(e)}")
-                return
+                return []
 
 import asyncio
 
-async def handle_numbered_pagination_with_backoff(page, base_url: str="", max_pages: int=1, loader: str = None):
+async def handle_numbered_pagination_with_backoff(page, base_url: str="", max_pages: int=MAX_NUMBERED_PAGES, loader: str = None,
+                                                  concurrency: int = 1, item_selector: str = None, page_param: str = "page",
+                                                  blocking_profile: str = None):
     """
     Handle numbered pagination with retries and backoff strategy.
-    Extracts HTML content from each page while navigating through the pages.
+    Returns the HTML of every page in order, starting with the current one.
     """
-    page_number = 1
-    all_html = []  # List to store HTML content of each page
-    
-    while True:
+    for attempt in range(3):
         try:
-            # Call the function that handles pagination and HTML extraction
-            log_info(f"Fetching page {page_number}/{max_pages}...")
-            
-            # Use the helper function to fetch HTML from the current page
-            html_content = await handle_numbered_pagination(page, base_url, page_number, loader)
-            all_html.extend(html_content)  # Add the current page's HTML to the list
-            
-            # Log success for the current page
-            log_success(f"Successfully extracted HTML from page {page_number}/{max_pages}")
-            
-            # Increment the page number for the next page
-            page_number += 1
-            
-            # Small delay to avoid overloading the server
-            await page.wait_for_timeout(2000)  # 2 seconds delay between page fetches
-            
+            return await fetch_numbered_pages(page, base_url or page.url, max_pages, loader, concurrency,
+                                              item_selector, page_param, blocking_profile)
         except Exception as e:
-            log_error(f"Error on page {page_number}: {str(e)}")
-            break  # Exit the loop if there’s an error (e.g., page failed to load)
-    
-    return all_html
+            log_warning(f"Numbered pagination attempt {attempt + 1}/3 failed: {str(e)}")
+            await asyncio.sleep(2 ** attempt)
+    log_error("Numbered pagination failed, keeping the first page only")
+    return [await page.content()]
+
+
+def build_page_url(base_url: str, page_number: int, page_param: str = "page") -> str:
+    """Set the page query parameter on a URL, keeping any existing parameters."""
+    parts = urlsplit(base_url)
+    query = dict(parse_qsl(parts.query, keep_blank_values=True))
+    query[page_param] = str(page_number)
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+async def _page_items(page, item_selector):
+    # Item texts identify the listing entries; without a selector the whole body text does
+    if item_selector:
+        return await page.eval_on_selector_all(item_selector, "els => els.map(e => e.innerText.trim())")
+    return [await page.evaluate("document.body ? document.body.innerText : ''")]
+
+
+async def _fetch_numbered_page(tab, url, loader, item_selector):
+    response = await tab.goto(url, wait_until="domcontentloaded")
+    if response and response.status >= 400:
+        log_warning(f"{url} returned status {response.status}")
+        return None
+    if loader:
+        try:
+            await tab.wait_for_selector(loader, state="hidden", timeout=5000)
+        except Exception:
+            log_warning(f"Loader still present on {url}, proceeding anyway")
+    if item_selector:
+        try:
+            await tab.wait_for_selector(item_selector, state="attached", timeout=5000)
+        except Exception:
+            pass
+    await wait_for_dom_quiet(tab, 300, 5000)
+    return await tab.content(), await _page_items(tab, item_selector)
+
+
+async def fetch_numbered_pages(page, base_url: str, max_pages: int = MAX_NUMBERED_PAGES, loader: str = None,
+                               concurrency: int = PAGINATION_CONCURRENCY, item_selector: str = None,
+                               page_param: str = "page", blocking_profile: str = None) -> list:
+    """
+    Fetch ?page=N pages in windows of `concurrency` tabs and return their HTML in order.
+
+    The current page counts as page 1. Fetching stops at max_pages, at the
+    first page that fails or returns an error status, or at the first page
+    that yields no items that were not already seen on an earlier page.
+    Tabs are opened in the page's own context, so no extra pool lease is taken.
+    """
+    pages = [await page.content()]
+    seen = set(await _page_items(page, item_selector))
+    concurrency = max(1, concurrency)
+    tabs = []
+    try:
+        for _ in range(min(concurrency, max_pages - 1)):
+            tab = await page.context.new_page()
+            await apply_blocking_profile(tab, blocking_profile)
+            tabs.append(tab)
+        page_number = 2
+        while page_number <= max_pages:
+            window = list(range(page_number, min(page_number + concurrency, max_pages + 1)))
+            log_info(f"Fetching pages {window[0]}-{window[-1]} of {base_url} concurrently")
+            results = await asyncio.gather(
+                *(_fetch_numbered_page(tab, build_page_url(base_url, n, page_param), loader, item_selector)
+                  for tab, n in zip(tabs, window)),
+                return_exceptions=True,
+            )
+            for n, result in zip(window, results):
+                if isinstance(result, Exception) or result is None:
+                    log_warning(f"Stopping pagination at page {n}: {result if result else 'no content'}")
+                    return pages
+                html_content, items = result
+                new_items = set(items) - seen
+                if not new_items:
+                    log_info(f"Page {n} has no new items, stopping pagination")
+                    return pages
+                seen.update(new_items)
+                pages.append(html_content)
+                log_success(f"Page {n}: {len(new_items)} new items")
+            page_number += len(window)
+            if PAGINATION_WINDOW_DELAY_MS and page_number <= max_pages:
+                await page.wait_for_timeout(PAGINATION_WINDOW_DELAY_MS)
+        return pages
+    finally:
+        for tab in tabs:
+            try:
+                await tab.close()
+            except Exception:
+                pass
+
+
+def merge_pages(pages: list) -> str:
+    """Combine paginated documents into one, keeping the first page's <head>."""
+    if len(pages) == 1:
+        return pages[0]
+    head = re.search(r"<head[^>]*>.*?</head>", pages[0], re.S | re.I)
+    bodies = []
+    for number, html_content in enumerate(pages, 1):
+        body = re.search(r"<body[^>]*>(.*)</body>", html_content, re.S | re.I)
+        bodies.append(f'<div data-page="{number}">{body.group(1) if body else html_content}</div>')
+    return f"<html>{head.group(0) if head else ''}<body>{''.join(bodies)}</body></html>"
 
 
 async def handle_numbered_pagination(page, base_url: str, max_pages: int, loader: str = None) -> list:
@@ -806,61 +1091,24 @@ async def handle_lazy_loading_with_limits(page):
     except Exception as e:
         log_error(f"Lazy loading error: {str(e)}")
 
-def extract_relevant_container(html_content: str) -> str:
-    """Extract a strictly meaningful container with enhanced scoring and logging."""
-    soup = BeautifulSoup(html_content, 'lxml')
-    log_info("Analyzing HTML for relevant container")
-    
-    def score_container(element):
-        score = 0
-        children = element.find_all(recursive=False)
-        text_length = len(element.get_text(strip=True))
-        class_name = " ".join(element.get("class", [])).lower() if element.get("class") else ""
-        
-        # Strict exclusions
-        if element.name in ['script', 'style', 'nav', 'header', 'footer']:
-            
-            return -1
-        if any(x in class_name for x in ['navbar', 'footer', 'header', 'sidebar', 'ad', 'banner']):
-            
-            return -1
-        
-        # Minimum requirements
-        if len(children) < 3:
-            
-            return -1
-        if text_length < 100:
-            
-            return -1
-        
-        # Scoring
-        if element.name in ['div', 'section', 'article', 'main']:
-            score += 20
-        score += len(children) * 10  # Higher weight for structured content
-        score += min(text_length // 200, 50)  # Text contribution capped
-        depth = len(list(element.parents))
-        if depth < 3:
-            score -= 30  # Penalize shallow containers
-        if len(set(child.name for child in children)) > 2:  # Reward variety in child tags
-            score += 15
-            
-        # log_info(f"Scored <{element.name} class='{class_name}'>: {score} (children={len(children)}, text={text_length}, depth={depth})")
-        return score
+def extract_relevant_container(html_content: str, max_containers=None, root=None) -> str:
+    """
+    Extract a strictly meaningful container with enhanced scoring and logging.
 
-    containers = soup.find_all(['div', 'section', 'article', 'main'], recursive=True)
-    if not containers:
+    Scoring is a single bottom-up pass (see extraction.find_relevant_container);
+    max_containers caps how many candidates are scored. root is the page's
+    lxml tree when it is already parsed.
+    """
+    log_info("Analyzing HTML for relevant container")
+    container, best_score, inspected = find_relevant_container(html_content, max_containers, root)
+    if best_score is None:
         log_warning("No candidate containers found")
         return ""
-
-    best_container = max(containers, key=score_container, default=None)
-    best_score = score_container(best_container)
-    
-    if best_container and best_score >= 50:  # Stricter threshold
-        log_success(f"Selected container: <{best_container.name}> with score {best_score}")
-        return str(best_container)
-    else:
-        log_warning(f"No container met criteria (best score={best_score})")
-        return ""
+    if container:
+        log_success(f"Selected container with score {best_score} ({inspected} inspected)")
+        return container
+    log_warning(f"No container met criteria (best score={best_score})")
+    return ""
 
 def extract_data_by_css(html_content, selector):
     """Extract elements using a CSS selector with logging."""
@@ -0,0 +1,251 @@
+import re
+from bisect import bisect_right
+import lxml.etree
+import lxml.html
+from html_parser import parse_html, START, TEXT
+from utils import compile_scanner
+
+# Regex extraction over page text, grouped by the container each match sits in.
+# Each pattern is run over the text on its own, so matches of different fields may overlap.
+FIELD_PATTERNS = {
+    "email": re.compile(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}(?=[\s<]|$)"),  # Matches emails
+    "phone": re.compile(r"\b\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}\b"),  # Matches 10-digit phone numbers
+    "name": re.compile(r"[A-Z][a-z]+(?:\s[A-Z][a-z]+)*"),  # Matches names (e.g., "John Doe")
+}
+# Patterns precise enough to trust without the AI; "name" matches almost any capitalised words
+PRECISE_FIELDS = ("email", "phone")
+# Joins container texts so each pattern runs once per page; none of the patterns can match across it
+CONTAINER_SEPARATOR = "\n\x00\n"
+# Elements that own the text of their inline descendants
+CONTAINER_TAGS = {
+    "html", "body", "address", "article", "aside", "blockquote", "caption", "dd", "details",
+    "dialog", "div", "dl", "dt", "fieldset", "figcaption", "figure", "footer", "form",
+    "h1", "h2", "h3", "h4", "h5", "h6", "header", "hgroup", "li", "main", "nav", "ol", "p",
+    "pre", "section", "summary", "table", "tbody", "td", "tfoot", "th", "thead", "tr", "ul",
+}
+
+
+def clean_phone_numbers(phone_list, country_code=False, hyphen_separator=False):
+    """Keep 10-digit numbers and format them; order is preserved, duplicates dropped."""
+    cleaned = {}
+    for num in phone_list:
+        if not num:
+            continue
+        digits = re.sub(r'[^0-9]', '', num)
+        if len(digits) != 10:
+            continue
+        if hyphen_separator:
+            formatted = f"{digits[:3]}-{digits[3:6]}-{digits[6:]}"  # Format as XXX-XXX-XXXX
+        else:
+            formatted = digits
+        if country_code:
+            formatted = f"+1-{formatted}" if hyphen_separator else f"+1{formatted}"
+        cleaned[formatted] = None
+    return list(cleaned)
+
+
+def container_texts(document):
+    """
+    Return the visible text of every container in document order.
+
+    One walk over the tree: each text node is appended to its nearest
+    container ancestor only, so the cost is linear in the size of the
+    document (calling get_text() on every element re-reads each text node
+    once per ancestor). Pieces are stripped and joined with a space, like
+    get_text(" ", strip=True). document is an html_parser Node.
+    """
+    texts = []
+    owners = []
+    for event, value in document.walk():
+        if event == START:
+            if value in CONTAINER_TAGS or not owners:
+                owners.append(len(texts))
+                texts.append([])
+            else:
+                owners.append(owners[-1])
+        elif event == TEXT:
+            piece = value.strip()
+            if piece:
+                texts[owners[-1]].append(piece)
+        else:
+            owners.pop()
+    return [" ".join(parts) for parts in texts if parts]
+
+
+def field_scanner(fields):
+    """Cached scanner over the FIELD_PATTERNS of the requested fields."""
+    pairs = [(field, FIELD_PATTERNS[field.lower()].pattern) for field in fields if field.lower() in FIELD_PATTERNS]
+    return compile_scanner(tuple(pairs))
+
+
+def extract_grouped(html_content, fields, country_code=False, hyphen_separator=False, document=None, backend=None):
+    """
+    Run the field patterns over each container's own text.
+
+    The container texts are joined and scanned once per field pattern; match
+    offsets map each value back to its container.
+
+    Returns a list of {field: [values]} dicts, one per container that had a
+    match, in document order. Values already seen in an earlier container
+    are dropped. An already parsed document can be passed to skip parsing.
+    """
+    if document is None:
+        document = parse_html(html_content, backend)
+    texts = container_texts(document)
+    starts = []
+    offset = 0
+    for text in texts:
+        starts.append(offset)
+        offset += len(text) + len(CONTAINER_SEPARATOR)
+
+    # container index -> {field: [matches]}
+    by_container = {}
+    for field, matches in field_scanner(fields).scan(CONTAINER_SEPARATOR.join(texts)).items():
+        for value, start, _ in matches:
+            index = bisect_right(starts, start) - 1
+            by_container.setdefault(index, {}).setdefault(field, []).append(value)
+
+    seen = {field: set() for field in fields}
+    groups = []
+    for index in sorted(by_container):
+        extracted = {}
+        for field, matches in by_container[index].items():
+            if field.lower() == "phone":
+                matches = clean_phone_numbers(matches, country_code, hyphen_separator)
+            new = [m for m in dict.fromkeys(matches) if m not in seen[field]]
+            if new:
+                seen[field].update(new)
+                extracted[field] = new
+        if extracted:
+            groups.append(extracted)
+    return groups
+
+
+def extract_fields(html_content, fields, country_code=False, hyphen_separator=False, document=None, backend=None):
+    """Flatten extract_grouped() into {field: [values]} (the extract_data result shape)."""
+    results = {field: [] for field in fields}
+    for group in extract_grouped(html_content, fields, country_code, hyphen_separator, document, backend):
+        for field, values in group.items():
+            results[field].extend(values)
+    return results
+
+
+def merge_field_results(fields, *results):
+    """Combine {field: [values]} dicts, keeping the first occurrence of each value."""
+    merged = {field: [] for field in fields}
+    for result in results:
+        for field in fields:
+            merged[field].extend(result.get(field, []))
+    return {field: list(dict.fromkeys(values)) for field, values in merged.items()}
+
+
+def unresolved_fields(fields, scanned, structured=None):
+    """
+    Fields the regex method cannot be trusted to have answered: those
+    without structured-data values, unless a PRECISE_FIELDS pattern found them.
+    """
+    structured = structured or {}
+    return [
+        field for field in fields
+        if not structured.get(field) and not (field.lower() in PRECISE_FIELDS and scanned.get(field))
+    ]
+
+
+RELEVANT_CONTAINER_TAGS = ('div', 'section', 'article', 'main')  # Candidates for the main content container
+EXCLUDED_CONTAINER_TAGS = ('script', 'style', 'nav', 'header', 'footer')
+EXCLUDED_CONTAINER_CLASSES = ('navbar', 'footer', 'header', 'sidebar', 'ad', 'banner')
+UNCOUNTED_TEXT_TAGS = ('script', 'style', 'template')  # Not part of get_text()
+
+
+def score_container_stats(tag, class_name, child_count, child_tags, text_length, depth):
+    """Score a candidate container from its precomputed statistics (-1 = rejected)."""
+    if tag in EXCLUDED_CONTAINER_TAGS:
+        return -1
+    if any(x in class_name for x in EXCLUDED_CONTAINER_CLASSES):
+        return -1
+
+    # Minimum requirements
+    if child_count < 3:
+        return -1
+    if text_length < 100:
+        return -1
+
+    # Scoring
+    score = 0
+    if tag in RELEVANT_CONTAINER_TAGS:
+        score += 20
+    score += child_count * 10  # Higher weight for structured content
+    score += min(text_length // 200, 50)  # Text contribution capped
+    if depth < 3:
+        score -= 30  # Penalize shallow containers
+    if len(child_tags) > 2:  # Reward variety in child tags
+        score += 15
+    return score
+
+
+def find_relevant_container(html_content, max_containers=None, root=None):
+    """
+    Find the main content container of a page.
+
+    One post-order pass computes stripped text length, direct child count,
+    child tag variety and depth for every element bottom-up, so each node is
+    visited once. Ties go to the first container in document order.
+    max_containers caps how many candidates are scored; the walk stops once
+    the last of them is closed.
+
+    Returns (container_html, best_score, inspected); container_html is ""
+    when no candidate reaches the score threshold and best_score is None
+    when the page has no candidates. root is an lxml document already
+    parsed from html_content.
+    """
+    if root is None:
+        try:
+            root = lxml.html.document_fromstring(html_content)
+        except (lxml.etree.ParserError, ValueError):
+            return "", None, 0
+
+    best_score, best_order, best_container = None, None, None
+    inspected = 0
+    open_candidates = 0
+    # Frames of open elements: [element, candidate order or None, child_count, child_tags, text_length, uncounted]
+    stack = []
+    for event, el in lxml.etree.iterwalk(root, events=("start", "end", "comment", "pi")):
+        if event in ("comment", "pi"):
+            # Only the tail is text of the parent
+            if stack and el.tail:
+                stack[-1][4] += len(el.tail.strip())
+            continue
+        if event == "start":
+            candidate = None
+            if el.tag in RELEVANT_CONTAINER_TAGS and (max_containers is None or inspected < max_containers):
+                candidate = inspected  # Position in document order
+                inspected += 1
+                open_candidates += 1
+            # Strings anywhere inside script/style/template are left out of get_text()
+            uncounted = el.tag in UNCOUNTED_TEXT_TAGS or bool(stack and stack[-1][5])
+            own_text = len(el.text.strip()) if el.text and not uncounted else 0
+            stack.append([el, candidate, 0, set(), own_text, uncounted])
+            continue
+
+        el, candidate, child_count, child_tags, text_length, uncounted = stack.pop()
+        if uncounted:
+            text_length = 0
+        depth = len(stack) + 1  # Same as len(list(element.parents)) in a BeautifulSoup tree
+        if stack:
+            parent = stack[-1]
+            parent[2] += 1
+            parent[3].add(el.tag)
+            parent[4] += text_length + (len(el.tail.strip()) if el.tail else 0)
+        if candidate is not None:
+            open_candidates -= 1
+            class_name = " ".join((el.get("class") or "").split()).lower()
+            score = score_container_stats(el.tag, class_name, child_count, child_tags, text_length, depth)
+            # Children are scored before their parents, so ties go to the earlier start tag
+            if best_score is None or score > best_score or score == best_score and candidate < best_order:
+                best_score, best_order, best_container = score, candidate, el
+        if max_containers is not None and inspected >= max_containers and not open_candidates:
+            break
+
+    if best_container is None or best_score < 50:  # Stricter threshold
+        return "", best_score, inspected
+    return lxml.html.tostring(best_container, encoding="unicode", with_tail=False), best_score, inspected
@@ -0,0 +1,149 @@
+import asyncio
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from extraction import extract_fields, find_relevant_container, merge_field_results, unresolved_fields
+from html_parser import ParsedPage
+from stream_extraction import extract_fields_streaming, STREAMING_THRESHOLD
+from structured_data import answers_all, extract_structured_fields, json_ld_records
+from scraper import find_elements_by_selectors
+
+# CPU-bound extraction runs in worker processes, off the event loops and the Streamlit script thread
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", "0")) or max(1, (os.cpu_count() or 2) - 1)
+# Workers are never forked: a fork copies the browser-pool loop thread and its locks in whatever state they are in
+EXTRACTION_START_METHOD = os.getenv("EXTRACTION_START_METHOD") or (
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+SPACY_MODEL = "en_core_web_sm"
+
+_executor = None
+_executor_lock = threading.Lock()
+_nlp = None  # Loaded on first use inside each worker
+
+
+def get_extraction_executor():
+    """Return the shared process pool, starting it on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            context = multiprocessing.get_context(EXTRACTION_START_METHOD)
+            _executor = ProcessPoolExecutor(max_workers=EXTRACTION_WORKERS, mp_context=context)
+            logging.info(f"Extraction pool started with {EXTRACTION_WORKERS} {EXTRACTION_START_METHOD} workers")
+        return _executor
+
+
+def _discard_executor(executor):
+    """Forget a broken pool so the next call starts a new one."""
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+    logging.warning("Extraction pool broke (a worker died); it is restarted on next use")
+
+
+def shutdown_extraction_executor():
+    """Stop the worker processes; registered to run at exit."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+async def run_extraction(func, *args, **kwargs):
+    """
+    Run func(*args, **kwargs) in the extraction pool and await the result.
+
+    Raises BrokenProcessPool if a worker died; the pool is replaced for the
+    next call, so callers only need to handle the current task.
+    """
+    loop = asyncio.get_running_loop()
+    executor = get_extraction_executor()
+    try:
+        return await loop.run_in_executor(executor, partial(func, *args, **kwargs))
+    except BrokenProcessPool:
+        _discard_executor(executor)
+        raise
+
+
+def run_extraction_sync(func, *args, **kwargs):
+    """Blocking variant of run_extraction for synchronous callers."""
+    executor = get_extraction_executor()
+    try:
+        return executor.submit(func, *args, **kwargs).result()
+    except BrokenProcessPool:
+        _discard_executor(executor)
+        raise
+
+
+def regex_field_sources(html_content, fields, country_code=False, hyphen_separator=False, page=None):
+    """
+    (structured, scanned) results of the regex method.
+
+    Structured values come first. The text scan is skipped when per-item
+    records answer every field (scanned is then empty); a single page-level
+    record never replaces it. Pages above STREAMING_THRESHOLD are only
+    scanned, with the streaming extractor.
+    """
+    if len(html_content) > STREAMING_THRESHOLD:
+        return {}, extract_fields_streaming(html_content, fields, country_code, hyphen_separator)
+    if page is None:
+        page = ParsedPage(html_content)
+    records = json_ld_records(page)
+    structured = extract_structured_fields(page, fields, country_code, hyphen_separator, records)
+    if answers_all(page, structured, fields, records):
+        return structured, {field: [] for field in fields}
+    scanned = extract_fields(html_content, fields, country_code, hyphen_separator, document=page.document)
+    return structured, scanned
+
+
+# Worker tasks: top-level functions so they can be pickled
+
+def crawl_page_task(html_content, fields, method="regex", country_code=False, hyphen_separator=False,
+                    links=False, selectors=()):
+    """
+    Everything the crawl needs from one page, from a single parse in the worker.
+
+    Returns a dict with "fields" (the regex/CSS/hybrid results, {} for the AI
+    method and None for methods handled elsewhere), "unresolved" (hybrid
+    fields still to be asked of the AI), "container" (the main content block
+    sent to the AI instead of the whole page) and "summary" (see
+    ParsedPage.summarize: the link list when links is set, hrefs of the
+    given selectors, and the cleaned text for the AI method).
+    """
+    method = method.lower()
+    page = ParsedPage(html_content)
+    result = {"fields": None, "unresolved": [], "container": ""}
+    if method == "css":
+        rows = find_elements_by_selectors(html_content, fields, page=page)
+        result["fields"] = {field: [row[field] for row in rows] for field in fields}
+    elif method in ("regex", "hybrid"):
+        structured, scanned = regex_field_sources(html_content, fields, country_code, hyphen_separator, page)
+        result["fields"] = merge_field_results(fields, structured, scanned)
+        if method == "hybrid":
+            result["unresolved"] = unresolved_fields(fields, scanned, structured)
+    elif method == "ai":
+        result["fields"] = {}
+    if result["unresolved"]:
+        # Scored on the tree parsed above when it is an lxml one
+        root = page.document.raw if page.backend == "lxml" else None
+        result["container"] = find_relevant_container(html_content, root=root)[0]
+    result["summary"] = page.summarize(links, selectors, clean_text=method == "ai")
+    return result
+
+
+def person_names_task(text):
+    """PERSON entities found by spaCy; the model is loaded once per worker."""
+    global _nlp
+    if _nlp is None:
+        import spacy
+        _nlp = spacy.load(SPACY_MODEL)
+    return [ent.text for ent in _nlp(text).ents if ent.label_ == "PERSON"]
+
+
+atexit.register(shutdown_extraction_executor)
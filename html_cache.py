@@ -0,0 +1,177 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# On-disk cache for fetched and rendered HTML
+CACHE_ROOT = os.getenv("CACHE_ROOT") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")  # Independent of the working directory
+CACHE_DIR = os.path.join(CACHE_ROOT, "html")
+CACHE_MAX_BYTES = 512 * 1024 * 1024   # Least recently used pages are evicted above this size
+CACHE_TTL = 24 * 60 * 60              # Seconds an entry is served without revalidation
+# Options that change what get_html returns for the same URL
+RENDER_OPTION_KEYS = [
+    'handle_pagination', 'pagination_method', 'pagination_selector', 'pagination_xpath',
+    'pagination_text', 'max_pages', 'handle_lazy_loading', 'single_fetch',
+    'target_selector', 'fetch_strategy', 'button', 'loader',
+    'pagination_max_pages', 'pagination_item_selector', 'page_param',
+    'lazy_item_selector', 'lazy_remove_harvested', 'replay_load_more', 'replay_max_pages',
+]
+
+
+def normalize_url(url):
+    """Lower-case scheme and host, drop default ports and fragments, sort the query."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and not (scheme == "http" and parts.port == 80 or scheme == "https" and parts.port == 443):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+def make_cache_key(url, options=None):
+    """Hash of the normalized URL plus the options that affect rendering."""
+    options = options or {}
+    render = {key: options.get(key) for key in RENDER_OPTION_KEYS if options.get(key) is not None}
+    payload = json.dumps({"url": normalize_url(url), "render": render}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class HtmlCache:
+    """
+    Content cache of HTML pages on local disk.
+
+    Each entry is <key>.html plus <key>.json metadata (url, fetch time,
+    ETag/Last-Modified, source). File mtimes track recency for LRU eviction.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, ttl=CACHE_TTL):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()  # Separate from _lock, which put() holds while evicting
+        self._size = None
+        self.stats = {"hits": 0, "misses": 0, "stale": 0, "revalidated": 0, "evictions": 0}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, key):
+        return os.path.join(self.cache_dir, f"{key}.html"), os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        """Return the entry dict (meta plus 'html' and 'fresh'), or None if absent."""
+        html_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            with open(html_path, "r", encoding="utf-8") as f:
+                entry["html"] = f.read()
+        except (OSError, ValueError):
+            self._count("misses")
+            return None
+        ttl = entry.get("ttl", self.ttl)
+        entry["fresh"] = time.time() - entry.get("fetched_at", 0) < ttl
+        self._count("hits" if entry["fresh"] else "stale")
+        now = time.time()
+        try:
+            os.utime(html_path, (now, now))
+        except OSError:
+            pass
+        return entry
+
+    def get_fresh(self, key):
+        """Return cached HTML if the entry is within its TTL, else None."""
+        entry = self.get(key)
+        return entry["html"] if entry and entry["fresh"] else None
+
+    def put(self, key, url, html, etag=None, last_modified=None, source="browser", ttl=None):
+        """Store a page and evict least recently used entries if over budget."""
+        if not html:
+            return
+        html_path, meta_path = self._paths(key)
+        meta = {
+            "url": url,
+            "fetched_at": time.time(),
+            "etag": etag,
+            "last_modified": last_modified,
+            "source": source,
+        }
+        if ttl is not None:
+            meta["ttl"] = ttl
+        with self._lock:
+            size = self._current_size()
+            old_size = os.path.getsize(html_path) if os.path.exists(html_path) else 0
+            for path, content in ((html_path, html), (meta_path, json.dumps(meta))):
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(content)
+                os.replace(tmp_path, path)
+            self._size = size + os.path.getsize(html_path) - old_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def refresh(self, key):
+        """Restart an entry's TTL after a successful conditional request (304)."""
+        _, meta_path = self._paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            meta["fetched_at"] = time.time()
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            self._count("revalidated")
+        except (OSError, ValueError) as e:
+            logging.warning(f"Could not refresh cache entry {key}: {e}")
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def _current_size(self):
+        if self._size is None:
+            self._size = sum(os.path.getsize(os.path.join(self.cache_dir, name))
+                             for name in os.listdir(self.cache_dir) if name.endswith(".html"))
+        return self._size
+
+    def _evict(self):
+        # Oldest access time first; html mtime is bumped on every read
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".html"):
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name[:-5]))
+        entries.sort()
+        target = self.max_bytes * 0.9
+        for _, size, key in entries:
+            if self._size <= target:
+                break
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._size -= size
+            self._count("evictions")
+
+    def clear(self):
+        with self._lock:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith((".html", ".json")):
+                    os.remove(os.path.join(self.cache_dir, name))
+            self._size = 0
+
+    def status(self):
+        with self._stats_lock:
+            stats = dict(self.stats)
+        return {"entries": sum(1 for name in os.listdir(self.cache_dir) if name.endswith(".html")),
+                "bytes": self._current_size(), "max_bytes": self.max_bytes, **stats}
+
+
+html_cache = HtmlCache()
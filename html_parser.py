@@ -0,0 +1,400 @@
+import logging
+import os
+import re
+from functools import lru_cache
+from bs4 import BeautifulSoup, NavigableString, CData, Tag
+from bs4.element import Script, Stylesheet, TemplateString
+import lxml.etree
+import lxml.html
+import soupsieve
+from cssselect import HTMLTranslator, parse as parse_css
+from lxml.cssselect import CSSSelector
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # Optional C-backed parser
+    LexborHTMLParser = None
+
+# One parsing interface over BeautifulSoup, lxml and selectolax (Lexbor)
+HTML_PARSER_BACKEND = os.getenv("HTML_PARSER_BACKEND", "lxml")  # "bs4", "lxml" or "selectolax"
+BACKENDS = ("bs4", "lxml", "selectolax")
+TEXT_SKIP_TAGS = ("script", "style", "template")  # Never part of visible text (as in bs4 get_text)
+CLEAN_TEXT_SKIP_TAGS = TEXT_SKIP_TAGS + ("meta", "link", "noscript", "think")  # Also dropped before AI extraction
+XML_DECLARATION_RE = re.compile(r"^\s*<\?xml[^>]*\?>", re.IGNORECASE)
+
+# Events yielded by Node.walk()
+START, END, TEXT = "start", "end", "text"
+
+
+def available_backends():
+    return [name for name in BACKENDS if name != "selectolax" or LexborHTMLParser is not None]
+
+
+def resolve_backend(backend=None):
+    """Return a usable backend name, falling back to lxml when selectolax is missing."""
+    backend = (backend or HTML_PARSER_BACKEND).lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown HTML parser backend '{backend}', expected one of {BACKENDS}")
+    if backend == "selectolax" and LexborHTMLParser is None:
+        logging.warning("selectolax is not installed, using the lxml parser backend")
+        return "lxml"
+    return backend
+
+
+@lru_cache(maxsize=256)
+def compile_css(selector):
+    """Compiled lxml selector, cached across pages."""
+    return CSSSelector(selector, translator="html")
+
+
+class _MatchTranslator(HTMLTranslator):
+    """
+    Translates a selector into an XPath test on the context element itself.
+
+    Combinators are read right to left: the rightmost compound is tested
+    with self:: and the ones before it become ancestor/sibling conditions,
+    so matching looks only at the element's surroundings.
+    """
+
+    def xpath_descendant_combinator(self, left, right):
+        return right.add_condition(f"ancestor::{left}")
+
+    def xpath_child_combinator(self, left, right):
+        return right.add_condition(f"parent::{left}")
+
+    def xpath_direct_adjacent_combinator(self, left, right):
+        return right.add_condition(f"preceding-sibling::*[1]/self::{left}")
+
+    def xpath_indirect_adjacent_combinator(self, left, right):
+        return right.add_condition(f"preceding-sibling::{left}")
+
+
+@lru_cache(maxsize=256)
+def compile_css_match(selector):
+    """Compiled lxml XPath that is non-empty when the context element matches the selector."""
+    translator = _MatchTranslator()
+    tests = [f"self::{translator.xpath(parsed.parsed_tree)}" for parsed in parse_css(selector)]
+    return lxml.etree.XPath(" | ".join(tests))
+
+
+@lru_cache(maxsize=256)
+def compile_soupsieve(selector):
+    return soupsieve.compile(selector)
+
+
+class Node:
+    """
+    An element (or the document) from any backend.
+
+    Exposes the small surface the extractors use: CSS selection and
+    matching, visible text, attributes, the parent element and a flat
+    start/text/end walk.
+    """
+
+    backend = None
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def __eq__(self, other):
+        return isinstance(other, Node) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __repr__(self):
+        return f"<{self.backend} {self.name}>"
+
+    @property
+    def key(self):
+        return id(self.raw)
+
+    def select_one(self, selector):
+        found = self.select(selector)
+        return found[0] if found else None
+
+    def text(self, separator=" ", strip=True, skip=TEXT_SKIP_TAGS):
+        """Visible text; with strip, pieces are stripped and empty ones dropped (bs4 get_text semantics)."""
+        pieces = []
+        for event, value in self.walk(skip):
+            if event == TEXT:
+                if strip:
+                    value = value.strip()
+                    if not value:
+                        continue
+                pieces.append(value)
+        return separator.join(pieces)
+
+
+# Strings that count as text; the script/style/template kinds only occur inside those tags
+BS4_TEXT_TYPES = (NavigableString, CData, Script, Stylesheet, TemplateString)
+
+
+class Bs4Node(Node):
+    backend = "bs4"
+
+    @property
+    def name(self):
+        return self.raw.name
+
+    @property
+    def attrs(self):
+        return {k: " ".join(v) if isinstance(v, list) else v for k, v in self.raw.attrs.items()}
+
+    def get(self, attr, default=None):
+        value = self.raw.get(attr, default)
+        return " ".join(value) if isinstance(value, list) else value
+
+    @property
+    def parent(self):
+        parent = self.raw.parent
+        return Bs4Node(parent) if parent is not None else None
+
+    @property
+    def html(self):
+        return str(self.raw)
+
+    def select(self, selector):
+        return [Bs4Node(el) for el in self.raw.select(selector)]
+
+    def matches(self, selector):
+        return compile_soupsieve(selector).match(self.raw)
+
+    def walk(self, skip=TEXT_SKIP_TAGS):
+        stack = [(self.raw, False)]
+        while stack:
+            node, closing = stack.pop()
+            if closing:
+                yield END, node.name
+            elif isinstance(node, Tag):
+                if node.name in skip:
+                    continue
+                yield START, node.name
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(node.contents))
+            elif type(node) in BS4_TEXT_TYPES:
+                yield TEXT, str(node)
+
+
+class LxmlNode(Node):
+    backend = "lxml"
+
+    @property
+    def name(self):
+        return self.raw.tag
+
+    @property
+    def attrs(self):
+        return dict(self.raw.attrib)
+
+    def get(self, attr, default=None):
+        return self.raw.get(attr, default)
+
+    @property
+    def parent(self):
+        parent = self.raw.getparent()
+        return LxmlNode(parent) if parent is not None else None
+
+    @property
+    def html(self):
+        return lxml.html.tostring(self.raw, encoding="unicode", with_tail=False)
+
+    def select(self, selector):
+        return [LxmlNode(el) for el in compile_css(selector)(self.raw)]
+
+    def matches(self, selector):
+        return bool(compile_css_match(selector)(self.raw))
+
+    def walk(self, skip=TEXT_SKIP_TAGS):
+        root = self.raw
+        stack = [(START, root)]
+        while stack:
+            kind, item = stack.pop()
+            if kind != START:
+                yield kind, item.tag if kind == END else item
+                continue
+            # The tail follows the element's end tag, so it is pushed first
+            if item is not root and item.tail:
+                stack.append((TEXT, item.tail))
+            # Comments and processing instructions have a non-string tag
+            if not isinstance(item.tag, str) or item.tag in skip:
+                continue
+            yield START, item.tag
+            if item.text:
+                yield TEXT, item.text
+            stack.append((END, item))
+            stack.extend((START, child) for child in reversed(item))
+
+
+class SelectolaxNode(Node):
+    backend = "selectolax"
+
+    @property
+    def key(self):
+        return self.raw.mem_id
+
+    @property
+    def name(self):
+        return self.raw.tag
+
+    @property
+    def attrs(self):
+        return {k: v if v is not None else "" for k, v in self.raw.attributes.items()}
+
+    def get(self, attr, default=None):
+        value = self.raw.attributes.get(attr, default)
+        return "" if value is None and attr in self.raw.attributes else value
+
+    @property
+    def parent(self):
+        parent = self.raw.parent
+        if parent is None or parent.is_document_node:
+            return None
+        return SelectolaxNode(parent)
+
+    @property
+    def html(self):
+        return self.raw.html
+
+    def select(self, selector):
+        return [SelectolaxNode(el) for el in self.raw.css(selector)]
+
+    def matches(self, selector):
+        # css_matches is also true when only a descendant matches, so it
+        # settles the question alone for elements without matching children
+        if not self.raw.css_matches(selector):
+            return False
+        child = self.raw.child
+        while child is not None:
+            if child.is_element_node and child.css_matches(selector):
+                break
+            child = child.next
+        else:
+            return True
+        parent = self.raw.parent
+        return parent is not None and any(el.mem_id == self.raw.mem_id for el in parent.css(selector))
+
+    def walk(self, skip=TEXT_SKIP_TAGS):
+        stack = [(self.raw, False)]
+        while stack:
+            node, closing = stack.pop()
+            if closing:
+                yield END, node.tag
+            elif node.is_text_node:
+                yield TEXT, node.text_content
+            elif node.is_element_node or node.is_document_node:
+                if node.tag in skip:
+                    continue
+                yield START, node.tag
+                stack.append((node, True))
+                children = []
+                child = node.child
+                while child is not None:
+                    children.append(child)
+                    child = child.next
+                stack.extend((child, False) for child in reversed(children))
+
+
+def _parse_lxml(html):
+    try:
+        return lxml.html.document_fromstring(html)
+    except ValueError:
+        # str input with an XML encoding declaration
+        return lxml.html.document_fromstring(XML_DECLARATION_RE.sub("", html))
+    except lxml.etree.ParserError:
+        return lxml.html.document_fromstring("<html></html>")
+
+
+def parse_html(html, backend=None):
+    """Parse an HTML string and return the document root as a Node."""
+    backend = resolve_backend(backend)
+    html = html or ""
+    if backend == "bs4":
+        return Bs4Node(BeautifulSoup(html, "html.parser"))
+    if backend == "selectolax":
+        return SelectolaxNode(LexborHTMLParser(html).root or LexborHTMLParser("<html></html>").root)
+    return LxmlNode(_parse_lxml(html))
+
+
+class ParsedPage:
+    """
+    A fetched page parsed once and shared by extraction, link discovery and
+    pagination detection.
+
+    The tree is built on first use; cleaned text, the link list and CSS
+    selector results are memoized so later steps reuse them. When the page
+    was parsed in an extraction worker, pass its summarize() result as
+    summary: those values are then served without parsing again here.
+    """
+
+    def __init__(self, html, url=None, backend=None, summary=None):
+        self.html = html or ""
+        self.url = url
+        self.backend = resolve_backend(backend)
+        self._document = None
+        self._texts = {}
+        self._links = None
+        self._selected = {}
+        self._hrefs = {}
+        if summary:
+            self._links = summary.get("links")
+            self._hrefs.update(summary.get("hrefs", {}))
+            if "clean_text" in summary:
+                self._texts[CLEAN_TEXT_SKIP_TAGS] = summary["clean_text"]
+
+    @property
+    def document(self):
+        if self._document is None:
+            self._document = parse_html(self.html, self.backend)
+        return self._document
+
+    def select(self, selector):
+        """Elements matching a CSS selector (memoized per selector)."""
+        if selector not in self._selected:
+            self._selected[selector] = self.document.select(selector)
+        return self._selected[selector]
+
+    def text(self, skip=TEXT_SKIP_TAGS):
+        """Visible text joined with spaces (memoized per skip list)."""
+        skip = tuple(skip)
+        if skip not in self._texts:
+            self._texts[skip] = self.document.text(separator=" ", strip=True, skip=skip)
+        return self._texts[skip]
+
+    def clean_text(self):
+        """Text without scripts, styles, metadata and <think> blocks, as sent to the AI."""
+        return self.text(CLEAN_TEXT_SKIP_TAGS)
+
+    def links(self):
+        """href values of all <a> elements in document order."""
+        if self._links is None:
+            self._links = [a.get("href") for a in self.select("a[href]")]
+        return self._links
+
+    def hrefs(self, selector):
+        """href of each element matching selector, or of its first a[href] descendant (None without one)."""
+        if selector not in self._hrefs:
+            hrefs = []
+            for element in self.select(selector):
+                anchor = element if element.get("href") else element.select_one("a[href]")
+                hrefs.append(anchor.get("href") if anchor else None)
+            self._hrefs[selector] = hrefs
+        return self._hrefs[selector]
+
+    def summarize(self, links=True, selectors=(), clean_text=False):
+        """
+        Picklable link list, hrefs per selector and (optionally) cleaned text,
+        for a ParsedPage(summary=...) in another process. Selectors that fail
+        to compile are left out.
+        """
+        summary = {"hrefs": {}}
+        if links:
+            summary["links"] = self.links()
+        for selector in selectors:
+            try:
+                summary["hrefs"][selector] = self.hrefs(selector)
+            except Exception as e:
+                logging.debug(f"Selector '{selector}' left out of the page summary: {e}")
+        if clean_text:
+            summary["clean_text"] = self.clean_text()
+        return summary
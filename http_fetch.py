@@ -0,0 +1,169 @@
+import atexit
+import logging
+import re
+from urllib.parse import urlparse
+import httpx
+import lxml.html
+from assets import selected_user_agent
+from browser_pool import run_on_pool_sync
+
+# Plain-HTTP fetch path used before falling back to the browser pool
+HTTP_TIMEOUT = 15.0              # Seconds per request (connect/read/write/pool)
+HTTP_MAX_CONNECTIONS = 20        # Total open connections in the pooled client
+HTTP_MAX_KEEPALIVE = 10          # Idle keep-alive connections kept for reuse
+MIN_BODY_CHARS = 500             # Smaller responses are treated as empty shells
+MIN_TEXT_CHARS = 200             # Visible text below this means content is injected by JS
+HTTP_HEADERS = {
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+    "User-Agent": selected_user_agent,
+    "Upgrade-Insecure-Requests": "1",
+}
+
+# Empty mount points left by client-side frameworks (React, Vue, Next, Nuxt, Gatsby, Angular)
+FRAMEWORK_ROOT_RE = re.compile(
+    r'<div[^>]*\bid=["\']?(root|app|__next|__nuxt|___gatsby)\b["\']?[^>]*>\s*</div>'
+    r'|<app-root[^>]*>\s*</app-root>',
+    re.IGNORECASE,
+)
+NOSCRIPT_JS_RE = re.compile(r"<noscript[^>]*>[^<]*(enable|requires?)\s+javascript", re.IGNORECASE)
+
+# Fetch strategy remembered per domain: "http" or "browser"
+_domain_strategy = {}
+_client = None
+
+
+def get_http_client():
+    """Return the shared AsyncClient; must be called on the browser-pool loop."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            headers=HTTP_HEADERS,
+            follow_redirects=True,
+            timeout=httpx.Timeout(HTTP_TIMEOUT),
+            limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_KEEPALIVE),
+        )
+    return _client
+
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def shutdown_http_client():
+    """Close the pooled client on the pool loop; registered to run at exit."""
+    if _client is None:
+        return
+    try:
+        run_on_pool_sync(close_http_client(), timeout=10)
+    except Exception as e:
+        logging.error(f"Error closing HTTP client: {e}")
+
+
+def get_domain(url):
+    return urlparse(url).netloc.lower()
+
+
+def get_domain_strategy(url):
+    """Return the remembered strategy for the URL's domain, or None if unknown."""
+    return _domain_strategy.get(get_domain(url))
+
+
+def remember_domain_strategy(url, strategy):
+    domain = get_domain(url)
+    if _domain_strategy.get(domain) != strategy:
+        logging.info(f"Fetch strategy for {domain}: {strategy}")
+    _domain_strategy[domain] = strategy
+
+
+def domain_strategies():
+    """Return a copy of the per-domain strategy table (for status endpoints)."""
+    return dict(_domain_strategy)
+
+
+def needs_rendering(html, selectors=None):
+    """
+    Decide whether an HTTP response needs JavaScript rendering.
+
+    Returns a short reason string when it does, or None when the static HTML
+    can be used as-is.
+    """
+    if not html or len(html) < MIN_BODY_CHARS:
+        return "empty body"
+    if FRAMEWORK_ROOT_RE.search(html):
+        return "framework root element is empty"
+    if NOSCRIPT_JS_RE.search(html):
+        return "page asks for JavaScript"
+    try:
+        tree = lxml.html.fromstring(html)
+    except Exception:
+        return "unparseable HTML"
+    for selector in selectors or []:
+        try:
+            if not tree.cssselect(selector):
+                return f"selector '{selector}' missing"
+        except Exception:
+            # Not valid CSS (XPath, button text, ...); cannot be checked statically
+            continue
+    for node in tree.xpath("//script|//style|//noscript|//template"):
+        node.drop_tree()
+    if len(" ".join(tree.text_content().split())) < MIN_TEXT_CHARS:
+        return "too little visible text"
+    return None
+
+
+async def fetch_http(url, headers=None):
+    """GET a URL with the pooled client; returns the response or None on error."""
+    try:
+        return await get_http_client().get(url, headers=headers)
+    except httpx.HTTPError as e:
+        logging.warning(f"HTTP fetch failed for {url}: {e}")
+        return None
+
+
+async def fetch_without_browser(url, selectors=None, force=False, cached=None):
+    """
+    Try to get a page's HTML without the browser.
+
+    Returns {"html", "etag", "last_modified", "not_modified"} when the static
+    response is usable, or None when the caller should escalate to Playwright.
+    With force=True (fetch_strategy "http") the response is returned even if
+    it looks JavaScript-rendered; only a failed request still escalates.
+    The outcome is remembered for the domain so later pages skip the probe.
+
+    cached is a stale html_cache entry; its ETag/Last-Modified are sent as a
+    conditional request and a 304 returns the cached HTML unchanged.
+    """
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+    response = await fetch_http(url, headers)
+    status = response.status_code if response is not None else None
+    if status == 304 and cached:
+        return {"html": cached["html"], "etag": cached.get("etag"),
+                "last_modified": cached.get("last_modified"), "not_modified": True}
+    if status is None or status >= 400:
+        # Bot walls (401/403/429) are a property of the site; anything else may be transient
+        logging.info(f"Escalating {url} to browser: {f'HTTP status {status}' if status else 'request failed'}")
+        if not force and status in (401, 403, 429):
+            remember_domain_strategy(url, "browser")
+        return None
+    content_type = response.headers.get("content-type", "")
+    html = response.text if "html" in content_type or "xml" in content_type else ""
+    reason = None if force else needs_rendering(html, selectors)
+    if reason:
+        logging.info(f"Escalating {url} to browser: {reason}")
+        remember_domain_strategy(url, "browser")
+        return None
+    if not force:
+        remember_domain_strategy(url, "http")
+    return {"html": html, "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified"), "not_modified": False}
+
+atexit.register(shutdown_http_client)
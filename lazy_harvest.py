@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import time
+
+# Incremental harvesting of infinite-scroll / lazy-loaded listings
+HARVEST_QUIET_MS = 700        # No DOM mutations or pending requests for this long ends a round
+HARVEST_ROUND_MAX_MS = 8000   # Upper bound on waiting for one scroll to settle
+HARVEST_IDLE_ROUNDS = 2       # Consecutive scrolls without activity that mean "end of feed"
+HARVEST_STALL_ROUNDS = 5      # Scrolls with activity but no new items (carousels, tickers) that also end it
+HARVEST_MAX_SECONDS = 300     # Wall-clock cap on a whole harvest
+HARVEST_MAX_ROUNDS = 1000     # Safety cap on scroll rounds
+HARVEST_MAX_ITEMS = 20000     # Safety cap on harvested items
+TRACKED_REQUEST_TYPES = ("xhr", "fetch", "script", "document")
+
+# Counts structural DOM mutations so the Python side can tell whether a
+# scroll caused anything to happen. Installed once per page.
+MUTATION_COUNTER_SCRIPT = """
+() => {
+    if (window.__harvestMutations !== undefined) return;
+    window.__harvestMutations = 0;
+    new MutationObserver(records => {
+        for (const r of records) {
+            if (r.addedNodes.length) window.__harvestMutations += r.addedNodes.length;
+        }
+    }).observe(document, {childList: true, subtree: true});
+}
+"""
+
+# Returns the outerHTML of items not harvested yet. Harvested items are either
+# removed (keeping the DOM small) or marked so they are skipped next round.
+HARVEST_SCRIPT = """
+({selector, remove}) => {
+    const items = [];
+    for (const el of document.querySelectorAll(selector)) {
+        if (el.hasAttribute('data-harvested')) continue;
+        items.push(el.outerHTML);
+        if (remove) {
+            el.remove();
+        } else {
+            el.setAttribute('data-harvested', '1');
+        }
+    }
+    return items;
+}
+"""
+
+SCROLL_SCRIPT = """
+() => {
+    window.scrollTo(0, document.body.scrollHeight);
+    window.dispatchEvent(new Event('scroll'));
+}
+"""
+
+
+class _NetworkTracker:
+    """Counts in-flight script/XHR/fetch requests on a page."""
+
+    def __init__(self, page):
+        self.page = page
+        self.pending = 0
+        self.started = 0
+        self.last_activity = time.time()
+
+    def _on_request(self, request):
+        if request.resource_type in TRACKED_REQUEST_TYPES:
+            self.pending += 1
+            self.started += 1
+            self.last_activity = time.time()
+
+    def _on_done(self, request):
+        if request.resource_type in TRACKED_REQUEST_TYPES:
+            self.pending = max(0, self.pending - 1)
+            self.last_activity = time.time()
+
+    def attach(self):
+        self.page.on("request", self._on_request)
+        self.page.on("requestfinished", self._on_done)
+        self.page.on("requestfailed", self._on_done)
+
+    def detach(self):
+        for event, handler in (("request", self._on_request), ("requestfinished", self._on_done),
+                               ("requestfailed", self._on_done)):
+            try:
+                self.page.remove_listener(event, handler)
+            except Exception:
+                pass
+
+
+async def _mutation_count(page):
+    return await page.evaluate("window.__harvestMutations || 0")
+
+
+async def _wait_for_settle(page, tracker, quiet_ms, max_ms):
+    """Wait until quiet_ms pass with no new mutations and no pending requests."""
+    deadline = time.time() + max_ms / 1000
+    last_mutations = await _mutation_count(page)
+    quiet_since = time.time()
+    while time.time() < deadline:
+        await asyncio.sleep(0.1)
+        mutations = await _mutation_count(page)
+        if mutations != last_mutations or tracker.pending:
+            last_mutations = mutations
+            quiet_since = time.time()
+        elif (time.time() - max(quiet_since, tracker.last_activity)) * 1000 >= quiet_ms:
+            return True
+    return False
+
+
+async def harvest_lazy_items(page, item_selector, remove_harvested=True, quiet_ms=HARVEST_QUIET_MS,
+                             round_max_ms=HARVEST_ROUND_MAX_MS, idle_rounds=HARVEST_IDLE_ROUNDS,
+                             max_items=HARVEST_MAX_ITEMS):
+    """
+    Scroll a lazy-loading page and collect items as they appear.
+
+    After each scroll the items matching item_selector that have not been
+    seen yet are captured as outerHTML and, with remove_harvested, deleted
+    from the DOM so Chromium memory stays flat on long feeds. The feed is
+    considered finished after idle_rounds scrolls that produce no new items,
+    no DOM mutations and no script/XHR/fetch requests (or HARVEST_STALL_ROUNDS
+    scrolls that produce activity but no new items).
+
+    Returns the list of harvested item HTML strings in page order.
+    """
+    items = []
+    tracker = _NetworkTracker(page)
+    tracker.attach()
+    idle = 0
+    stalled = 0
+    round_number = 0
+    start = time.time()
+    try:
+        await page.evaluate(MUTATION_COUNTER_SCRIPT)
+        for round_number in range(HARVEST_MAX_ROUNDS):
+            new_items = await page.evaluate(HARVEST_SCRIPT, {"selector": item_selector, "remove": remove_harvested})
+            items.extend(new_items)
+            if len(items) >= max_items:
+                logging.warning(f"Harvest stopped at the {max_items} item cap")
+                break
+
+            mutations_before = await _mutation_count(page)
+            requests_before = tracker.started
+            await page.evaluate(SCROLL_SCRIPT)
+            await _wait_for_settle(page, tracker, quiet_ms, round_max_ms)
+            active = tracker.started > requests_before or await _mutation_count(page) > mutations_before
+
+            if new_items:
+                idle = stalled = 0
+            elif active:
+                idle = 0
+                stalled += 1
+            else:
+                idle += 1
+                stalled += 1
+            if idle >= idle_rounds or stalled >= HARVEST_STALL_ROUNDS:
+                break
+            if time.time() - start > HARVEST_MAX_SECONDS:
+                logging.warning(f"Harvest stopped after {HARVEST_MAX_SECONDS}s")
+                break
+        # Items that arrived during the final settle
+        items.extend(await page.evaluate(HARVEST_SCRIPT, {"selector": item_selector, "remove": remove_harvested}))
+    finally:
+        tracker.detach()
+    logging.info(f"Harvested {len(items)} items in {round_number + 1} scrolls ({time.time() - start:.2f}s)")
+    return items[:max_items]
+
+
+def merge_harvested_items(html_content, items):
+    """Insert harvested items into the page snapshot inside a data-harvested container."""
+    if not items:
+        return html_content
+    block = f'<div data-harvested="true">{"".join(items)}</div>'
+    index = html_content.lower().rfind("</body>")
+    if index == -1:
+        return html_content + block
+    return html_content[:index] + block + html_content[index:]
@@ -0,0 +1,256 @@
+import asyncio
+import hashlib
+import json
+import logging
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from browser_pool import run_on_pool
+from http_fetch import get_http_client
+from html_parser import parse_html
+
+# Replaying the request behind a "Load More" button instead of clicking it
+PAGE_PARAM_NAMES = ("page", "p", "pg", "pageno", "page_no", "pagenumber", "page_number", "pagenum", "currentpage")
+OFFSET_PARAM_NAMES = ("offset", "start", "skip", "from", "startindex", "start_index", "first")
+SIZE_PARAM_NAMES = ("limit", "size", "count", "per_page", "perpage", "pagesize", "page_size", "rows", "take", "num")
+REPLAY_MAX_PAGES = 200        # Hard cap on replayed requests
+REPLAY_CONCURRENCY = 4        # Replayed requests in flight at once
+RECORD_TIMEOUT_MS = 10000     # How long to wait for the click to fire a request
+DROP_HEADERS = {"content-length", "host", "connection", "accept-encoding", "cookie"}
+
+
+class LoadMoreRequest:
+    """The XHR/fetch request fired by a Load More click and the parameter that pages it."""
+
+    def __init__(self, url, method, headers, body, location, name, value, step):
+        self.url = url
+        self.method = method
+        self.headers = headers
+        self.body = body
+        self.location = location    # "query", "json" or "form"
+        self.name = name
+        self.value = value          # Parameter value sent by the recorded click
+        self.step = step            # Increment per page (1 for page numbers, page size for offsets)
+
+    def build(self, n):
+        """Return (url, body) for the n-th request after the recorded one."""
+        value = self.value + self.step * n
+        if self.location == "query":
+            parts = urlsplit(self.url)
+            query = dict(parse_qsl(parts.query, keep_blank_values=True))
+            query[self.name] = str(value)
+            return urlunsplit(parts._replace(query=urlencode(query))), self.body
+        if self.location == "json":
+            data = json.loads(self.body)
+            data[self.name] = value
+            return self.url, json.dumps(data)
+        form = dict(parse_qsl(self.body, keep_blank_values=True))
+        form[self.name] = str(value)
+        return self.url, urlencode(form)
+
+    def __repr__(self):
+        return f"LoadMoreRequest({self.method} {self.url}, {self.location}:{self.name}={self.value}+{self.step}n)"
+
+
+def _find_param(params):
+    """Pick the paging parameter from a flat dict; returns (name, value, step) or None."""
+    lowered = {str(k).lower(): k for k in params}
+    for names, is_offset in ((PAGE_PARAM_NAMES, False), (OFFSET_PARAM_NAMES, True)):
+        for candidate in names:
+            key = lowered.get(candidate)
+            if key is None:
+                continue
+            try:
+                value = int(params[key])
+            except (TypeError, ValueError):
+                continue
+            step = 1
+            if is_offset:
+                step = None
+                for size_name in SIZE_PARAM_NAMES:
+                    if size_name in lowered:
+                        try:
+                            step = int(params[lowered[size_name]])
+                            break
+                        except (TypeError, ValueError):
+                            pass
+            return key, value, step
+    return None
+
+
+def find_paging_parameter(url, post_data, content_type=""):
+    """Locate a page/offset parameter in the query string, JSON body or form body."""
+    found = _find_param(dict(parse_qsl(urlsplit(url).query)))
+    if found:
+        return ("query",) + found
+    if post_data:
+        if "json" in content_type or post_data.lstrip().startswith("{"):
+            try:
+                data = json.loads(post_data)
+                if isinstance(data, dict):
+                    found = _find_param(data)
+                    if found:
+                        return ("json",) + found
+            except ValueError:
+                pass
+        found = _find_param(dict(parse_qsl(post_data)))
+        if found:
+            return ("form",) + found
+    return None
+
+
+def _largest_list(data, depth=0):
+    """Length of the largest list in a JSON document (the result set), searched 3 levels deep."""
+    if isinstance(data, list):
+        return len(data)
+    if isinstance(data, dict) and depth < 3:
+        return max((_largest_list(v, depth + 1) for v in data.values()), default=0)
+    return 0
+
+
+async def record_load_more_request(page, click, timeout_ms=RECORD_TIMEOUT_MS):
+    """
+    Perform the first click and capture the paged request it fires.
+
+    `click` is a coroutine function that clicks the button. Returns a
+    LoadMoreRequest, or None if no XHR/fetch with a recognisable page or
+    offset parameter was seen (the click itself still happens).
+    """
+    def is_paged(response):
+        request = response.request
+        return (request.resource_type in ("xhr", "fetch")
+                and find_paging_parameter(request.url, request.post_data,
+                                          request.headers.get("content-type", "")) is not None)
+
+    try:
+        async with page.expect_response(is_paged, timeout=timeout_ms) as response_info:
+            await click()
+        response = await response_info.value
+    except Exception as e:
+        logging.info(f"No replayable Load More request recorded: {e}")
+        return None
+
+    request = response.request
+    headers = {k: v for k, v in request.headers.items() if k.lower() not in DROP_HEADERS}
+    location, name, value, step = find_paging_parameter(request.url, request.post_data,
+                                                        request.headers.get("content-type", ""))
+    if step is None:
+        # Offset without an explicit page size: use the number of results returned
+        try:
+            step = _largest_list(json.loads(await response.text()))
+        except Exception:
+            step = 0
+        if not step:
+            logging.info("Load More request uses an offset but its page size is unknown")
+            return None
+    cookies = await page.context.cookies(request.url)
+    if cookies:
+        headers["Cookie"] = "; ".join(f"{c['name']}={c['value']}" for c in cookies)
+    recorded = LoadMoreRequest(request.url, request.method, headers, request.post_data, location, name, value, step)
+    logging.info(f"Recorded Load More request: {recorded}")
+    return recorded
+
+
+async def _replay(recorded, max_pages, concurrency):
+    client = get_http_client()
+    responses = []
+    seen = set()
+
+    async def send(n):
+        url, body = recorded.build(n)
+        return await client.request(recorded.method, url, headers=recorded.headers, content=body)
+
+    n = 1
+    while n <= max_pages:
+        window = list(range(n, min(n + concurrency, max_pages + 1)))
+        results = await asyncio.gather(*(send(i) for i in window), return_exceptions=True)
+        for i, response in zip(window, results):
+            if isinstance(response, Exception) or response.status_code >= 400:
+                logging.info(f"Load More replay stopped at request {i}: {response if isinstance(response, Exception) else response.status_code}")
+                return responses
+            text = response.text
+            digest = hashlib.sha1(text.encode("utf-8", "ignore")).hexdigest()
+            content_type = response.headers.get("content-type", "")
+            empty = not text.strip()
+            if not empty and "json" in content_type:
+                try:
+                    data = json.loads(text)
+                    empty = not data or _largest_list(data) == 0 and not _json_html(data)
+                except ValueError:
+                    pass
+            if empty or digest in seen:
+                logging.info(f"Load More replay reached the end after {len(responses)} requests")
+                return responses
+            seen.add(digest)
+            responses.append((content_type, text))
+        n += len(window)
+    return responses
+
+
+async def replay_load_more(recorded, max_pages=REPLAY_MAX_PAGES, concurrency=REPLAY_CONCURRENCY):
+    """
+    Replay a recorded Load More request with an incrementing page/offset.
+
+    Runs on the pooled HTTP client (on the browser-pool loop, so it can be
+    awaited from any event loop). Stops at the first error, empty result or
+    repeated response. Returns a list of (content_type, body) tuples.
+    """
+    return await run_on_pool(_replay(recorded, max_pages, max(1, concurrency)))
+
+
+def _json_html(data, depth=0):
+    """Return HTML fragments embedded as string values in a JSON response."""
+    if isinstance(data, str):
+        return [data] if "<" in data and ">" in data else []
+    if depth > 3:
+        return []
+    values = data.values() if isinstance(data, dict) else data if isinstance(data, list) else []
+    fragments = []
+    for value in values:
+        fragments.extend(_json_html(value, depth + 1))
+    return fragments
+
+
+def _response_markup(content_type, text):
+    """Listing markup in a replayed response; None for JSON that the page renders client-side."""
+    if "json" not in content_type:
+        return text
+    try:
+        embedded = _json_html(json.loads(text))
+    except ValueError:
+        embedded = []
+    return "".join(embedded) or None
+
+
+def replayed_to_html(responses, item_selector=None):
+    """
+    Turn replayed responses into HTML fragments.
+
+    Markup is kept as-is and HTML embedded in JSON is unwrapped; plain JSON
+    data has no items and is dropped. With item_selector, only responses
+    containing a matching element are kept.
+    """
+    fragments = []
+    # Numbered by replayed request; the recorded click's own results are already in the page
+    for number, (content_type, text) in enumerate(responses, 1):
+        body = _response_markup(content_type, text)
+        if not body or item_selector and not parse_html(body).select(item_selector):
+            continue
+        fragments.append(f'<div data-load-more-page="{number}">{body}</div>')
+    return fragments
+
+
+async def replay_load_more_items(recorded, max_pages=REPLAY_MAX_PAGES, item_selector=None):
+    """
+    Replay a recorded request and return the fragments holding listing items.
+
+    An empty list means the replay failed or found nothing usable, and the
+    caller should go on clicking the button instead.
+    """
+    try:
+        responses = await replay_load_more(recorded, max_pages)
+    except Exception as e:
+        logging.warning(f"Load More replay failed: {e}")
+        return []
+    fragments = replayed_to_html(responses, item_selector)
+    if not fragments:
+        logging.info(f"Load More replay returned no usable items in {len(responses)} responses")
+    return fragments
@@ -1,38 +1,101 @@
+import re
+from functools import lru_cache
+import numpy as np
+import pandas as pd
 import phonenumbers
 from phonenumbers import PhoneNumberType
 
-def detect_number_type(phone_number_str):
-    try:
-        # Parse the phone number, here "US" is the region code for United States
-        phone_number = phonenumbers.parse(phone_number_str, "US")
-        
-        # Check if the number is valid
-        if not phonenumbers.is_valid_number(phone_number):
-            return False # "Invalid number"
-
-        # Determine the type of the phone number
-        number_type = phonenumbers.number_type(phone_number)
-        
-        if number_type == PhoneNumberType.MOBILE:
-            console.log("Mobile Numbe is Valid ",phone_number)
-            return True # "Mobile Number"
-        elif number_type == PhoneNumberType.FIXED_LINE:
-            return False # "Landline Number"
-        elif number_type == PhoneNumberType.FIXED_LINE_OR_MOBILE:
-            return True # "Landline or Mobile Number (uncertain)"
-        else:
-            return False # "Other Type of Number"
+# Agent datasets repeat the same numbers across rows and columns, so every
+# check is cached by the raw string
+PHONE_REGION = "US"  # Region used to parse numbers without a country code
+PHONE_CACHE_SIZE = 65536  # Distinct raw strings kept per cache
+MOBILE_TYPES = (PhoneNumberType.MOBILE, PhoneNumberType.FIXED_LINE_OR_MOBILE)  # FIXED_LINE_OR_MOBILE: uncertain, kept
+
 
+@lru_cache(maxsize=PHONE_CACHE_SIZE)
+def parse_valid_number(phone_number_str, region=PHONE_REGION):
+    """Parse once; the PhoneNumber for a valid number, otherwise None."""
+    try:
+        phone_number = phonenumbers.parse(phone_number_str, region)
     except phonenumbers.phonenumberutil.NumberParseException:
-        return False # "Invalid phone number format"
+        return None  # Invalid phone number format
+    return phone_number if phonenumbers.is_valid_number(phone_number) else None
+
+
+def normalize_number(phone_number_str, region=PHONE_REGION):
+    """E.164 form of a valid number, or None."""
+    phone_number = parse_valid_number(phone_number_str, region)
+    if phone_number is None:
+        return None
+    return phonenumbers.format_number(phone_number, phonenumbers.PhoneNumberFormat.E164)
+
+
+@lru_cache(maxsize=PHONE_CACHE_SIZE)
+def detect_number_type(phone_number_str, region=PHONE_REGION):
+    """True for a valid mobile (or possibly mobile) number; landlines and other types are False."""
+    phone_number = parse_valid_number(phone_number_str, region)
+    return phone_number is not None and phonenumbers.number_type(phone_number) in MOBILE_TYPES
+
 
 def filter_valid_numbers(phone_number_list):
-    # print("here")
-    valid_numbers = []
-    for number in phone_number_list:
-        # print(number)
-        response = detect_number_type(number)
-        print(response)
-        if response:
-            valid_numbers.append(number)
-    return valid_numbers
\ No newline at end of file
+    """Keep the numbers that are valid mobile numbers, in order."""
+    return [number for number in phone_number_list if detect_number_type(number)]
+
+
+def _format_prefix(country_code, hyphen_separator):
+    prefix = "+1" if country_code else "001"
+    return prefix + "-" if hyphen_separator else prefix
+
+
+@lru_cache(maxsize=PHONE_CACHE_SIZE)
+def _format_digits(digits, country_code, hyphen_separator):
+    if len(digits) != 10:
+        return ""
+    separator = "-" if hyphen_separator else ""
+    # Groups of 3-3-4
+    return _format_prefix(country_code, hyphen_separator) + separator.join((digits[:3], digits[3:6], digits[6:]))
+
+
+def _number_text(value):
+    """Text of a raw cell; numbers read as floats (5551234567.0) keep only their integer digits."""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def format_mobile_number(mobile, country_code=False, hyphen_separator=False):
+    """
+    Format one mobile number as 001XXXXXXXXXX / +1XXXXXXXXXX (hyphen-separated
+    when asked); anything that is not 10 digits gives "".
+    """
+    if pd.isna(mobile):
+        return ""
+    return _format_digits(re.sub(r"\D", "", _number_text(mobile)), country_code, hyphen_separator)
+
+
+def format_mobile_numbers(series, country_code=False, hyphen_separator=False):
+    """
+    Vectorized format_mobile_number for a whole column.
+
+    Each distinct value is formatted once with pandas string operations and
+    the result is mapped back onto the rows. Numbers read by pandas as floats
+    (a column with blanks, or floats in a mixed column) are formatted from
+    their integer value, as in format_mobile_number.
+    """
+    mixed = series.dtype == object
+    if pd.api.types.is_float_dtype(series):
+        integral = series.notna() & (series % 1 == 0)
+        series = series.where(~integral, series[integral].astype("int64").astype(str))
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    uniques = pd.Series(uniques, dtype="object")
+    if mixed:
+        uniques = uniques.map(_number_text)
+    digits = uniques.astype(str).str.replace(r"\D", "", regex=True)
+    separator = "-" if hyphen_separator else ""
+    formatted = (
+        _format_prefix(country_code, hyphen_separator)
+        + digits.str[:3] + separator + digits.str[3:6] + separator + digits.str[6:]
+    ).where(digits.str.len() == 10, "")
+    # NA rows have code -1 and map to the trailing ""
+    values = np.append(formatted.to_numpy(dtype=object), "")
+    return pd.Series(values[codes], index=series.index, dtype="object")
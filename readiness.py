@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import time
+
+# Page readiness profiles used by crawler.get_html
+#   fast    - decide readiness from DOM-mutation quiescence, network idle and an
+#             optional target selector, bounded by max_wait_ms
+#   stealth - the original human-simulation flow: random pre-navigation delay,
+#             zigzag mouse movement and fixed waits around network idle
+READINESS_PROFILES = {
+    "fast": {
+        "humanize": False,
+        "initial_wait_ms": 0,
+        "final_wait_ms": 0,
+        "quiet_ms": 500,         # No DOM mutations for this long counts as settled
+        "max_wait_ms": 8000,     # Upper bound on the whole readiness check
+    },
+    "stealth": {
+        "humanize": True,
+        "initial_wait_ms": 3000,
+        "final_wait_ms": 2000,
+        "quiet_ms": None,
+        "max_wait_ms": None,     # Falls back to js_timeout // 2 for network idle
+    },
+}
+DEFAULT_READINESS_PROFILE = "fast"
+
+# Resolves once the document has gone quiet_ms without a structural change,
+# or with false once max_ms has elapsed. Attribute changes are ignored so that
+# carousels and CSS animations do not keep the page "busy" forever.
+DOM_QUIET_SCRIPT = """
+({quietMs, maxMs}) => new Promise(resolve => {
+    let quietTimer = null;
+    let capTimer = null;
+    const observer = new MutationObserver(() => {
+        clearTimeout(quietTimer);
+        quietTimer = setTimeout(() => done(true), quietMs);
+    });
+    const done = (quiet) => {
+        observer.disconnect();
+        clearTimeout(quietTimer);
+        clearTimeout(capTimer);
+        resolve(quiet);
+    };
+    observer.observe(document, {childList: true, subtree: true, characterData: true});
+    quietTimer = setTimeout(() => done(true), quietMs);
+    capTimer = setTimeout(() => done(false), maxMs);
+})
+"""
+
+
+def get_readiness_profile(name=None):
+    """Return the readiness profile settings for a profile name."""
+    name = (name or DEFAULT_READINESS_PROFILE).lower()
+    if name not in READINESS_PROFILES:
+        logging.warning(f"Unknown readiness profile '{name}', using '{DEFAULT_READINESS_PROFILE}'")
+        name = DEFAULT_READINESS_PROFILE
+    return {"name": name, **READINESS_PROFILES[name]}
+
+
+async def wait_for_dom_quiet(page, quiet_ms=500, max_wait_ms=8000):
+    """Wait until no DOM mutations happen for quiet_ms; returns False on timeout."""
+    try:
+        return await page.evaluate(DOM_QUIET_SCRIPT, {"quietMs": quiet_ms, "maxMs": max_wait_ms})
+    except Exception as e:
+        logging.warning(f"DOM quiescence check failed: {e}")
+        return False
+
+
+async def wait_until_ready(page, profile, target_selector=None, js_timeout=10000):
+    """
+    Wait for a freshly navigated page to be ready according to the profile.
+
+    Returns a dict of the readiness signals that were observed, e.g.
+    {"dom_quiet": True, "network_idle": True, "selector": True, "elapsed": 0.8}.
+    """
+    start = time.time()
+    signals = {}
+
+    if profile["initial_wait_ms"]:
+        await page.wait_for_timeout(profile["initial_wait_ms"])
+
+    if profile["quiet_ms"] is None:
+        # Stealth: the original fixed wait followed by a network-idle wait
+        try:
+            await page.wait_for_load_state("networkidle", timeout=js_timeout // 2)
+            signals["network_idle"] = True
+        except Exception:
+            signals["network_idle"] = False
+        signals["elapsed"] = time.time() - start
+        return signals
+
+    max_wait_ms = profile["max_wait_ms"] or js_timeout
+
+    async def network_idle():
+        try:
+            await page.wait_for_load_state("networkidle", timeout=max_wait_ms)
+            return True
+        except Exception:
+            return False
+
+    async def selector_present():
+        try:
+            await page.wait_for_selector(target_selector, state="attached", timeout=max_wait_ms)
+            return True
+        except Exception:
+            return False
+
+    checks = {
+        "dom_quiet": wait_for_dom_quiet(page, profile["quiet_ms"], max_wait_ms),
+        "network_idle": network_idle(),
+    }
+    if target_selector:
+        checks["selector"] = selector_present()
+
+    try:
+        results = await asyncio.wait_for(asyncio.gather(*checks.values()), timeout=max_wait_ms / 1000 + 1)
+        signals.update(zip(checks.keys(), results))
+    except asyncio.TimeoutError:
+        signals.update({name: False for name in checks})
+    signals["elapsed"] = time.time() - start
+    return signals
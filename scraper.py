@@ -1,23 +1,42 @@
-import requests
-from bs4 import BeautifulSoup
-import time
+import asyncio
 import json
+import logging
+import os
 rawid=""
 from collections import defaultdict
+from functools import lru_cache
+from html_parser import ParsedPage
+from ai_cache import ai_cache, make_ai_cache_key
+from ai_client import AI_MODELS, AiProviderError, complete, complete_sync
+from browser_pool import run_on_pool_sync
+
+try:
+    import tiktoken
+except ImportError:  # Token counts are then estimated from characters
+    tiktoken = None
+
+# AI extraction: the cleaned page text is split into token-sized chunks sent in parallel
+AI_CHUNK_TOKENS = int(os.getenv("AI_CHUNK_TOKENS", "3000"))  # Page text per request, leaving room for the prompt and answer
+AI_CHUNK_OVERLAP = int(os.getenv("AI_CHUNK_OVERLAP", "200"))  # Tokens repeated between chunks so records on a boundary are seen whole
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "4"))  # Chunk requests in flight per page
+AI_TOKEN_ENCODING = "cl100k_base"
+CHARS_PER_TOKEN = 4  # Chunk size estimate when the tiktoken encoding is unavailable
+PROMPT_VERSION = 1  # Bump when build_ai_prompt changes so cached answers are not reused
 
 
 # from collections import defaultdict
 # from bs4 import BeautifulSoup
 
-def find_elements_by_selector(html_content, selector):
+def find_elements_by_selector(html_content, selector, backend=None, page=None):
     """Extract elements using a given CSS selector and group by their parent elements."""
-    soup = BeautifulSoup(html_content, 'html.parser')
+    if page is None:
+        page = ParsedPage(html_content, backend=backend)
 
     grouped_elements = defaultdict(list)
 
-    for element in soup.select(selector):
-        parent = element.find_parent()  # Get parent container
-        grouped_elements[parent].append(element.get_text(strip=True))  # Store values under the same parent
+    for element in page.select(selector):
+        parent = element.parent  # Get parent container
+        grouped_elements[parent].append(element.text(separator="", strip=True))  # Store values under the same parent
 
     # Remove duplicates within each group while preserving order
     grouped_texts = [list(dict.fromkeys(texts)) for texts in grouped_elements.values()]
@@ -32,15 +51,94 @@ def find_elements_by_selector(html_content, selector):
     # If only one group exists, return the flattened list directly
     return flattened_texts if len(grouped_texts) > 1 else flattened_texts
 
-from bs4 import BeautifulSoup
+CSS_VALUE_SEPARATOR = ", "  # Joins several values of one field found in the same card
 
-def clean_html(html_content):
-    """Convert HTML to clean text while removing redundant elements."""
-    soup = BeautifulSoup(html_content, "html.parser")
 
-    # Remove unnecessary elements
-    for tag in soup(["script", "style", "meta", "link", "noscript", "think"]):
-        tag.decompose()  # Remove the tag completely
+def _is_list_node(branches, single_field):
+    """
+    True when an element holds several records: two of its children contain
+    the same field and at least one of them has several fields (with a single
+    field, any two children with matches). Sibling spans of one card holding
+    a repeated field do not count.
+    """
+    if single_field:
+        return len(branches) > 1
+    children = defaultdict(int)
+    in_record = set()
+    for fields in branches.values():
+        for field in fields:
+            children[field] += 1
+            if len(fields) > 1:
+                in_record.add(field)
+    return any(children[field] > 1 for field in in_record)
+
+
+def find_elements_by_selectors(html_content, selectors, backend=None, page=None):
+    """
+    Evaluate several CSS selectors on one parsed page and align their matches
+    into rows, one per card (the repeated container an agent's fields share).
+
+    selectors maps field -> CSS selector (a list uses each selector as its own
+    field name). Compiled selectors are cached across pages by the parser
+    backend and results are memoized on the page. Returns a list of
+    {field: value} dicts in document order; a field missing from a card is "".
+    """
+    if not isinstance(selectors, dict):
+        selectors = {selector: selector for selector in selectors}
+    if page is None:
+        page = ParsedPage(html_content, backend=backend)
+    if not selectors:
+        return []
+
+    # One combined query gives every hit in document order; each hit is then
+    # tested against the individual selectors to learn which fields it answers
+    distinct = list(dict.fromkeys(selectors.values()))
+    matches = []
+    for position, node in enumerate(page.select(", ".join(distinct))):
+        hits = {selector for selector in distinct if node.matches(selector)}
+        matches.extend((position, field, node) for field, selector in selectors.items() if selector in hits)
+    if not matches:
+        return []
+
+    # Ancestor chains and, for every ancestor, the fields found under each of its children
+    chains = []
+    branches = defaultdict(lambda: defaultdict(set))
+    for _, field, node in matches:
+        chain = [node]
+        parent = node.parent
+        while parent is not None:
+            chain.append(parent)
+            parent = parent.parent
+        chains.append(chain)
+        for child, ancestor in zip(chain, chain[1:]):
+            branches[ancestor.key][child.key].add(field)
+
+    single_field = len({field for _, field, _ in matches}) == 1
+    list_nodes = {}
+    rows = {}  # card key -> {field: [values]}
+    for (_, field, node), chain in zip(matches, chains):
+        card = chain[1] if len(chain) > 1 else node  # No list ancestor: group by parent
+        for child, ancestor in zip(chain, chain[1:]):
+            if ancestor.key not in list_nodes:
+                list_nodes[ancestor.key] = _is_list_node(branches[ancestor.key], single_field)
+            if list_nodes[ancestor.key]:
+                card = child
+                break
+        values = rows.setdefault(card.key, {}).setdefault(field, [])
+        text = node.text(separator="", strip=True)
+        if text and text not in values:
+            values.append(text)
+
+    return [
+        {field: CSS_VALUE_SEPARATOR.join(row.get(field, [])) for field in selectors}
+        for row in rows.values()
+    ]
+
+
+def clean_html(html_content, backend=None, page=None):
+    """Convert HTML to clean text while removing redundant elements."""
+    if page is None:
+        page = ParsedPage(html_content, backend=backend)
 
     # Try to find the main content or fall back to body
     # soup = soup.find('main') 
@@ -52,115 +150,191 @@ def clean_html(html_content):
     #     print("No main or body element found.")
     #     return ""
 
-    # Get plain text
-    text = soup.get_text(separator=" ", strip=True)
+    # Get plain text; scripts, styles, metadata and <think> blocks are skipped
+    text = page.clean_text()
 
     # Reduce excessive whitespace
     cleaned_text = text
 
     return cleaned_text  # Limit to 5000 chars for AI efficiency
 
+def _call_provider(provider, prompt, api_key):
+    """Blocking provider call through the shared client; None when it fails."""
+    try:
+        return complete_sync(provider, prompt, api_key)
+    except AiProviderError as e:
+        logging.error(f"AI request failed: {e}")
+        return None
+
+
 def call_groq_ai(prompt: str,GROQ_API_KEY):
-    print("call groq")
     """Send a request to Groq AI for extraction."""
-    url = "https://api.groq.com/openai/v1/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {GROQ_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    data = {
-        "model": "deepseek-r1-distill-qwen-32b",
-        "messages": [{"role": "system", "content": "Extract structured data from text."},
-                     {"role": "user", "content": prompt}],
-        "temperature": 0.7
-    }
-    
-    response = requests.post(url, headers=headers, json=data)
-    print("response",response)
-    if response.status_code == 200:
-        return response.json()["choices"][0]["message"]["content"]
-    return None
+    return _call_provider("groq", prompt, GROQ_API_KEY)
 
 def call_openai(prompt, api_key):
-    url = "https://api.openai.com/v1/chat/completions"
-    headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
-    data = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": prompt}]}
-
-    retries = 5
-    for i in range(retries):
-        response = requests.post(url, headers=headers, json=data)
-        if response.status_code == 200:
-            return response.json()["choices"][0]["message"]["content"]
-        elif response.status_code == 429:  # Rate limit hit
-            wait_time = (2 ** i)  # Exponential backoff
-            print(f"Rate limit hit. Retrying in {wait_time} seconds...")
-            time.sleep(wait_time)
-        else:
-            print(f"Error: {response.status_code}, {response.text}")
-            return None
-    return None
+    return _call_provider("openai", prompt, api_key)
+
 def call_gemini(prompt: str,GEMINI_API_KEY=""):
     """Send a request to Google Gemini for extraction."""
-    print(GEMINI_API_KEY)
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent?key={GEMINI_API_KEY}"
-    headers = {"Content-Type": "application/json"}
-    data = {"contents": [{"parts": [{"text": prompt}]}]}
-    
-    response = requests.post(url, headers=headers, json=data)
-    print(response)
-    if response.status_code == 200:
-        return response.json()["candidates"][0]["content"]["parts"][0]["text"]
-    return "Error fetching data from Gemini"
+    return _call_provider("gemini", prompt, GEMINI_API_KEY)
 
 def call_deepseek(prompt: str,DEEPSEEK_API_KEY=""):
     """Send a request to DeepSeek for extraction."""
-    url = "https://api.deepseek.com/v1/chat/completions"
-    headers = {"Authorization": f"Bearer {DEEPSEEK_API_KEY}", "Content-Type": "application/json"}
-    data = {"model": "deepseek-chat", "messages": [{"role": "user", "content": prompt}], "temperature": 0}
-    
-    response = requests.post(url, headers=headers, json=data)
-    print(response)
-    if response.status_code == 200:
-        return response.json()["choices"][0]["message"]["content"]
-    return "Error fetching data from DeepSeek"
-
-
-def extract_data_with_ai(html_content, field,ai="groq",api=""):
-    """Extract structured data from HTML using AI."""
-    print(html_content)
-    cleaned_text = clean_html(html_content)
-    print("clean_html",cleaned_text)
-    ai_result= ""
-    ai_prompt = f"""You are an intelligent text extraction and conversion assistant. Your task is to extract structured information from the given text and convert it .
+    return _call_provider("deepseek", prompt, DEEPSEEK_API_KEY)
+
+
+@lru_cache(maxsize=1)
+def _token_encoding():
+    """The tiktoken encoding, or None when it cannot be loaded (it is downloaded on first use)."""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding(AI_TOKEN_ENCODING)
+    except Exception as e:
+        logging.warning(f"tiktoken encoding unavailable, estimating tokens from characters: {e}")
+        return None
+
+
+def chunk_text(text, max_tokens=AI_CHUNK_TOKENS, overlap=AI_CHUNK_OVERLAP):
+    """Split text into pieces of at most max_tokens tokens, consecutive pieces sharing overlap tokens."""
+    if not text:
+        return []
+    overlap = max(0, min(overlap, max_tokens - 1))
+    step = max_tokens - overlap
+    encoding = _token_encoding()
+    if encoding is None:
+        size, step = max_tokens * CHARS_PER_TOKEN, step * CHARS_PER_TOKEN
+        return [text[i:i + size] for i in range(0, max(len(text) - overlap * CHARS_PER_TOKEN, 1), step)]
+    tokens = encoding.encode(text, disallowed_special=())
+    return [encoding.decode(tokens[i:i + max_tokens]) for i in range(0, max(len(tokens) - overlap, 1), step)]
+
+
+def build_ai_prompt(field, cleaned_text):
+    return f"""You are an intelligent text extraction and conversion assistant. Your task is to extract structured information from the given text and convert it .
                         with no additional commentary, explanations, or extraneous information.don't generate anything random from your side it should 100% authentic from the html
                         You could encounter cases where you can't find the data of the fields you have to extract or the data will be in a foreign language it here is not any data you can return empty don't generate anything or anything Dummy Text.it should 100% follow the sturcture of fields
                         Please process the following text and provide the output Extract {",".join(field)} Return the output in the following python dict with any extra text structure:"field_name_1": ["text1", "text2", "text3"],"field_name_2": ["text4", "text5"]
  from the following text: data should have duplicate data data should be in this format seperated by ',' response should be very professional like if email all should be in lower if contact number is should be put country code +1 and give them without seperator like - or space it should be +18923827373 \n\n{cleaned_text} be 100% you don't generate any thing from your site like if email it should be 100% exist there think of its surity first"""
-    # print("aiPrompt",ai_prompt)
-    print("ai Lower",ai,ai.lower())
+
+
+AI_CALLERS = {"groq": call_groq_ai, "openai": call_openai, "gemini": call_gemini, "deepseek": call_deepseek}
+
+
+def call_ai(prompt, ai="groq", api=""):
+    """Send a prompt to the selected provider and return its raw answer (None on failure)."""
+    caller = AI_CALLERS.get(ai.lower())
+    if caller is None:
+        logging.error(f"Unknown AI provider: {ai}")
+        return None
+    return caller(prompt, api)
+
+
+def parse_ai_response(ai_result):
+    """The dict in an AI answer (code fences and <think> blocks removed); ValueError if there is none."""
+    if not isinstance(ai_result, str):
+        raise ValueError("Empty AI response")
+    text = clean_html(ai_result)
+    parsed = json.loads(text.replace("```python", "").replace("```json", "").replace("```", "").strip())
+    if not isinstance(parsed, dict):
+        raise ValueError(f"Expected a dict from the AI, got {type(parsed).__name__}")
+    return parsed
+
+
+def merge_ai_results(results):
+    """Merge per-chunk {field: [values]} dicts, dropping values repeated across chunks (overlap)."""
+    merged = {}
+    for result in results:
+        for key, values in result.items():
+            if not isinstance(values, list):
+                values = [values] if values else []
+            bucket = merged.setdefault(key, [])
+            bucket.extend(v for v in values if v not in bucket)
+    return merged
+
+
+async def _extract_chunk(chunk, field, ai, api, semaphore):
     try:
-        if ai.lower()=='groq':
-            print("groq here")
-            ai_result = call_groq_ai(ai_prompt,api)
-        elif ai.lower() == 'openai':
-            print("i am here")
-            ai_result = call_openai(ai_prompt,api)
-        elif ai.lower() == 'gemini':
-            ai_result = call_gemini(ai_prompt,api)
-        elif ai.lower()=='deepseek':
-            ai_result = call_deepseek(ai_prompt,api)
-        print(ai_result)
-        text=clean_html(ai_result)
-        cleaned_ai_response = json.loads(text.replace("```python", "").replace("```", "").strip())
-        print(cleaned_ai_response)
-        if cleaned_ai_response:
-            print(cleaned_ai_response)
-            return cleaned_ai_response  # Convert AI response to list
-        return {"data":f"No {field} found"}
-    except :
+        async with semaphore:
+            ai_result = await complete(ai, build_ai_prompt(field, chunk), api)
+        return parse_ai_response(ai_result)
+    except AiProviderError as e:
+        logging.error(f"AI request failed: {e}")
+    except ValueError as e:
+        logging.error(f"Unusable {ai} response: {e}")
+    return None
+
+
+async def _extract_chunks(chunks, field, ai, api):
+    """Answers for every chunk, at most AI_MAX_CONCURRENCY requests in flight (no cache access)."""
+    semaphore = asyncio.Semaphore(AI_MAX_CONCURRENCY)
+    return await asyncio.gather(*(_extract_chunk(chunk, field, ai, api, semaphore) for chunk in chunks))
+
+
+def _prepare_chunks(html_content, field, ai, page, use_cache):
+    """The page text chunks, their cache keys and cached answers (None where not cached)."""
+    chunks = chunk_text(clean_html(html_content, page=page))
+    model = AI_MODELS.get(ai.lower(), "")
+    keys = [make_ai_cache_key(chunk, field, ai, model, PROMPT_VERSION) for chunk in chunks]
+    answers = [ai_cache.get(key) if use_cache else None for key in keys]
+    logging.info(f"AI extraction with {ai}: {len(chunks)} chunk(s), {len(chunks) - answers.count(None)} cached")
+    return chunks, keys, answers
+
+
+def _store_answers(keys, answers):
+    for key, answer in zip(keys, answers):
+        if answer is not None:
+            ai_cache.put(key, answer)
+
+
+def _merge_answers(answers, field):
+    answered = [answer for answer in answers if answer is not None]
+    if not answered:
         return {"status": 401, "data": "Error While Connecting to AI. Probably Invalid API Key"}
+    merged = merge_ai_results(answered)
+    if any(merged.values()):
+        return merged
+    return {"data":f"No {field} found"}
 
-    
+
+async def extract_data_with_ai_async(html_content, field,ai="groq",api="",page=None,use_cache=True):
+    """
+    Extract structured data from HTML using AI, awaitable from the crawl code.
+
+    The cleaned text is split into overlapping token chunks whose requests run
+    concurrently on the shared provider client (at most AI_MAX_CONCURRENCY at
+    a time); the answers are merged into one {field: [values]} dict. Answers
+    are cached per chunk in ai_cache, so an unchanged page costs no provider
+    calls. The cache is read and written in a worker thread, never on the
+    event loop.
+    """
+    chunks, keys, answers = await asyncio.to_thread(_prepare_chunks, html_content, field, ai, page, use_cache)
+    if not chunks:
+        return {"data":f"No {field} found"}
+    missing = [i for i, answer in enumerate(answers) if answer is None]
+    if missing:
+        fresh = await _extract_chunks([chunks[i] for i in missing], field, ai, api)
+        for i, answer in zip(missing, fresh):
+            answers[i] = answer
+        if use_cache:
+            await asyncio.to_thread(_store_answers, [keys[i] for i in missing], fresh)
+    return _merge_answers(answers, field)
 
 
+def extract_data_with_ai(html_content, field,ai="groq",api="",page=None,use_cache=True):
+    """
+    Blocking variant of extract_data_with_ai_async for the Streamlit script and plain threads.
 
+    Only the provider requests run on the browser-pool loop; the cache is
+    read and written here in the calling thread.
+    """
+    chunks, keys, answers = _prepare_chunks(html_content, field, ai, page, use_cache)
+    if not chunks:
+        return {"data":f"No {field} found"}
+    missing = [i for i, answer in enumerate(answers) if answer is None]
+    if missing:
+        fresh = run_on_pool_sync(_extract_chunks([chunks[i] for i in missing], field, ai, api))
+        for i, answer in zip(missing, fresh):
+            answers[i] = answer
+        if use_cache:
+            _store_answers([keys[i] for i in missing], fresh)
+    return _merge_answers(answers, field)
@@ -0,0 +1,164 @@
+import os
+import lxml.etree
+from extraction import CONTAINER_TAGS, clean_phone_numbers, field_scanner
+from html_parser import TEXT_SKIP_TAGS
+
+# Event-driven extraction for pages too large to hold as a tree
+STREAM_CHUNK_CHARS = 64 * 1024        # Input is fed to the parser in pieces of this size
+STREAM_FLUSH_CHARS = 256 * 1024       # A container's pending text is scanned once it grows past this
+STREAM_OVERLAP_CHARS = 1024           # Kept back on a flush so matches spanning the cut are not lost
+STREAMING_THRESHOLD = int(os.getenv("STREAMING_THRESHOLD", str(8 * 1024 * 1024)))  # Regex extraction streams pages larger than this (characters)
+
+
+def iter_chunks(html_content, size=STREAM_CHUNK_CHARS):
+    """Split a string into parser-sized chunks."""
+    for start in range(0, len(html_content), size):
+        yield html_content[start:start + size]
+
+
+class _Container:
+    """Pending text of one open container element."""
+
+    def __init__(self):
+        self.pieces = []
+        self.length = 0
+
+    def add(self, text):
+        piece = text.strip()
+        if piece:
+            self.pieces.append(piece)
+            self.length += len(piece) + 1
+
+
+class StreamExtractor:
+    """
+    Incremental field and link extraction over an lxml HTMLPullParser.
+
+    Text is attributed to its nearest container element, as in
+    extraction.container_texts(), and each container is scanned when it
+    closes. Elements are detached as soon as their text has been read, so
+    memory holds only the open element path and the pending text of open
+    containers (large containers are scanned in STREAM_FLUSH_CHARS pieces).
+    Values are deduplicated like extract_fields(), but come out in the
+    order containers close rather than the order they open.
+    """
+
+    def __init__(self, fields, country_code=False, hyphen_separator=False):
+        self.fields = list(fields)
+        self.country_code = country_code
+        self.hyphen_separator = hyphen_separator
+        self.scanner = field_scanner(self.fields)
+        self.seen = {field: set() for field in self.fields}
+        self.parser = lxml.etree.HTMLPullParser(events=("start", "end", "comment"))
+        # Frames of open elements: [element, container, skipped, text_read]
+        self.stack = []
+
+    def feed(self, chunk):
+        """Parse a chunk and yield the ("field", name, value) and ("link", href, None) events it completes."""
+        self.parser.feed(chunk)
+        yield from self._drain()
+
+    def close(self):
+        """Finish parsing and yield the remaining events."""
+        try:
+            self.parser.close()
+        except lxml.etree.XMLSyntaxError:
+            return  # Nothing was fed
+        yield from self._drain()
+
+    def _add_text(self, frame, text):
+        if text and not frame[2]:
+            frame[1].add(text)
+
+    def _before_child(self, child):
+        """Text preceding a new child of the innermost element is complete; take it and drop the previous sibling."""
+        frame = self.stack[-1]
+        previous = child.getprevious()
+        if previous is None:
+            if not frame[3]:
+                self._add_text(frame, frame[0].text)
+                frame[3] = True
+        else:
+            self._add_text(frame, previous.tail)
+            frame[0].remove(previous)
+
+    def _drain(self):
+        for event, el in self.parser.read_events():
+            if event == "comment":
+                if self.stack:
+                    self._before_child(el)
+            elif event == "start":
+                parent = self.stack[-1] if self.stack else None
+                if parent is not None:
+                    self._before_child(el)
+                tag = el.tag
+                container = _Container() if parent is None or tag in CONTAINER_TAGS else parent[1]
+                skipped = tag in TEXT_SKIP_TAGS or (parent is not None and parent[2])
+                self.stack.append([el, container, skipped, False])
+                if tag == "a" and el.get("href"):
+                    yield "link", el.get("href"), None
+            else:
+                frame = self.stack.pop()
+                if len(el):
+                    self._add_text(frame, el[-1].tail)
+                    del el[:]
+                elif not frame[3]:
+                    self._add_text(frame, el.text)
+                if not self.stack or self.stack[-1][1] is not frame[1]:
+                    yield from self._scan(frame[1], final=True)
+                continue
+            if self.stack and self.stack[-1][1].length > STREAM_FLUSH_CHARS:
+                yield from self._scan(self.stack[-1][1], final=False)
+
+    def _scan(self, container, final):
+        if not container.pieces:
+            return
+        text = " ".join(container.pieces)
+        matches = []
+        for field, found in self.scanner.scan(text).items():
+            matches.extend((start, end, field, value) for value, start, end in found)
+        matches.sort()
+        cut = len(text) if final else len(text) - STREAM_OVERLAP_CHARS
+        keep_from = cut
+        for start, end, field, value in matches:
+            if end > cut:
+                # May continue past the cut; it is matched again in the kept text
+                keep_from = min(keep_from, start)
+                continue
+            if field.lower() == "phone":
+                cleaned = clean_phone_numbers([value], self.country_code, self.hyphen_separator)
+                if not cleaned:
+                    continue
+                value = cleaned[0]
+            if value not in self.seen[field]:
+                self.seen[field].add(value)
+                yield "field", field, value
+        container.pieces, container.length = [], 0
+        if not final:
+            # Keep whole words so the rescan does not start inside one
+            container.add(text[text.rfind(" ", 0, keep_from) + 1:])
+
+
+def stream_extract(chunks, fields, country_code=False, hyphen_separator=False):
+    """
+    Extract fields and links from HTML given as an iterable of chunks.
+
+    chunks can be pieces of one document or whole pages one after another.
+    Yields ("field", name, value) for each new value and ("link", href, None)
+    for each anchor, as soon as they are found.
+    """
+    extractor = StreamExtractor(fields, country_code, hyphen_separator)
+    for chunk in chunks:
+        if chunk:
+            yield from extractor.feed(chunk)
+    yield from extractor.close()
+
+
+def extract_fields_streaming(html_content, fields, country_code=False, hyphen_separator=False):
+    """extract_fields() result shape, produced by the streaming extractor."""
+    chunks = iter_chunks(html_content) if isinstance(html_content, str) else html_content
+    results = {field: [] for field in fields}
+    for kind, name, value in stream_extract(chunks, fields, country_code, hyphen_separator):
+        if kind == "field":
+            results[name].append(value)
+    return results
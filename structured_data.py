@@ -0,0 +1,188 @@
+import json
+import logging
+import re
+from extraction import clean_phone_numbers
+
+# schema.org records embedded as JSON-LD, microdata or OpenGraph tags.
+# Agent directories usually mark up each agent as a Person or RealEstateAgent.
+CONTACT_TYPES = ("Person", "RealEstateAgent")  # Records whose properties are taken
+MIN_ITEM_RECORDS = 2  # Contact records needed before they are trusted to cover every item on the page
+FIELD_PROPERTIES = {  # Requested field -> schema.org properties that answer it
+    "name": ("name",),
+    "email": ("email",),
+    "phone": ("telephone",),
+    "mobile": ("telephone",),
+    "telephone": ("telephone",),
+    "url": ("url",),
+    "website": ("url",),
+    "address": ("address",),
+}
+OPENGRAPH_PROPERTIES = {  # <meta property> -> schema.org property
+    "og:email": "email",
+    "og:phone_number": "telephone",
+    "og:street-address": "address",
+    "business:contact_data:email": "email",
+    "business:contact_data:phone_number": "telephone",
+    "business:contact_data:street_address": "address",
+}
+ADDRESS_PARTS = ("streetAddress", "addressLocality", "addressRegion", "postalCode", "addressCountry")
+MICRODATA_VALUE_ATTRS = {  # Elements whose microdata value is an attribute, not their text
+    "meta": "content", "a": "href", "link": "href", "area": "href", "img": "src",
+    "audio": "src", "video": "src", "source": "src", "time": "datetime", "data": "value", "meter": "value",
+}
+PHONE_FIELDS = ("phone", "mobile", "telephone")
+LINK_SCHEMES_RE = re.compile(r"^(mailto|tel|callto):", re.IGNORECASE)
+
+
+def _type_name(value):
+    """'http://schema.org/Person' / 'schema:Person' -> 'Person'."""
+    return re.split(r"[/:#]", value.strip())[-1] if isinstance(value, str) else ""
+
+
+def _is_contact(types):
+    if not isinstance(types, list):
+        types = [types]
+    return any(_type_name(t) in CONTACT_TYPES for t in types)
+
+
+def _property_text(value):
+    """Plain string for a JSON-LD property value (addresses are flattened)."""
+    if isinstance(value, dict):
+        if _type_name(value.get("@type")) == "PostalAddress" or any(part in value for part in ADDRESS_PARTS):
+            parts = [_property_text(value.get(part)) for part in ADDRESS_PARTS]
+            return ", ".join(part for part in parts if part)
+        return _property_text(value.get("name") or value.get("@value") or value.get("@id"))
+    if isinstance(value, (str, int, float)) and not isinstance(value, bool):
+        return " ".join(str(value).split())
+    return ""
+
+
+def _json_ld_records(data):
+    """Every contact-type object in a JSON-LD payload, including nested and @graph ones."""
+    stack = [data]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, list):
+            stack.extend(reversed(item))
+        elif isinstance(item, dict):
+            if _is_contact(item.get("@type")):
+                yield item
+            stack.extend(reversed([v for v in item.values() if isinstance(v, (dict, list))]))
+
+
+def json_ld_records(page):
+    """Every JSON-LD contact record on the page."""
+    records = []
+    for script in page.select('script[type="application/ld+json"]'):
+        raw = script.text(separator="", strip=False, skip=())
+        try:
+            data = json.loads(raw)
+        except ValueError as e:
+            logging.debug(f"Skipping invalid JSON-LD block: {e}")
+            continue
+        records.extend(_json_ld_records(data))
+    return records
+
+
+def json_ld_properties(page, records=None):
+    """(property, value) pairs from the page's JSON-LD contact records."""
+    pairs = []
+    for record in json_ld_records(page) if records is None else records:
+        for prop, value in record.items():
+            for item in value if isinstance(value, list) else [value]:
+                pairs.append((prop, _property_text(item)))
+    return pairs
+
+
+def _item_scope(element):
+    """Nearest itemscope ancestor (the item an itemprop belongs to), or None."""
+    parent = element.parent
+    while parent is not None:
+        if parent.get("itemscope") is not None:
+            return parent
+        parent = parent.parent
+    return None
+
+
+def microdata_properties(page):
+    """(property, value) pairs from itemprop elements of contact items (or untyped items)."""
+    pairs = []
+    for element in page.select("[itemprop]"):
+        scope = _item_scope(element)
+        itemtype = scope.get("itemtype") if scope is not None else None
+        if itemtype and not _is_contact(itemtype.split()):
+            continue
+        attr = MICRODATA_VALUE_ATTRS.get(element.name)
+        if attr and element.get("itemscope") is None:
+            value = element.get(attr) or ""
+        else:
+            value = element.text()
+        for prop in (element.get("itemprop") or "").split():
+            pairs.append((prop, " ".join(value.split())))
+    return pairs
+
+
+def microdata_records(page):
+    """itemscope elements typed as contacts."""
+    return [scope for scope in page.select("[itemscope][itemtype]") if _is_contact(scope.get("itemtype").split())]
+
+
+def opengraph_properties(page):
+    pairs = []
+    for meta in page.select("meta[property][content]"):
+        prop = OPENGRAPH_PROPERTIES.get(meta.get("property", "").lower())
+        if prop:
+            pairs.append((prop, meta.get("content", "").strip()))
+    return pairs
+
+
+def _phone_digits(value):
+    """Drop a leading US country code so clean_phone_numbers sees 10 digits."""
+    digits = re.sub(r"[^0-9]", "", value)
+    return digits[1:] if len(digits) == 11 and digits.startswith("1") else digits
+
+
+def extract_structured_fields(page, fields, country_code=False, hyphen_separator=False, records=None):
+    """
+    Read the requested fields from JSON-LD, microdata and OpenGraph markup.
+
+    page is a ParsedPage. Returns {field: [values]} in the extract_fields()
+    shape; fields with no structured property stay empty. Phone fields are
+    formatted like the regex path. records are the page's JSON-LD records
+    when already read.
+    """
+    wanted = {}
+    for field in fields:
+        for prop in FIELD_PROPERTIES.get(field.lower(), ()):
+            wanted.setdefault(prop, []).append(field)
+
+    results = {field: [] for field in fields}
+    if not wanted:
+        return results
+    pairs = json_ld_properties(page, records) + microdata_properties(page) + opengraph_properties(page)
+    for prop, value in pairs:
+        value = LINK_SCHEMES_RE.sub("", value).strip()
+        if not value:
+            continue
+        for field in wanted.get(prop, ()):
+            if field.lower() in PHONE_FIELDS:
+                formatted = clean_phone_numbers([_phone_digits(value)], country_code, hyphen_separator)
+                if not formatted:
+                    continue
+                value = formatted[0]
+            results[field].append(value)
+    return {field: list(dict.fromkeys(values)) for field, values in results.items()}
+
+
+def answers_all(page, results, fields, records=None):
+    """
+    True when structured data can stand in for the text scan: every field
+    has a value and the page carries one contact record per item (at least
+    MIN_ITEM_RECORDS). A single page-level record, such as the brokerage on
+    an agent roster, says nothing about the cards around it.
+    """
+    if not all(results.get(field) for field in fields):
+        return False
+    if records is None:
+        records = json_ld_records(page)
+    return len(records) + len(microdata_records(page)) >= MIN_ITEM_RECORDS
@@ -8,6 +8,9 @@ import psutil
 from mainthread import startThread, stopThread, current_scraper_thread, scraper_stop_event
 from emailSender import send_email
 from fakeagents import get_random_user_agent
+from blocking import apply_blocking_profile
+from html_cache import html_cache, make_cache_key
+from bs4 import BeautifulSoup
 import time
 
 # Configuration
@@ -21,6 +24,8 @@ REQUEST_DELAY = 2
 PAGE_LOAD_TIMEOUT = 30000
 RATE_LIMIT_DELAY = 0.5
 MEMORY_THRESHOLD_MB = 1500
+BLOCKING_PROFILE = "no-media"  # Request blocking: "text-only", "no-media" or "full"
+USE_PAGE_CACHE = True  # Reuse agent detail pages from the on-disk HTML cache on reruns
 
 # Setup logging
 logging.basicConfig(
@@ -75,7 +80,16 @@ async def fetch_agent_details(context, agent_url, agent_data, retry_count=0):
     full_agent_url = f"https://www.coldwellbankerhomes.com{agent_url}" if agent_url.startswith("/") else agent_url
     print(f"Fetching agent details from {full_agent_url} (Retry {retry_count}/{RETRY_LIMIT})")
     agent_page = None
+    cache_key = make_cache_key(full_agent_url)
     try:
+        cached_html = html_cache.get_fresh(cache_key) if USE_PAGE_CACHE else None
+        if cached_html:
+            email_element = BeautifulSoup(cached_html, "lxml").select_one(".email-link")
+            if email_element:
+                agent_data["email"] = email_element.get_text().strip()
+                print(f"Found email (cached): {agent_data['email']}")
+            return agent_data
+
         agent_page = await context.new_page()
         agent_page.set_default_timeout(PAGE_LOAD_TIMEOUT)
         
@@ -84,6 +98,8 @@ async def fetch_agent_details(context, agent_url, agent_data, retry_count=0):
         if email_element:
             agent_data["email"] = (await email_element.inner_text()).strip()
             print(f"Found email: {agent_data['email']}")
+        if USE_PAGE_CACHE:
+            html_cache.put(cache_key, full_agent_url, await agent_page.content())
     except PlaywrightTimeoutError as e:
         print(f"Timeout fetching {full_agent_url}: {e}")
         logging.warning(f"Timeout fetching {full_agent_url}: {e}")
@@ -100,7 +116,8 @@ async def fetch_agent_details(context, agent_url, agent_data, retry_count=0):
             except Exception as e:
                 print(f"Error closing agent page: {e}")
                 logging.error(f"Error closing agent page: {e}")
-        await asyncio.sleep(REQUEST_DELAY)
+            # Rate limit only requests that actually hit the site
+            await asyncio.sleep(REQUEST_DELAY)
     return agent_data
 
 async def process_page(context, page, inner_city_name, city_name, page_num, semaphore, all_agents):
@@ -152,7 +169,7 @@ async def process_page(context, page, inner_city_name, city_name, page_num, sema
             logging.error(f"Error processing page {page_num}: {e}")
             raise
 
-async def _run_scraper(url, fields_to_extract=None):
+async def _run_scraper(url, fields_to_extract=None, blocking_profile=BLOCKING_PROFILE):
     """Main scraping function with improved resource management."""
     all_agents = []
     start_time = datetime.now()
@@ -163,6 +180,7 @@ async def _run_scraper(url, fields_to_extract=None):
     browser = None
     context = None
     page = None
+    block_stats = None
 
     # Clear existing files at the start of every run
     clear_existing_files()
@@ -179,6 +197,7 @@ async def _run_scraper(url, fields_to_extract=None):
                 viewport={"width": 1280, "height": 800},
                 user_agent=get_random_user_agent(),
             )
+            block_stats = await apply_blocking_profile(context, blocking_profile)
             page = await context.new_page()
             page.set_default_timeout(PAGE_LOAD_TIMEOUT)
 
@@ -295,6 +314,9 @@ async def _run_scraper(url, fields_to_extract=None):
                 print(f"Error closing browser: {e}")
                 logging.error(f"Error closing browser: {e}")
         print("Browser resources cleaned up")
+        if block_stats:
+            print(f"Request blocking: {block_stats.summary()}")
+            logging.info(f"Request blocking: {block_stats.summary()}")
         if all_agents:
             save_data(all_agents, fields_to_extract)
             print(f"Final save: {len(all_agents)} agents")
@@ -344,7 +366,7 @@ def send_completion_email(success, processed_agents, error_message):
     print("Completion email sent")
     logging.info("Completion email sent")
 
-def get_all_data(url="https://www.coldwellbankerhomes.com/sitemap/agents/", fields_to_extract=None):
+def get_all_data(url="https://www.coldwellbankerhomes.com/sitemap/agents/", fields_to_extract=None, blocking_profile=BLOCKING_PROFILE):
     """Start scraper in background with thread management."""
     global current_scraper_thread, scraper_stop_event
     
@@ -367,7 +389,7 @@ def get_all_data(url="https://www.coldwellbankerhomes.com/sitemap/agents/", fiel
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         try:
-            loop.run_until_complete(_run_scraper(url, fields_to_extract))
+            loop.run_until_complete(_run_scraper(url, fields_to_extract, blocking_profile))
         finally:
             loop.close()
 
@@ -8,6 +8,10 @@ import json
 from mainthread import startThread, stopThread, current_scraper_thread, scraper_stop_event
 from emailSender import send_email
 from fakeagents import get_random_user_agent
+from blocking import apply_blocking_profile
+from html_cache import html_cache, make_cache_key
+from load_more_replay import record_load_more_request, replay_load_more_items
+from bs4 import BeautifulSoup
 
 # Constants
 OUTPUT_FOLDER = "data"
@@ -17,6 +21,9 @@ RETRY_LIMIT = 3
 LOAD_MORE_TIMEOUT = 10000
 PAGE_STABILIZE_DELAY = 2000
 MAX_LOAD_ATTEMPTS = 50
+BLOCKING_PROFILE = "no-media"  # Request blocking: "text-only", "no-media" or "full"
+USE_PAGE_CACHE = True  # Reuse agent profile pages from the on-disk HTML cache on reruns
+USE_LOAD_MORE_REPLAY = True  # Replay the 'Load More' request over HTTP instead of clicking repeatedly
 
 if not os.path.exists(OUTPUT_FOLDER):
     os.makedirs(OUTPUT_FOLDER)
@@ -72,10 +79,18 @@ async def fetch_agent_details(page, agent_data, agent_url, retry_count=0):
         return
         
     try:
-        await page.goto(agent_url, timeout=30000)
-        email_element = await page.query_selector('a[href^="mailto:"]')
+        cache_key = make_cache_key(agent_url)
+        cached_html = html_cache.get_fresh(cache_key) if USE_PAGE_CACHE else None
+        if cached_html:
+            email_element = BeautifulSoup(cached_html, "lxml").select_one('a[href^="mailto:"]')
+            email = email_element.get('href') if email_element else None
+        else:
+            await page.goto(agent_url, timeout=30000)
+            email_element = await page.query_selector('a[href^="mailto:"]')
+            email = await email_element.get_attribute('href') if email_element else None
+            if USE_PAGE_CACHE:
+                html_cache.put(cache_key, agent_url, await page.content())
         if email_element:
-            email = await email_element.get_attribute('href')
             agent_data["email"] = email.replace('mailto:', '')
             if "pending" in agent_data["email"].lower():
                 message = f"<p>Alert: Agent {agent_data['name']} has a pending email status.</p><p>Email does not exist for this agent. Please do not request email for this agent.</p>"
@@ -95,10 +110,47 @@ async def fetch_agent_details(page, agent_data, agent_url, retry_count=0):
             print(f"Failed to fetch details for {agent_data['name']}: {e}")
             agent_data["email"] = "Failed to retrieve"
 
+async def replay_remaining_agents(page):
+    """
+    Click 'Load More' once, record the request it fires and replay it over HTTP
+    for the remaining pages. The returned agent markup is inserted next to the
+    existing agents in one step. Returns False if no agents were replayed, in
+    which case the caller keeps clicking.
+    """
+    load_more_button = await page.query_selector('#show-more-agents')
+    if not load_more_button or not await load_more_button.is_visible():
+        return False
+    recorded = await record_load_more_request(page, lambda: load_more_button.click(timeout=LOAD_MORE_TIMEOUT))
+    if not recorded:
+        return False
+    try:
+        await page.wait_for_selector('#progress', state="hidden", timeout=10000)
+    except:
+        pass
+    fragments = await replay_load_more_items(recorded, MAX_LOAD_ATTEMPTS, '.agent-info')
+    if not fragments:
+        return False
+    await page.evaluate("""(html) => {
+        const agents = document.querySelectorAll('.agent-info');
+        const container = agents.length ? agents[agents.length - 1].parentElement : document.body;
+        container.insertAdjacentHTML('beforeend', html);
+    }""", "".join(fragments))
+    print(f"Replayed 'Load More' request for {len(fragments)} pages")
+    return True
+
 async def load_all_agents(page):
     print("Starting to load all agents...")
     await page.wait_for_selector('.agent-info', state="visible", timeout=60000)
     
+    if USE_LOAD_MORE_REPLAY:
+        try:
+            if await replay_remaining_agents(page):
+                final_elements = await page.query_selector_all('.agent-info')
+                print(f"All agents loaded. Total: {len(final_elements)}")
+                return len(final_elements)
+        except Exception as e:
+            print(f"Load More replay failed, falling back to clicking: {e}")
+    
     click_count = 0
     prev_count = 0
     same_count_streak = 0
@@ -185,7 +237,7 @@ async def collect_all_agent_data(page, start_time, total_estimated):
             
     return all_agents
 
-async def fetch_emails_concurrently(browser, agents, start_time):
+async def fetch_emails_concurrently(browser, agents, start_time, blocking_profile=BLOCKING_PROFILE):
     print(f"Fetching email addresses for {len(agents)} agents...")
     
     agents_with_url = [agent for agent in agents if agent.get("profile_url")]
@@ -195,10 +247,12 @@ async def fetch_emails_concurrently(browser, agents, start_time):
     
     semaphore = asyncio.Semaphore(CONCURRENT_REQUESTS)
     pages = []
+    block_stats = []
 
     # Create pages within the single browser instance
     for _ in range(CONCURRENT_REQUESTS):
         context = await browser.new_context(viewport={'width': 1280, 'height': 800})
+        block_stats.append(await apply_blocking_profile(context, blocking_profile))
         page = await context.new_page()
         pages.append((context, page))
     
@@ -232,6 +286,9 @@ async def fetch_emails_concurrently(browser, agents, start_time):
         await page.close()
         await context.close()
         
+    blocked = sum(stats.requests_blocked for stats in block_stats)
+    saved_kb = sum(stats.bytes_saved for stats in block_stats) / 1024
+    print(f"Request blocking ({blocking_profile}): blocked {blocked} requests, ~{saved_kb:.0f} KB saved")
     print("Email fetching completed or stopped")
     return agents
 
@@ -275,7 +332,7 @@ async def close_all_browsers():
             print(f"Error closing browser: {e}")
     active_browsers.clear()
 
-async def _run_scraper(url, fields_to_extract=None):
+async def _run_scraper(url, fields_to_extract=None, blocking_profile=BLOCKING_PROFILE):
     global active_browsers
     start_time = datetime.now()
     clear_existing_files()
@@ -296,6 +353,7 @@ async def _run_scraper(url, fields_to_extract=None):
                 viewport={'width': 1280, 'height': 800},
                 user_agent=get_random_user_agent()
             )
+            block_stats = await apply_blocking_profile(context, blocking_profile)
             page = await context.new_page()
             print(f"Navigating to {url}")
             await page.goto(url, wait_until="domcontentloaded", timeout=60000)
@@ -305,7 +363,7 @@ async def _run_scraper(url, fields_to_extract=None):
             
             agents_with_basic_data = await collect_all_agent_data(page, start_time, total_agents)
             
-            complete_agents = await fetch_emails_concurrently(browser, agents_with_basic_data, start_time)
+            complete_agents = await fetch_emails_concurrently(browser, agents_with_basic_data, start_time, blocking_profile)
             
             save_data(complete_agents, fields_to_extract)
             
@@ -323,6 +381,7 @@ async def _run_scraper(url, fields_to_extract=None):
                 
             elapsed_time = (datetime.now() - start_time).total_seconds()
             print(f"Scraping {'completed' if not scraper_stop_event.is_set() else 'stopped'} in {elapsed_time} seconds")
+            print(f"Request blocking: {block_stats.summary()}")
             
         except Exception as e:
             print(f"Critical error in scraper: {e}")
@@ -333,7 +392,7 @@ async def _run_scraper(url, fields_to_extract=None):
             active_browsers.remove(browser) if browser in active_browsers else None
             print("Resources released. Scraper finished.")
 
-def get_c21_agents(fields_to_extract=None):
+def get_c21_agents(fields_to_extract=None, blocking_profile=BLOCKING_PROFILE):
     global current_scraper_thread, scraper_stop_event
     
     # Check if 'email' is requested
@@ -360,7 +419,7 @@ def get_c21_agents(fields_to_extract=None):
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         try:
-            loop.run_until_complete(_run_scraper(url, fields_to_extract))
+            loop.run_until_complete(_run_scraper(url, fields_to_extract, blocking_profile))
         finally:
             loop.close()
     
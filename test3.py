@@ -11,6 +11,7 @@ import psutil
 from mainthread import startThread, stopThread, current_scraper_thread, scraper_stop_event
 from emailSender import send_email
 from fakeagents import get_random_user_agent
+from blocking import apply_blocking_profile
 
 # Configuration
 BATCH_SIZE = 50
@@ -23,6 +24,7 @@ NAVIGATION_TIMEOUT = 90000
 CONCURRENT_REQUESTS = 8
 MAX_PAGES_PER_CITY = 50
 MEMORY_THRESHOLD_MB = 2000
+BLOCKING_PROFILE = "no-media"  # Request blocking: "text-only", "no-media" or "full"
 
 # Ensure the output folder exists
 os.makedirs(OUTPUT_FOLDER, exist_ok=True)
@@ -331,7 +333,7 @@ def check_memory():
         return True
     return False
 
-async def _run_scraper(fields_to_extract):
+async def _run_scraper(fields_to_extract, blocking_profile=BLOCKING_PROFILE):
     """Main scraping function with improved resource management."""
     global all_agents_global, last_save_time, seen_agents, active_browser
     all_agents_global = []
@@ -344,6 +346,7 @@ async def _run_scraper(fields_to_extract):
     browser = None
     context = None
     page = None
+    block_stats = None
 
     # Create lock file
     create_lock_file()
@@ -367,6 +370,7 @@ async def _run_scraper(fields_to_extract):
                 viewport={'width': 1280, 'height': 800},
                 user_agent=get_random_user_agent()
             )
+            block_stats = await apply_blocking_profile(context, blocking_profile)
             page = await context.new_page()
 
             if scraper_stop_event.is_set() or check_for_new_instance():
@@ -412,6 +416,9 @@ async def _run_scraper(fields_to_extract):
                 logging.error(f"Error closing browser: {e}")
         active_browser = None
         gc.collect()
+        if block_stats:
+            print(f"Request blocking: {block_stats.summary()}")
+            logging.info(f"Request blocking: {block_stats.summary()}")
         
         if all_agents_global and not (scraper_stop_event.is_set() or check_for_new_instance()):
             save_data(all_agents_global, fields_to_extract)
@@ -431,7 +438,7 @@ async def _run_scraper(fields_to_extract):
         remove_lock_file()
         print("Browser closed. Scraping completed")
 
-def get_compass_agents(fields_to_extract=['email', 'name', 'phone']):
+def get_compass_agents(fields_to_extract=['email', 'name', 'phone'], blocking_profile=BLOCKING_PROFILE):
     """Start scraper in background and stop previous instance if running."""
     global current_scraper_thread, scraper_stop_event
 
@@ -457,7 +464,7 @@ def get_compass_agents(fields_to_extract=['email', 'name', 'phone']):
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         try:
-            loop.run_until_complete(_run_scraper(fields_to_extract))
+            loop.run_until_complete(_run_scraper(fields_to_extract, blocking_profile))
         finally:
             loop.close()
 
@@ -10,6 +10,7 @@ import logging
 import psutil
 import datetime
 from fakeagents import get_random_user_agent
+from blocking import apply_blocking_profile
 from mainthread import startThread, stopThread, current_scraper_thread, scraper_stop_event
 from emailSender import send_email
 
@@ -20,6 +21,7 @@ TIMEOUT = 60000  # 60 seconds timeout
 REQUEST_DELAY = 2  # Increased delay for stability
 MEMORY_THRESHOLD_MB = 2000  # 2 GB threshold
 CONCURRENT_REQUESTS = 8  # Controlled concurrency
+BLOCKING_PROFILE = "no-media"  # Request blocking: "text-only", "no-media" or "full"
 
 os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 
@@ -240,7 +242,7 @@ def check_memory():
         return True
     return False
 
-async def _run_scraper(url, fields_to_extract):
+async def _run_scraper(url, fields_to_extract, blocking_profile=BLOCKING_PROFILE):
     start_time = datetime.datetime.now()  # Use datetime for consistency
     success = False
     error_message = None
@@ -250,6 +252,7 @@ async def _run_scraper(url, fields_to_extract):
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=True, args=['--disable-gpu', '--no-sandbox'])  # Open browser visibly
         context = await browser.new_context(viewport={'width': 1280, 'height': 800},user_agent=get_random_user_agent())
+        block_stats = await apply_blocking_profile(context, blocking_profile)
         page = await context.new_page()
         
         try:
@@ -274,6 +277,8 @@ async def _run_scraper(url, fields_to_extract):
         finally:
             await browser.close()
             gc.collect()
+            print(f"Request blocking: {block_stats.summary()}")
+            logging.info(f"Request blocking: {block_stats.summary()}")
             
             elapsed_time = (datetime.datetime.now() - start_time).total_seconds()
             with open(PROGRESS_FILE, "r", encoding='utf-8') as f:
@@ -308,7 +313,7 @@ async def _run_scraper(url, fields_to_extract):
             print(f"Scraping completed. Processed {total_processed} agents saved to {OUTPUT_FOLDER}/remax_agents.csv")
             logging.info(f"Scraping completed. Processed {total_processed} agents")
 
-def get_remax_all_data(fields_to_extract=['name', 'phone']):
+def get_remax_all_data(fields_to_extract=['name', 'phone'], blocking_profile=BLOCKING_PROFILE):
     """
     Start the Re/Max scraper in the background, stopping any previous instance with 100% certainty.
     """
@@ -333,7 +338,7 @@ def get_remax_all_data(fields_to_extract=['name', 'phone']):
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         try:
-            loop.run_until_complete(_run_scraper(url, fields_to_extract))
+            loop.run_until_complete(_run_scraper(url, fields_to_extract, blocking_profile))
         except Exception as e:
             print(f"Scraper encountered an error: {e}")
             logging.error(f"Scraper encountered an error: {e}")
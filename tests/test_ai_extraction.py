@@ -0,0 +1,38 @@
+import threading
+
+import scraper
+from ai_cache import AiCache
+
+PAGE = "<html><body><p>Jane Doe jane@example.com</p></body></html>"
+
+
+class RecordingCache(AiCache):
+    """AiCache remembering the threads that touched it."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.threads = set()
+
+    def get(self, key):
+        self.threads.add(threading.get_ident())
+        return super().get(key)
+
+    def put(self, key, value):
+        self.threads.add(threading.get_ident())
+        return super().put(key, value)
+
+
+def test_cache_stays_off_the_pool_loop(tmp_path, monkeypatch):
+    cache = RecordingCache(str(tmp_path / "ai.sqlite3"))
+    calls = []
+
+    async def complete(provider, prompt, api_key):
+        calls.append(threading.get_ident())
+        return '{"email": ["jane@example.com"]}'
+
+    monkeypatch.setattr(scraper, "ai_cache", cache)
+    monkeypatch.setattr(scraper, "complete", complete)
+    assert scraper.extract_data_with_ai(PAGE, ["email"]) == {"email": ["jane@example.com"]}
+    assert scraper.extract_data_with_ai(PAGE, ["email"]) == {"email": ["jane@example.com"]}
+    assert len(calls) == 1  # The second page was answered from the cache
+    assert cache.threads == {threading.get_ident()}
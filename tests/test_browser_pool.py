@@ -0,0 +1,52 @@
+import asyncio
+
+from browser_pool import BrowserPool
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+
+    def is_connected(self):
+        return self.connected
+
+    async def close(self):
+        self.connected = False
+
+
+class FakeChromium:
+    def __init__(self):
+        self.launched = []
+
+    async def launch(self, **kwargs):
+        await asyncio.sleep(0.01)  # Lets concurrent callers reach the slot meanwhile
+        browser = FakeBrowser()
+        self.launched.append(browser)
+        return browser
+
+
+class FakePlaywright:
+    def __init__(self):
+        self.chromium = FakeChromium()
+
+
+def test_concurrent_relaunches_of_a_slot_launch_once():
+    async def run():
+        pool = BrowserPool(browsers=1, health_check_interval=0)
+        pool._playwright = FakePlaywright()
+        slot = pool._slots[0]
+        dead = FakeBrowser()
+        dead.connected = False
+        slot.browser = dead
+        closed = []
+        async def close():
+            closed.append(dead)
+        dead.close = close
+        await asyncio.gather(pool.health_check(), pool._ensure_browser(slot), pool._ensure_browser(slot))
+        return pool, slot, closed
+
+    pool, slot, closed = asyncio.run(run())
+    assert len(pool._playwright.chromium.launched) == 1
+    assert slot.browser is pool._playwright.chromium.launched[0]
+    assert len(closed) == 1
+    assert slot.launches == 1
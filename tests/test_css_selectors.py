@@ -0,0 +1,30 @@
+import pytest
+
+from html_parser import available_backends, parse_html
+from scraper import find_elements_by_selectors
+
+PAGE = """<html><body><div id="list">
+<article class="card"><h3 class="name">Jane Doe</h3><p>Broker</p><span class="tel">555-100-2000</span></article>
+<article class="card"><h3 class="name">John Roe</h3><span class="tel">555-100-3000</span><span class="tel">555-100-4000</span></article>
+</div><ul><li>1</li><li class="x">2</li><li>3</li></ul></body></html>"""
+
+SELECTORS = ["#list .name", ".card > .tel", "h3 + p", "h3 ~ .tel", "article:first-child .tel",
+             "li.x + li", "body > div > article:not(:first-child) span", "li:nth-of-type(3)", "div, ul > li"]
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_matches_agrees_with_select(backend):
+    root = parse_html(PAGE, backend)
+    elements = root.select("*")
+    for selector in SELECTORS:
+        expected = [node.key for node in root.select(selector)]
+        assert [node.key for node in elements if node.matches(selector)] == expected, selector
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_rows_from_one_combined_query(backend):
+    rows = find_elements_by_selectors(PAGE, {"name": ".name", "phone": ".tel", "card": "article h3"}, backend=backend)
+    assert rows == [
+        {"name": "Jane Doe", "phone": "555-100-2000", "card": "Jane Doe"},
+        {"name": "John Roe", "phone": "555-100-3000, 555-100-4000", "card": "John Roe"},
+    ]
@@ -0,0 +1,33 @@
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+import extraction_pool
+from extraction_pool import crawl_page_task, get_extraction_executor, run_extraction_sync
+from html_parser import ParsedPage
+
+
+def test_workers_are_not_forked():
+    assert get_extraction_executor()._mp_context.get_start_method() != "fork"
+
+
+def test_broken_pool_is_replaced():
+    broken = get_extraction_executor()
+    with pytest.raises(BrokenProcessPool):
+        run_extraction_sync(os._exit, 1)  # Kills the worker
+    assert extraction_pool._executor is not broken
+    found = run_extraction_sync(crawl_page_task, "<p>agent@acme.com</p>", ["email"])["fields"]
+    assert found == {"email": ["agent@acme.com"]}
+    assert get_extraction_executor() is not broken
+
+
+def test_worker_summary_spares_the_crawl_side_parse():
+    page = '<html><body><main><p>agent0@acme.com</p></main><nav class="pagination"><a class="next" href="?page=2">Next</a></nav></body></html>'
+    parsed = crawl_page_task(page, ["email"], "ai", links=True, selectors=(".pagination .next",))
+    assert parsed["fields"] == {}
+    crawl_side = ParsedPage(page, summary=parsed["summary"])
+    assert crawl_side.links() == ["?page=2"]
+    assert crawl_side.hrefs(".pagination .next") == ["?page=2"]
+    assert "agent0@acme.com" in crawl_side.clean_text()
+    assert crawl_side._document is None
@@ -0,0 +1,23 @@
+from extraction import extract_fields
+from utils import get_field_scanner, scan_fields
+
+
+def test_name_does_not_swallow_email_local_part():
+    found = scan_fields("Email John.Smith@acme.com", ["name", "email"])
+    assert found["email"] == ["John.Smith@acme.com"]
+    assert "Email John" in found["name"]
+
+
+def test_extract_fields_keeps_full_email_next_to_name():
+    html = "<div><p>Jane Doe</p><p>Jane.Doe@acme.com</p><p>555-123-4567</p></div>"
+    found = extract_fields(html, ["name", "email", "phone"])
+    assert found["email"] == ["Jane.Doe@acme.com"]
+    assert found["phone"] == ["5551234567"]
+    assert "Jane Doe" in found["name"]
+
+
+def test_fields_sharing_a_pattern_get_their_own_lists():
+    found = get_field_scanner(("phone", "mobile")).scan("Call 555-123-4567")
+    assert found["phone"] == found["mobile"] == [("555-123-4567", 5, 17)]
+    found["phone"].append(("extra", 0, 0))
+    assert len(found["mobile"]) == 1
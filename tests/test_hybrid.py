@@ -0,0 +1,27 @@
+import json
+
+from extraction_pool import crawl_page_task
+
+CARDS = "".join(
+    f'<div class="card"><h3>Featured Listing</h3><p>Luxury Homes Near Downtown</p>'
+    f'<p>555-200-{1000 + i}</p><p>agent{i}@acme.com</p></div>'
+    for i in range(5)
+)
+
+
+def test_noisy_capitalised_text_still_asks_for_names():
+    page = f"<html><body><h1>Contact Us Today</h1><main>{CARDS}</main></body></html>"
+    parsed = crawl_page_task(page, ["name", "email", "phone"], "hybrid")
+    assert parsed["fields"]["name"]  # The name pattern matched headings, which is why it is not trusted
+    assert parsed["unresolved"] == ["name"]
+    assert parsed["container"].startswith("<main>")
+
+
+def test_structured_names_are_resolved():
+    people = [{"@context": "https://schema.org", "@type": "Person", "name": f"Agent {i}"} for i in range(2)]
+    page = (f'<html><head><script type="application/ld+json">{json.dumps(people)}</script></head>'
+            f"<body><main>{CARDS}</main></body></html>")
+    parsed = crawl_page_task(page, ["name", "email", "mobile"], "hybrid")
+    assert parsed["fields"]["name"][:2] == ["Agent 0", "Agent 1"]
+    assert parsed["unresolved"] == ["mobile"]
+
@@ -0,0 +1,99 @@
+import asyncio
+import json
+
+import httpx
+
+import load_more_replay
+import test2
+from load_more_replay import LoadMoreRequest, replay_load_more_items, replayed_to_html
+
+RECORDED = LoadMoreRequest("https://example.com/agents?page=1", "GET", {}, None, "query", "page", 1, 1)
+
+
+def mock_client(handler, monkeypatch):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(load_more_replay, "get_http_client", lambda: client)
+
+
+def test_json_data_without_markup_has_no_items():
+    responses = [("application/json", json.dumps({"agents": [{"name": "Jane Doe"}]}))]
+    assert replayed_to_html(responses) == []
+
+
+def test_fragments_without_matching_items_are_dropped():
+    responses = [("text/html", '<div class="agent-info">Jane</div>'), ("text/html", "<p>No more results</p>")]
+    fragments = replayed_to_html(responses, ".agent-info")
+    assert fragments == ['<div data-load-more-page="1"><div class="agent-info">Jane</div></div>']
+
+
+def test_failed_first_request_yields_no_items(monkeypatch):
+    mock_client(lambda request: httpx.Response(500), monkeypatch)
+    assert asyncio.run(replay_load_more_items(RECORDED, 5)) == []
+
+
+def test_replay_error_yields_no_items(monkeypatch):
+    async def broken(recorded, max_pages):
+        raise RuntimeError("pool closed")
+    monkeypatch.setattr(load_more_replay, "replay_load_more", broken)
+    assert asyncio.run(replay_load_more_items(RECORDED, 5)) == []
+
+
+def test_replayed_items_are_returned(monkeypatch):
+    def handler(request):
+        page = int(request.url.params["page"])
+        body = f'<div class="agent-info">Agent {page}</div>' if page < 4 else ""
+        return httpx.Response(200, text=body, headers={"content-type": "text/html"})
+    mock_client(handler, monkeypatch)
+    fragments = asyncio.run(replay_load_more_items(RECORDED, 10, ".agent-info"))
+    assert len(fragments) == 2  # Pages 2 and 3; page 1 came from the recorded click
+
+
+class FakeButton:
+    def __init__(self, page):
+        self.page = page
+
+    async def is_visible(self):
+        return self.page.remaining > 0
+
+    async def click(self, timeout=None):
+        self.page.remaining -= 1
+        self.page.agents += 10
+
+
+class FakePage:
+    """Agent listing where every 'Load More' click adds 10 agents."""
+
+    def __init__(self, clicks):
+        self.remaining = clicks
+        self.agents = 10
+        self.button = FakeButton(self)
+
+    async def wait_for_selector(self, selector, **kwargs):
+        return None
+
+    async def wait_for_timeout(self, ms):
+        return None
+
+    async def query_selector(self, selector):
+        return self.button
+
+    async def query_selector_all(self, selector):
+        return [None] * self.agents
+
+    async def evaluate(self, script, arg=None):
+        raise AssertionError("nothing should be inserted")
+
+
+def test_load_all_agents_clicks_when_replay_returns_json_data(monkeypatch):
+    async def record(page, click):
+        await click()
+        return RECORDED
+
+    def handler(request):
+        return httpx.Response(200, json={"agents": [{"name": "Jane Doe"}]})
+
+    monkeypatch.setattr(test2, "record_load_more_request", record)
+    monkeypatch.setattr(test2, "PAGE_STABILIZE_DELAY", 0)
+    mock_client(handler, monkeypatch)
+    page = FakePage(clicks=4)
+    assert asyncio.run(test2.load_all_agents(page)) == 50
@@ -0,0 +1,13 @@
+import numpy as np
+import pandas as pd
+
+from phone import format_mobile_number, format_mobile_numbers
+
+
+def test_scalar_and_vectorised_formatting_agree():
+    values = [5551234567.0, np.float64(5559876543.0), "(555) 123-4567", 5551234567, None, "12345", 555.5]
+    vectorised = format_mobile_numbers(pd.Series(values, dtype="object"), True, True)
+    assert [format_mobile_number(value, True, True) for value in values] == list(vectorised)
+    assert format_mobile_number(5551234567.0) == "0015551234567"
+    floats = pd.Series([5551234567.0, np.nan])
+    assert list(format_mobile_numbers(floats)) == [format_mobile_number(value) for value in floats]
@@ -0,0 +1,33 @@
+import json
+
+from extraction_pool import crawl_page_task
+
+BROKERAGE = {"@context": "https://schema.org", "@type": "RealEstateAgent",
+             "name": "Acme Realty", "telephone": "(555) 000-0000", "email": "office@acme.com"}
+
+
+def roster_page(agents=30):
+    cards = "".join(
+        f'<div class="card"><h3>Agent {i}</h3><p>555-{i:03d}-{1000 + i}</p><p>agent{i}@acme.com</p></div>'
+        for i in range(agents)
+    )
+    return (f'<html><head><script type="application/ld+json">{json.dumps(BROKERAGE)}</script></head>'
+            f'<body><main>{cards}</main></body></html>')
+
+
+def test_page_level_record_does_not_skip_the_text_scan():
+    found = crawl_page_task(roster_page(), ["phone", "email"])["fields"]
+    assert found["phone"][0] == "5550000000"
+    assert found["email"][0] == "office@acme.com"
+    assert len(found["phone"]) == 31
+    assert len(found["email"]) == 31
+
+
+def test_per_item_records_skip_the_text_scan():
+    people = [{"@context": "https://schema.org", "@type": "Person", "name": f"Agent {i}",
+               "telephone": f"555-100-{1000 + i}", "email": f"agent{i}@acme.com"} for i in range(3)]
+    page = (f'<html><head><script type="application/ld+json">{json.dumps(people)}</script></head>'
+            '<body><footer>Report abuse: abuse@hosting.example</footer></body></html>')
+    found = crawl_page_task(page, ["phone", "email"])["fields"]
+    assert found["email"] == ["agent0@acme.com", "agent1@acme.com", "agent2@acme.com"]
+    assert found["phone"] == ["5551001000", "5551001001", "5551001002"]
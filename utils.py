@@ -2,9 +2,14 @@
 
 import uuid
 import re
+import asyncio
+import random
+import threading
+from functools import lru_cache
 from urllib.parse import urlparse
 import time
-from datetime import datetime
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 
 def generate_unique_id():
     """Generate a unique identifier"""
@@ -97,26 +102,150 @@ def create_extraction_plan(fields):
     
     return plan
 
+class FieldScanner:
+    """
+    Finds every requested field in a text with patterns compiled once.
+
+    Each distinct pattern is compiled a single time and run over the text on
+    its own, so the cost is one pass per distinct pattern; fields that share
+    a pattern (phone, mobile) share its pass. Matches of different fields may
+    overlap, exactly as with a separate re.finditer per field (a name pattern
+    cannot swallow the local part of an email). A single pass over lookahead
+    groups gives the same matches but steps through every match in Python,
+    which is several times slower than these C-level passes.
+    """
+
+    def __init__(self, field_patterns):
+        self.fields = [field for field, _ in field_patterns]
+        self.groups = {}  # pattern -> (compiled regex, fields using it)
+        for field, pattern in field_patterns:
+            if pattern not in self.groups:
+                self.groups[pattern] = (re.compile(pattern), [])
+            self.groups[pattern][1].append(field)
+
+    def scan(self, text):
+        """Return {field: [(value, start, end), ...]} in text order."""
+        results = {field: [] for field in self.fields}
+        if not text:
+            return results
+        for regex, fields in self.groups.values():
+            found = [(match.group(), match.start(), match.end()) for match in regex.finditer(text)]
+            for field in fields:
+                results[field] = list(found)
+        return results
+
+    def findall(self, text):
+        """Return {field: [value, ...]} with whole-match values."""
+        return {field: [value for value, _, _ in matches] for field, matches in self.scan(text).items()}
+
+
+@lru_cache(maxsize=128)
+def compile_scanner(field_patterns):
+    """Cached FieldScanner for a tuple of (field, pattern) pairs."""
+    return FieldScanner(field_patterns)
+
+
+def get_field_scanner(fields):
+    """Scanner for the regex entries of create_extraction_plan(fields), built once per field set."""
+    plan = create_extraction_plan(fields)
+    pairs = [(field, entry['pattern']) for field, entry in plan.items() if entry['type'] == 'regex']
+    return compile_scanner(tuple(pairs))
+
+
+def scan_fields(text, fields):
+    """Extract all requested regex fields from text with cached patterns: {field: [values]}."""
+    return get_field_scanner(tuple(fields)).findall(text)
+
+
 def truncate_string(text, max_length=100):
     """Truncate string to specified length and add ellipsis if needed"""
     if len(text) <= max_length:
         return text
     return text[:max_length] + "..."
 
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
 class RateLimiter:
-    """Simple rate limiter for API calls or web requests"""
-    def __init__(self, calls_per_minute=60):
+    """
+    Token-bucket limiter for API calls: requests per minute and, optionally,
+    tokens per minute.
+
+    Callers reserve capacity up front (the buckets may go negative) and then
+    sleep until their reservation is covered, so concurrent callers queue in
+    order instead of all waking at once. Thread-safe; wait()/acquire() block
+    the calling thread and acquire_async() awaits. A Retry-After from the
+    server pauses every caller via block_for().
+    """
+
+    def __init__(self, calls_per_minute=60, tokens_per_minute=None, jitter=0.1):
         self.calls_per_minute = calls_per_minute
-        self.interval = 60 / calls_per_minute
-        self.last_call_time = 0
-    
+        self.tokens_per_minute = tokens_per_minute
+        self.jitter = jitter  # Random extra delay, as a fraction of the wait
+        self._lock = threading.Lock()
+        self._calls = float(calls_per_minute)
+        self._tokens = float(tokens_per_minute or 0)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._updated = now
+        self._calls = min(self.calls_per_minute, self._calls + elapsed * self.calls_per_minute / 60)
+        if self.tokens_per_minute:
+            self._tokens = min(self.tokens_per_minute, self._tokens + elapsed * self.tokens_per_minute / 60)
+
+    def reserve(self, tokens=0):
+        """Take one call (and tokens) from the buckets; returns the seconds to wait before using them."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._calls -= 1
+            delay = -self._calls * 60 / self.calls_per_minute if self._calls < 0 else 0.0
+            if self.tokens_per_minute and tokens:
+                # A request larger than the whole budget waits for a full bucket, not forever
+                self._tokens -= min(tokens, self.tokens_per_minute)
+                if self._tokens < 0:
+                    delay = max(delay, -self._tokens * 60 / self.tokens_per_minute)
+            delay = max(delay, self._blocked_until - now)
+        if delay > 0:
+            delay += random.uniform(0, delay * self.jitter)
+        return delay
+
+    def record_tokens(self, tokens):
+        """Charge tokens reported after the call beyond what was reserved (negative refunds)."""
+        if not self.tokens_per_minute or not tokens:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.tokens_per_minute, self._tokens - tokens)
+
+    def block_for(self, seconds):
+        """Hold every caller for seconds (a Retry-After from the server)."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def acquire(self, tokens=0):
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, tokens=0):
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
     def wait(self):
         """Wait if necessary to respect rate limits"""
-        current_time = time.time()
-        time_since_last_call = current_time - self.last_call_time
-        
-        if time_since_last_call < self.interval:
-            sleep_time = self.interval - time_since_last_call
-            time.sleep(sleep_time)
-        
-        self.last_call_time = time.time()
+        self.acquire()